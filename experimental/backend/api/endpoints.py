@@ -1,24 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from backend.database import get_db
-from backend.services.youtube_service import YouTubeService
-from backend.services.sentiment_service import LocalSentimentService
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from typing import List, Optional
+from sqlalchemy import select, func, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db, SessionLocal
 from backend.services.analytics_service import AnalyticsService
-from backend.models.models import Channel, Video, Comment, SentimentType
-import datetime
+from backend.services.quota_service import quota_service, QuotaExceeded
+from backend.services.admission import admission, client_key, Overloaded
+from backend.services.job_queue import JobQueue
+from backend.services.scheduler import batch_scheduler, run_blocking, JOB_PRIORITY
+from backend.services.event_bus import event_bus
+from backend.services.metrics import QUEUE_DEPTH
+from backend.services.response_cache import response_cache, bump_versions, channel_scope, video_scope
+from backend.services.refresh_service import RefreshScheduler, enqueue_refresh, track_channel
+from backend.services import export_service, profiling, timeseries, topic_sketches, tracing
+from backend.models.models import Channel, Video, Comment, Job, JobCheckpoint, DataVersion, SentimentBucket, TopicSketch, TrackedChannel
+from backend.api.schemas import (
+    AnalysisDetached, BulkAnalyzeRequest, BulkAnalyzeResult, ChannelAnalysisStarted, ChannelOut, Insights, JobOut, ProfileCancelled, ProfileCapture,
+    StatusMessage, SystemStats, Timeseries, TopicSummary, TraceSummary, VideoDetails, VideoListItem,
+)
 
 router = APIRouter()
-youtube_service = YouTubeService()
-sentiment_service = LocalSentimentService()
+job_queue = JobQueue()
+
+# The job table is shared by every process, so only the API reports its depth
+QUEUE_DEPTH.add_function(lambda: {("jobs", status): count for status, count in job_queue.counts().items()})
 
+import datetime
+import functools
+import hmac
+import ipaddress
+import math
+import os
 import traceback
 
-@router.post("/channel/{channel_id}/analyze")
-def analyze_channel(channel_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    print(f"DEBUG: HIT analyze_channel with ID: {channel_id}")
+# The API only reads and enqueues; analysis runs in `pulsegrow-worker` processes.
+# Services are built on first use so importing the API doesn't load VADER/Gemini.
+
+@functools.lru_cache(maxsize=None)
+def get_youtube_service():
+    from backend.services.youtube_service import YouTubeService
+    return YouTubeService(priority="interactive") # User-facing calls draw on the interactive reserve
+
+@functools.lru_cache(maxsize=None)
+def get_sentiment_service():
+    from backend.services.sentiment_service import LocalSentimentService
+    return LocalSentimentService()
+
+# Routes are async: DB reads go through the async session, and anything that still
+# blocks (AnalyticsService, Gemini, YouTube, the job queue) is awaited on the
+# bounded run_blocking executor so slow calls can't starve light requests.
+
+def _in_session(fn, *args):
+    """Runs `fn(db, *args)` with its own sync session; used from run_blocking."""
+    db = SessionLocal()
     try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+async def _admit(request: Request, priority: str, **jobs):
+    """Admission control for routes that queue analysis work; 429 with Retry-After when over a limit."""
+    try:
+        await admission.admit(client_key(request), priority, jobs)
+    except (Overloaded, QuotaExceeded) as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after or 60))})
+
+@router.post("/channel/{channel_id}/analyze", response_model=ChannelAnalysisStarted)
+async def analyze_channel(channel_id: str, request: Request):
+    print(f"DEBUG: HIT analyze_channel with ID: {channel_id}")
+    await _admit(request, "channel", analyze_channel=1)
+
+    def start_analysis(db):
         # 1. Fetch Channel Info
-        channel_data = youtube_service.get_channel_details(channel_id)
+        channel_data = get_youtube_service().get_channel_details(channel_id)
         if not channel_data:
             raise HTTPException(status_code=404, detail="Channel not found")
         
@@ -30,6 +85,7 @@ def analyze_channel(channel_id: str, background_tasks: BackgroundTasks, db: Sess
 
         channel.title = channel_data["snippet"]["title"]
         channel.thumbnail_url = channel_data["snippet"]["thumbnails"]["default"]["url"]
+        track_channel(db, channel_id) # Kept fresh by incremental refreshes from now on
         db.commit()
 
         # Trigger Deep Analysis in Two Phases
@@ -38,8 +94,13 @@ def analyze_channel(channel_id: str, background_tasks: BackgroundTasks, db: Sess
         # Phase 1: Sync (Blocking) - Ensures videos are in DB before we return
         analytics.prepare_analysis_metadata(channel_id)
         
-        # Phase 2: Async (Background) - Deep analysis with fresh session
-        background_tasks.add_task(analytics.run_background_analysis, channel_id)
+        # Phase 2: Durable job - deep analysis runs in a worker process and survives restarts
+        job = job_queue.enqueue(
+            "analyze_channel",
+            {"channel_id": channel_id, "priority": "channel"},
+            dedup_key=f"channel:{channel_id}",
+            priority=JOB_PRIORITY["channel"],
+        )
         
         return {
             "status": "analyzed", 
@@ -47,89 +108,159 @@ def analyze_channel(channel_id: str, background_tasks: BackgroundTasks, db: Sess
             "channel_id": channel_id,
             "channel_title": channel.title, 
             "health_score": channel.health_score, 
+            "job_id": job.id,
             "message": "Deep analysis started in background."
         }
 
+    try:
+        # Single-flight per channel: concurrent requests share one metadata sync and job
+        return await run_blocking(event_bus.call, f"channel:{channel_id}", lambda: _in_session(start_analysis))
+
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after or 60))})
     except Exception as e:
         print(f"CRITICAL ERROR in analyze_channel: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Server Error: {str(e)}")
 
-@router.get("/channel/{channel_id}/insights")
-def get_channel_insights(channel_id: str, db: Session = Depends(get_db)):
-    """Fetch high-level aggregated insights for a channel."""
-    analytics = AnalyticsService(db)
-    insights = analytics.generate_detailed_channel_insights(channel_id)
-    return insights
+# Bulk onboarding: channels analyzed within CHANNEL_FRESH_SECONDS (every video
+# completed) are skipped unless `force` is set
+CHANNEL_FRESH_SECONDS = float(os.getenv("CHANNEL_FRESH_SECONDS", str(6 * 3600)))
+BULK_ANALYZE_MAX = int(os.getenv("BULK_ANALYZE_MAX", "200"))
+
+def _channel_is_fresh(db, channel) -> bool:
+    if channel is None or not channel.last_updated:
+        return False
+    if datetime.datetime.utcnow() - channel.last_updated > datetime.timedelta(seconds=CHANNEL_FRESH_SECONDS):
+        return False
+    statuses = {status for (status,) in db.query(Video.analysis_status).filter(Video.channel_id == channel.id).distinct()}
+    return statuses == {"completed"}
+
+def _start_bulk_analysis(db, inputs: list, force: bool):
+    from backend.services.youtube_service import parse_channel_input
+
+    # One channels().list call per 50 IDs (handles are one call each)
+    details = get_youtube_service().get_channels_details(inputs)
+    results, to_queue, seen = [], [], set()
+    for raw in inputs:
+        item = details.get(raw)
+        if not item:
+            results.append({"input": raw, "status": "not_found"})
+            continue
+        channel_id = item.get("id") or parse_channel_input(raw)
+        result = {"input": raw, "channel_id": channel_id, "channel_title": item["snippet"]["title"]}
+        results.append(result)
+        if channel_id in seen: # Same channel by ID and handle/URL
+            result["status"] = "duplicate"
+            continue
+        seen.add(channel_id)
 
-@router.get("/channel/{channel_id}")
-def get_channel(channel_id: str, db: Session = Depends(get_db)):
-    channel = db.query(Channel).filter(Channel.id == channel_id).first()
+        channel = db.query(Channel).filter(Channel.id == channel_id).first()
+        if not force and _channel_is_fresh(db, channel):
+            result["status"] = "fresh"
+            continue
+        if not channel:
+            channel = Channel(id=channel_id)
+            db.add(channel)
+        channel.title = item["snippet"]["title"]
+        channel.thumbnail_url = item["snippet"]["thumbnails"]["default"]["url"]
+        track_channel(db, channel_id)
+        to_queue.append(result)
+    db.commit()
+
+    # Video metadata and deep analysis both run in the job; an active job for a channel is reused
+    jobs = {}
+    for result in to_queue:
+        channel_id = result["channel_id"]
+        job = job_queue.enqueue(
+            "analyze_channel",
+            {"channel_id": channel_id, "priority": "backfill", "prepare_metadata": True},
+            dedup_key=f"channel:{channel_id}",
+            priority=JOB_PRIORITY["backfill"],
+        )
+        jobs[channel_id] = result["job_id"] = job.id
+        result["status"] = "queued"
+    for result in results:
+        if result["status"] == "duplicate":
+            result["job_id"] = jobs.get(result["channel_id"])
+    return {"queued": len(to_queue), "results": results}
+
+@router.post("/channels/analyze", response_model=BulkAnalyzeResult)
+async def analyze_channels(body: BulkAnalyzeRequest, request: Request):
+    """
+    Onboard many channels (IDs, @handles or URLs) at once. Returns as soon as the
+    channels are resolved and their `analyze_channel` jobs are queued; the jobs
+    fetch video metadata and run the deep analysis at backfill priority.
+    """
+    inputs = list(dict.fromkeys(c.strip() for c in body.channels if c.strip()))
+    if not inputs:
+        raise HTTPException(status_code=400, detail="No channels given")
+    if len(inputs) > BULK_ANALYZE_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_ANALYZE_MAX} channels per request")
+    await _admit(request, "backfill", analyze_channel=len(inputs)) # Upper bound: before fresh/duplicate inputs drop out
+    try:
+        return await run_blocking(_in_session, _start_bulk_analysis, inputs, body.force)
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after or 60))})
+
+@router.post("/channel/{channel_id}/refresh", response_model=JobOut)
+async def refresh_channel(channel_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Incremental refresh now: new uploads, video statistics and the comments posted
+    since the last sync, instead of re-running the full analysis. Tracks the channel.
+    """
+    if not await db.get(Channel, channel_id):
+        raise HTTPException(status_code=404, detail="Channel not found")
+    await _admit(request, "channel", refresh_channel=1)
+
+    def start_refresh(sync_db):
+        track_channel(sync_db, channel_id)
+        sync_db.commit()
+        return enqueue_refresh(channel_id, priority="channel")
+
+    return _job_to_dict(await run_blocking(_in_session, start_refresh))
+
+@router.delete("/channel/{channel_id}/tracking", response_model=StatusMessage)
+async def untrack_channel(channel_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Stop scheduled refreshes for a channel (its data is kept)."""
+    result = await db.execute(delete(TrackedChannel).where(TrackedChannel.channel_id == channel_id))
+    await db.commit()
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Channel is not tracked")
+    return {"status": "untracked", "message": f"Scheduled refreshes stopped for {channel_id}."}
+
+@router.get("/channel/{channel_id}/insights", response_model=Insights)
+async def get_channel_insights(channel_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Fetch high-level aggregated insights for a channel."""
+    async def compute():
+        return await run_blocking(
+            _in_session, lambda sync_db: AnalyticsService(sync_db).generate_detailed_channel_insights(channel_id)
+        )
+    return await response_cache.respond(request, db, channel_scope(channel_id), compute, Insights)
+
+@router.get("/channel/{channel_id}", response_model=ChannelOut)
+async def get_channel(channel_id: str, db: AsyncSession = Depends(get_async_db)):
+    channel = await db.get(Channel, channel_id)
     if not channel:
         raise HTTPException(status_code=404, detail="Channel not found")
     return channel
 
-@router.get("/channel/{channel_id}/videos")
-def get_channel_videos(channel_id: str, db: Session = Depends(get_db)):
-    videos = db.query(Video).filter(Video.channel_id == channel_id).all()
-    analytics = AnalyticsService(db)
-    
-    results = []
-    for v in videos:
-        v_dict = {
-            "id": v.id,
-            "title": v.title,
-            "thumbnail_url": v.thumbnail_url,
-            "published_at": v.published_at.isoformat() if v.published_at else None,
-            "view_count": v.view_count,
-            "like_count": v.like_count,
-            "comment_count": v.comment_count,
-            "sentiment_score": v.sentiment_score,
-            "analysis_status": v.analysis_status,
-        }
-        
-        if v.analysis_status == "completed":
-            v_dict["distribution"] = analytics.calculate_video_sentiment_distribution(v.id)
-            v_dict["insights"] = analytics.generate_video_insights(v.id)
-            
-            # Generate Top 50 Insights
-            comments = db.query(Comment).filter(Comment.video_id == v.id).all()
-            comments_list = [
-                {
-                    "id": c.id,
-                    "text": c.text,
-                    "author": c.author,
-                    "like_count": c.like_count
-                }
-                for c in comments
-            ]
-            v_dict["top_50_analysis"] = sentiment_service.generate_top_50_insights(comments_list)
-            
-        results.append(v_dict)
-        
-    return results
+# Channel video listing: plain Video columns by default, heavy parts on request
+VIDEO_LIST_FIELDS = (
+    "id", "title", "thumbnail_url", "published_at", "view_count", "like_count",
+    "comment_count", "sentiment_score", "analysis_status",
+)
+VIDEO_EXPANSIONS = ("distribution", "insights", "top_50")
 
-@router.get("/video/{video_id}")
-def get_video_details(video_id: str, db: Session = Depends(get_db)):
-    video = db.query(Video).filter(Video.id == video_id).first()
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
-        
+def _completed_video_analysis(db, video_id: str, include=VIDEO_EXPANSIONS):
+    """Distribution, insights and Gemini top-50 (the `include`d ones) for an analyzed video (blocking)."""
     analytics = AnalyticsService(db)
-    distribution = analytics.calculate_video_sentiment_distribution(video_id)
-    insights = analytics.generate_video_insights(video_id)
-    
-    insights = analytics.generate_video_insights(video_id)
-    
-    # Get Comparison Data (Shared Logic)
-    comparison_data = _get_comparison_data(db, video_id)
-
-    # Calculate analyzed count locally
-    analyzed_count = db.query(Comment).filter(Comment.video_id == video_id).count()
-
-    # Generate Top 50 Insights if video is analyzed
-    top_50_analysis = None
-    if video.analysis_status == "completed":
+    details = {}
+    if "distribution" in include:
+        details["distribution"] = analytics.calculate_video_sentiment_distribution(video_id)
+    if "insights" in include:
+        details["insights"] = analytics.generate_video_insights(video_id)
+    if "top_50" in include:
         comments = db.query(Comment).filter(Comment.video_id == video_id).all()
         comments_list = [
             {
@@ -140,20 +271,257 @@ def get_video_details(video_id: str, db: Session = Depends(get_db)):
             }
             for c in comments
         ]
-        top_50_analysis = sentiment_service.generate_top_50_insights(comments_list)
+        details["top_50_analysis"] = get_sentiment_service().generate_top_50_insights(comments_list)
+    return details
+
+def _parse_csv_param(value: Optional[str], allowed: tuple, name: str):
+    if not value:
+        return []
+    items = list(dict.fromkeys(v.strip() for v in value.split(",") if v.strip()))
+    unknown = [v for v in items if v not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown {name}: {', '.join(unknown)} (expected any of {', '.join(allowed)})"
+        )
+    return items
+
+async def _sentiment_distributions(db: AsyncSession, video_ids: list):
+    """Per-video sentiment shares in one grouped query (same shape as calculate_video_sentiment_distribution)."""
+    counts = {video_id: {} for video_id in video_ids}
+    rows = await db.execute(
+        select(Comment.video_id, Comment.sentiment, func.count())
+        .filter(Comment.video_id.in_(video_ids))
+        .group_by(Comment.video_id, Comment.sentiment)
+    )
+    for video_id, sentiment, count in rows:
+        if sentiment is not None:
+            counts[video_id][sentiment.value] = count
+    distributions = {}
+    for video_id, by_sentiment in counts.items():
+        total = sum(by_sentiment.values())
+        if total == 0:
+            distributions[video_id] = {"positive": 0, "neutral": 0, "negative": 0}
+        else:
+            distributions[video_id] = {s: by_sentiment.get(s, 0) / total for s in ("positive", "neutral", "negative")}
+    return distributions
+
+@router.get("/channel/{channel_id}/videos", response_model=List[VideoListItem], response_model_exclude_unset=True)
+async def get_channel_videos(
+    channel_id: str,
+    request: Request,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Videos of a channel. By default only the Video columns, from a single query.
+    `fields` picks a subset of them (`id` is always returned); `include` adds
+    `distribution`, `insights` and/or `top_50` (as `top_50_analysis`) for
+    completed videos, e.g. `?fields=title,sentiment_score&include=distribution`.
+    """
+    if fields:
+        fields = ["id"] + [f for f in _parse_csv_param(fields, VIDEO_LIST_FIELDS, "fields") if f != "id"]
+    else:
+        fields = list(VIDEO_LIST_FIELDS)
+    include = _parse_csv_param(include, VIDEO_EXPANSIONS, "include")
+    # Cached per channel data version; repeated polls cost one version lookup (or a 304)
+    return await response_cache.respond(
+        request, db, channel_scope(channel_id), lambda: _channel_videos(db, channel_id, fields, include),
+        List[VideoListItem],
+    )
+
+async def _channel_videos(db: AsyncSession, channel_id: str, fields: list, include: list):
+    columns = list(dict.fromkeys(fields + (["analysis_status"] if include else [])))
+    rows = (await db.execute(
+        select(*(getattr(Video, name) for name in columns)).filter(Video.channel_id == channel_id)
+    )).all()
+
+    results = []
+    completed = []
+    for row in rows:
+        values = dict(zip(columns, row))
+        if values.get("published_at"):
+            values["published_at"] = values["published_at"].isoformat()
+        if include and values["analysis_status"] == "completed":
+            completed.append(values["id"])
+        results.append({name: values[name] for name in fields})
+    if not completed:
+        return results
+
+    by_id = {v_dict["id"]: v_dict for v_dict in results}
+    if "distribution" in include:
+        for video_id, distribution in (await _sentiment_distributions(db, completed)).items():
+            by_id[video_id]["distribution"] = distribution
+
+    # Insights and Gemini top-50 are per video; run them concurrently off the event loop.
+    # Return the pooled connection first so waiting on Gemini doesn't hold it.
+    await db.close()
+    per_video = [part for part in include if part != "distribution"]
+    if per_video:
+        details = await asyncio.gather(*(
+            run_blocking(_in_session, _completed_video_analysis, video_id, per_video) for video_id in completed
+        ))
+        for video_id, extra in zip(completed, details):
+            by_id[video_id].update(extra)
+    return results
+
+@router.get("/video/{video_id}", response_model=VideoDetails)
+async def get_video_details(
+    video_id: str, request: Request, include: Optional[str] = None, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Distribution, insights and the VADER/Gemini comparison of a video. The Gemini
+    top-50 analysis of a completed video costs an LLM call, so it is only generated
+    with `?include=top_50` (distribution and insights are always returned).
+    """
+    include = _parse_csv_param(include, VIDEO_EXPANSIONS, "include")
+    return await response_cache.respond(
+        request, db, video_scope(video_id), lambda: _video_details(db, video_id, include), VideoDetails
+    )
+
+async def _video_details(db: AsyncSession, video_id: str, include: list):
+    video = await db.get(Video, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    # Get Comparison Data (Shared Logic)
+    comparison_data = await _get_comparison_data(db, video_id)
+
+    # Calculate analyzed count locally
+    analyzed_count = await db.scalar(select(func.count(Comment.id)).filter(Comment.video_id == video_id))
+    await db.close() # Don't hold a pooled connection while waiting on Gemini
+
+    def analysis(sync_db):
+        # Top 50 insights only for analyzed videos, and only when asked for
+        wanted = ["distribution", "insights"]
+        if "top_50" in include and video.analysis_status == "completed":
+            wanted.append("top_50")
+        return _completed_video_analysis(sync_db, video_id, wanted)
+
+    details = await run_blocking(_in_session, analysis)
 
     return {
         "video": video,
-        "sentiment_distribution": distribution,
+        "sentiment_distribution": details["distribution"],
         "comparison": comparison_data,
-        "insights": insights,
+        "insights": details["insights"],
         "analyzed_comment_count": analyzed_count,
-        "top_50_analysis": top_50_analysis
+        "top_50_analysis": details.get("top_50_analysis")
     }
 
-def _get_comparison_data(db: Session, video_id: str):
+# --- Time series ---
+
+async def _timeseries_response(request: Request, db: AsyncSession, scope: str, start, end, resolution, points):
+    if resolution is not None and resolution not in timeseries.RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution '{resolution}' (expected one of {', '.join(timeseries.RESOLUTIONS)})")
+    if not 1 <= points <= timeseries.MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"points must be between 1 and {timeseries.MAX_POINTS}")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    async def compute():
+        try:
+            series = await timeseries.load_timeseries(db, scope, start, end, resolution, points)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if series is None:
+            return {"scope": scope, "resolution": resolution or "day", "window_seconds": 0, "points": []}
+        return series
+
+    return await response_cache.respond(request, db, scope, compute, Timeseries)
+
+@router.get("/video/{video_id}/timeseries", response_model=Timeseries)
+async def get_video_timeseries(
+    video_id: str, request: Request, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+    resolution: Optional[str] = None, points: int = timeseries.DEFAULT_POINTS, db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Sentiment of the video's comments over time, by publish time: counts by label and
+    average/like-weighted scores per window. `resolution` (hour/day/week) defaults to
+    the finest that fits the range; windows are merged down to at most `points`.
+    """
+    if not await db.get(Video, video_id):
+        raise HTTPException(status_code=404, detail="Video not found")
+    return await _timeseries_response(request, db, video_scope(video_id), start, end, resolution, points)
+
+@router.get("/channel/{channel_id}/timeseries", response_model=Timeseries)
+async def get_channel_timeseries(
+    channel_id: str, request: Request, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+    resolution: Optional[str] = None, points: int = timeseries.DEFAULT_POINTS, db: AsyncSession = Depends(get_async_db),
+):
+    """Sentiment across all of the channel's stored comments over time (see /video/{id}/timeseries)."""
+    if not await db.get(Channel, channel_id):
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return await _timeseries_response(request, db, channel_scope(channel_id), start, end, resolution, points)
+
+# --- Topics ---
+
+async def _topics_response(request: Request, db: AsyncSession, scope: str, start, end, limit: int):
+    if not 1 <= limit <= topic_sketches.TOPIC_SKETCH_CAPACITY:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {topic_sketches.TOPIC_SKETCH_CAPACITY}")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    async def compute():
+        try:
+            return await topic_sketches.load_topics(db, scope, start, end, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await response_cache.respond(request, db, scope, compute, TopicSummary)
+
+@router.get("/video/{video_id}/topics", response_model=TopicSummary)
+async def get_video_topics(
+    video_id: str, request: Request, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+    limit: int = topic_sketches.DEFAULT_TOP_N, db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Most mentioned topics in the video's comments, from its bounded topic sketches.
+    With `start`/`end`, only comments published in the weeks the range touches.
+    Counts are lower bounds within `max_error`.
+    """
+    if not await db.get(Video, video_id):
+        raise HTTPException(status_code=404, detail="Video not found")
+    return await _topics_response(request, db, video_scope(video_id), start, end, limit)
+
+@router.get("/channel/{channel_id}/topics", response_model=TopicSummary)
+async def get_channel_topics(
+    channel_id: str, request: Request, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+    limit: int = topic_sketches.DEFAULT_TOP_N, db: AsyncSession = Depends(get_async_db),
+):
+    """Most mentioned topics across all of the channel's stored comments (see /video/{id}/topics)."""
+    if not await db.get(Channel, channel_id):
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return await _topics_response(request, db, channel_scope(channel_id), start, end, limit)
+
+# --- Exports ---
+
+def _export_response(fmt: str, name: str, **scope):
+    if fmt not in export_service.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{fmt}' (expected one of {', '.join(export_service.FORMATS)})")
+    return StreamingResponse(
+        export_service.stream_comments(fmt, **scope),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}.gz"'},
+    )
+
+@router.get("/video/{video_id}/comments/export", response_class=StreamingResponse)
+async def export_video_comments(video_id: str, format: str = "ndjson", db: AsyncSession = Depends(get_async_db)):
+    """Every stored comment of the video with its sentiment columns, as gzip-compressed NDJSON or CSV."""
+    if not await db.get(Video, video_id):
+        raise HTTPException(status_code=404, detail="Video not found")
+    return _export_response(format, f"comments-{video_id}", video_id=video_id)
+
+@router.get("/channel/{channel_id}/comments/export", response_class=StreamingResponse)
+async def export_channel_comments(channel_id: str, format: str = "ndjson", db: AsyncSession = Depends(get_async_db)):
+    """Every stored comment across the channel's videos, streamed like the video export."""
+    if not await db.get(Channel, channel_id):
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return _export_response(format, f"comments-{channel_id}", channel_id=channel_id)
+
+async def _get_comparison_data(db: AsyncSession, video_id: str):
     """Helper to calculate VADER vs Gemini stats from stored comments."""
-    comments = db.query(Comment).filter(Comment.video_id == video_id).all()
+    comments = (await db.execute(select(Comment).filter(Comment.video_id == video_id))).scalars().all()
     if not comments:
         return None
 
@@ -183,301 +551,266 @@ def _get_comparison_data(db: Session, video_id: str):
     }
 
 
-def process_video_background(video_id: str, db: Session):
-    """Background task to fetch ALL comments and analyze them."""
-    print(f"BACKGROUND: Starting deep analysis for {video_id}")
-    
-    try:
-        # Update status to processing
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.analysis_status = "processing"
-            db.commit()
-            
-        # Fetch ALL available comments
-        comments_data = youtube_service.get_video_comments(video_id, max_results=None)
-        
-        count_processed = 0
-        for c_data in comments_data:
-            try:
-                snippet = c_data["snippet"]["topLevelComment"]["snippet"]
-                cid = c_data["id"]
-                
-                # Upsert Comment
-                # We use a new session or be careful with the existing one passed in? 
-                # Better to use a fresh session in real app, but here we reuse for simplicity 
-                # (Note: passing session to background task is risky if session closes. 
-                # Ideally we create a new session inside this task. For this demo, we'll try reusing or relying on scope.)
-                
-                # RE-QUERYING to be safe
-                comment = db.query(Comment).filter(Comment.id == cid).first()
-                if not comment:
-                    comment = Comment(id=cid, video_id=video_id)
-                    db.add(comment)
-                
-                comment.text = snippet["textDisplay"]
-                comment.author = snippet["authorDisplayName"]
-                comment.like_count = snippet["likeCount"]
-                comment.published_at = datetime.datetime.fromisoformat(snippet["publishedAt"].replace('Z', '+00:00'))
-                
-                # Analyze
-                analysis = sentiment_service.analyze_comment(comment.text)
-                
-                if "vader" in analysis:
-                    comment.vader_sentiment = analysis["vader"]["sentiment"]
-                    comment.vader_score = analysis["vader"]["score"]
-                
-                if "gemini" in analysis and analysis["gemini"]["available"]:
-                    comment.gemini_sentiment = analysis["gemini"]["sentiment"]
-                    comment.gemini_score = analysis["gemini"]["score"]
-                
-                final_s = analysis["final_sentiment"]
-                if final_s == "positive": comment.sentiment = SentimentType.POSITIVE
-                elif final_s == "negative": comment.sentiment = SentimentType.NEGATIVE
-                else: comment.sentiment = SentimentType.NEUTRAL
-                
-                count_processed += 1
-                
-                if count_processed % 10 == 0:
-                     db.commit() # Commit periodically
-                     
-            except Exception as e:
-                print(f"ERROR processing comment {cid}: {e}")
-                continue
-        
-        db.commit()
-        
-        # Recalculate Stats
-        total_score = 0.0
-        total_weight = 0.0
-        fresh_comments = db.query(Comment).filter(Comment.video_id == video_id).all()
-        for comment in fresh_comments:
-            sentiment_val = 0.0
-            if comment.sentiment == SentimentType.POSITIVE: sentiment_val = 1.0
-            elif comment.sentiment == SentimentType.NEGATIVE: sentiment_val = -1.0
-            
-            weight = 1.0 + comment.like_count
-            total_score += sentiment_val * weight
-            total_weight += weight
-            
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video and total_weight > 0:
-            video.sentiment_score = total_score / total_weight
-            video.analysis_status = "completed"
-            
-        # Update Channel Health
-        analytics = AnalyticsService(db)
-        if video:
-            channel_id = video.channel_id
-            new_health_score = analytics.calculate_health_score(channel_id)
-            channel = db.query(Channel).filter(Channel.id == channel_id).first()
-            if channel:
-                channel.health_score = new_health_score
-        
-        db.commit()
-        print(f"BACKGROUND: Finished analysis for {video_id}. Processed {count_processed} comments.")
-        
-    except Exception as e:
-        print(f"BACKGROUND ERROR: {e}")
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.analysis_status = "error"
-            db.commit()
-
-from fastapi.responses import StreamingResponse
+import asyncio
 import json
 
-@router.post("/video/{video_id}/analyze")
-def analyze_video(video_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@router.post("/video/{video_id}/analyze", response_class=StreamingResponse)
+async def analyze_video(
+    video_id: str,
+    request: Request,
+    include_replies: Optional[bool] = None,
+    detach: bool = False,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_async_db),
+):
 
     """
     On-Demand Analysis with SSE for real-time progress updates.
+    `include_replies` overrides the INGEST_REPLIES default for reply ingestion.
+
+    The analysis runs as an interactive-priority `analyze_video` job in a worker;
+    this process only streams the job's progress and final result.
+
+    Single-flight per video: if an analysis is already running, this request
+    subscribes to its progress stream instead of starting another. Clients that
+    reconnect with `Last-Event-ID` resume after the last event they saw.
+
+    When every viewer disconnects, the job is cancelled and stops after its current
+    batches (committed ones are kept). `detach=true` lets it finish in the background.
     """
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found locally.")
+    running = event_bus.get(f"video:{video_id}")
+    if not running or running.done or running.cancel_event.is_set(): # Joining a running analysis adds no work
+        await _admit(request, "interactive", analyze_video=1)
 
-    def analysis_stream():
-        import time
-        # Standard constraints
+    def run_analysis(flight):
+        # Standard constraints: cap interactive runs at MAX_GEMINI_CALLS batches
         MAX_GEMINI_CALLS = 10
-        COMMENTS_PER_BATCH = 30
-        THROTTLE_DELAY = 0.1
 
-        try:
-            # 1. Fetch comments (Fetch ALL available)
-            comments_data = youtube_service.get_video_comments(video_id, max_results=None)
-            if not comments_data:
-                yield f"data: {json.dumps({'status': 'completed', 'message': 'No comments found'})}\n\n"
+        job = job_queue.enqueue(
+            "analyze_video",
+            {
+                "video_id": video_id,
+                "include_replies": include_replies,
+                "priority": "interactive",
+                "max_batches": MAX_GEMINI_CALLS,
+                "with_top_50": True,
+            },
+            dedup_key=f"video:{video_id}",
+            priority=JOB_PRIORITY["interactive"],
+        )
+        # An active backfill job for this video is watched, but never cancelled from here
+        interactive = json.loads(job.payload or "{}").get("priority") == "interactive"
+        _in_session(_set_analysis_status, video_id, "processing")
+
+        for state in job_queue.follow(job.id, stop_event=flight.cancel_event):
+            if state.status == "completed":
+                yield json.loads(state.result) if state.result else {"status": "completed"}
                 return
+            if state.status in ("failed", "cancelled"):
+                yield {"status": "error", "message": state.last_error or f"Analysis {state.status}."}
+                return
+            yield {"status": "processing", "progress": state.progress, "total": state.total, "job_id": job.id}
 
-            # Yield Initial State
-            total_comments = len(comments_data)
-            yield f"data: {json.dumps({'status': 'processing', 'progress': 0, 'total': total_comments})}\n\n"
-
-            processed_count = 0
-            
-            # 2. Process Batches
-            # Enforce Limit: Cap at MAX_GEMINI_CALLS * COMMENTS_PER_BATCH
-            limit_total = min(total_comments, MAX_GEMINI_CALLS * COMMENTS_PER_BATCH)
-            
-            # A. PRE-UPSERT all comments to DB (Sequential, Fast)
-            # This ensures all Comment records exist with basic info before we try to update them in random order
-            comments_to_process = comments_data[0:limit_total]
-            for c_data in comments_to_process:
-                snippet = c_data["snippet"]["topLevelComment"]["snippet"]
-                cid = c_data["id"]
-                comment = db.query(Comment).filter(Comment.id == cid).first()
-                if not comment:
-                    comment = Comment(id=cid, video_id=video_id)
-                    db.add(comment)
-                
-                # Update basic fields
-                comment.text = snippet["textDisplay"]
-                comment.author = snippet["authorDisplayName"]
-                comment.like_count = snippet["likeCount"]
-                comment.published_at = datetime.datetime.fromisoformat(snippet["publishedAt"].replace('Z', '+00:00'))
-            
-            db.commit()
-
-            # B. Prepare Chunks for Parallel Analysis
-            chunks = []
-            for i in range(0, limit_total, COMMENTS_PER_BATCH):
-                 chunks.append((i, comments_data[i:i + COMMENTS_PER_BATCH]))
-
-            import concurrent.futures
-
-            def process_batch_live(start_idx, batch_data):
-                batch_id = f"b_{start_idx}"
-                comments_input = []
-                for c_data in batch_data:
-                    snippet = c_data["snippet"]["topLevelComment"]["snippet"]
-                    cid = c_data["id"]
-                    comments_input.append({"id": cid, "text": snippet["textDisplay"]})
-                
-                # Gemini Call
-                return sentiment_service.analyze_comment_batch(comments_input, video_id, batch_id)
-
-            # C. Run Parallel Analysis
-            # Use max_workers=5 to avoid hitting rate limits too hard (limit is 15 RPS usually for free tier)
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_batch = {executor.submit(process_batch_live, i, chunk): (i, chunk) for i, chunk in chunks}
-                
-                for future in concurrent.futures.as_completed(future_to_batch):
-                    start_idx, batch_data = future_to_batch[future]
-                    try:
-                        batch_results = future.result()
-                        
-                        # D. Update DB with Analysis Results
-                        for res in batch_results.get("results", []):
-                             c = db.query(Comment).filter(Comment.id == res["comment_id"]).first()
-                             if c:
-                                 c.sentiment = SentimentType(res["sentiment"])
-                                 c.vader_score = res["score"]
-                                 c.emoji_detected = 1 if res.get("emoji", False) else 0
-
-                        processed_count += len(batch_data)
-                        db.commit()
-                        
-                    except Exception as e:
-                         print(f"Batch failed: {e}")
-
-                    # Yield Progress
-                    yield f"data: {json.dumps({'status': 'processing', 'progress': processed_count, 'total': total_comments})}\\n\\n"
-
-            # 3. Finalize
-            analytics = AnalyticsService(db)
-            final_comments = db.query(Comment).filter(Comment.video_id == video_id).all()
-            total_score = 0.0
-            total_weight = 0.0
-            
-            # Prepare list for Top 50 Analysis
-            all_comments_list = []
-            
-            for c in final_comments:
-                val = c.vader_score if c.vader_score is not None else 0.0
-                w = 1.0 + c.like_count
-                total_score += val * w
-                total_weight += w
-                
-                all_comments_list.append({
-                    "id": c.id,
-                    "text": c.text,
-                    "author": c.author,
-                    "like_count": c.like_count
-                })
-            
-            if total_weight > 0:
-                video.sentiment_score = total_score / total_weight
-            
-            video.analysis_status = "completed"
-            db.commit()
-            print(f"DEBUG: Calculated Video {video.id} Sentiment Score: {video.sentiment_score} (Total Weight: {total_weight})")
-
-            channel = db.query(Channel).filter(Channel.id == video.channel_id).first()
-            if channel:
-                channel.health_score = analytics.calculate_health_score(channel.id)
-                db.commit()
-
-            # 4. Generate Top 50 Insights (Gemini)
-            yield f"data: {json.dumps({'status': 'processing', 'message': 'Generative AI is analyzing top 50 comments...'})}\n\n"
-            top_50_insights = sentiment_service.generate_top_50_insights(all_comments_list)
-
-            final_data = {
-                "status": "completed",
-                "video": {"id": video.id, "sentiment_score": video.sentiment_score},
-                "health_score": channel.health_score if channel else 0.0,
-                "insights": analytics.generate_video_insights(video_id),
-                "distribution": analytics.calculate_video_sentiment_distribution(video_id),
-                "top_50_analysis": top_50_insights
-            }
-            yield f"data: {json.dumps(final_data)}\n\n"
+        if flight.cancel_event.is_set() and interactive and job_queue.cancel(job.id):
+            _in_session(_set_analysis_status, video_id, "pending")
+            yield {"status": "cancelled"}
 
-        except Exception as e:
-            print(f"SSE Error: {e}")
-            yield f"data: {json.dumps({'status': 'error', 'message': str(e)})}\n\n"
+    flight, _ = event_bus.attach(f"video:{video_id}", run_analysis, last_event_id, detach=detach)
+
+    async def analysis_stream():
+        # Async subscriber: a viewer costs no thread, and a disconnect closes this generator at once
+        async for event_id, event in flight.asubscribe(last_event_id):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
 
     return StreamingResponse(analysis_stream(), media_type="text/event-stream")
 
+def _set_analysis_status(db, video_id: str, status: str):
+    db.query(Video).filter(Video.id == video_id).update({"analysis_status": status})
+    bump_versions(db, video_ids=[video_id]) # Bulk updates skip the flush hook
+    db.commit()
+
+@router.post("/video/{video_id}/analyze/detach", response_model=AnalysisDetached)
+async def detach_video_analysis(video_id: str):
+    """Let a running SSE analysis job finish in the background after its viewers disconnect."""
+    flight = event_bus.get(f"video:{video_id}")
+    if not flight or flight.done or flight.cancel_event.is_set():
+        raise HTTPException(status_code=404, detail="No analysis running for this video.")
+    flight.detach()
+    return {"status": "detached", "video_id": video_id}
+
+@router.post("/video/{video_id}/analyze/job", response_model=JobOut)
+async def enqueue_video_analysis(
+    video_id: str, request: Request, include_replies: Optional[bool] = None, db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Durable full analysis of every comment, run by a worker process.
+    Survives restarts and resumes from the last completed batch.
+    """
+    video = await db.get(Video, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found locally.")
+    await _admit(request, "backfill", analyze_video=1)
+
+    job = await run_blocking(
+        job_queue.enqueue,
+        "analyze_video",
+        {"video_id": video_id, "include_replies": include_replies, "priority": "backfill"},
+        dedup_key=f"video:{video_id}",
+        priority=JOB_PRIORITY["backfill"],
+    )
+    video.analysis_status = "processing"
+    await db.commit()
+    return _job_to_dict(job)
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_to_dict(job)
+
+def _job_to_dict(job):
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "total": job.total,
+        "attempts": job.attempts,
+        "last_error": job.last_error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
 # --- NEW FUNCTIONS FOR SIDEBAR ---
 
-@router.get("/channels")
-def get_all_channels(db: Session = Depends(get_db)):
+@router.get("/channels", response_model=List[ChannelOut])
+async def get_all_channels(db: AsyncSession = Depends(get_async_db)):
     """Fetch all analyzed channels for the Reports page."""
-    channels = db.query(Channel).all()
+    channels = (await db.execute(select(Channel))).scalars().all()
     return channels
 
-@router.get("/admin/stats")
-def get_system_stats(db: Session = Depends(get_db)):
+@router.get("/admin/stats", response_model=SystemStats)
+async def get_system_stats(db: AsyncSession = Depends(get_async_db)):
     """Fetch system-wide statistics for the Admin page."""
-    total_channels = db.query(Channel).count()
-    total_videos = db.query(Video).count()
-    total_comments = db.query(Comment).count()
+    total_channels = await db.scalar(select(func.count(Channel.id)))
+    total_videos = await db.scalar(select(func.count(Video.id)))
+    total_comments = await db.scalar(select(func.count(Comment.id)))
     
     # Calculate average sentiment across all videos
     avg_sentiment = 0.0
-    videos = db.query(Video).all()
-    if videos:
-        avg_sentiment = sum(v.sentiment_score for v in videos) / len(videos)
+    if total_videos:
+        avg_sentiment = (await db.scalar(select(func.sum(Video.sentiment_score))) or 0.0) / total_videos
 
     return {
         "total_channels": total_channels,
         "total_videos": total_videos,
         "total_comments": total_comments,
-        "global_sentiment_average": avg_sentiment
+        "global_sentiment_average": avg_sentiment,
+        "youtube_quota": await run_blocking(quota_service.snapshot),
+        "jobs": await run_blocking(job_queue.counts),
+        "batch_scheduler": batch_scheduler.stats(),
+        "event_bus": event_bus.stats(),
+        "admission": admission.stats(),
+        "refresh": await run_blocking(RefreshScheduler().stats),
     }
 
-@router.delete("/admin/reset")
-def reset_database(db: Session = Depends(get_db)):
+# --- Profiling (admin only) ---
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def _is_loopback(host: Optional[str]) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin tooling needs an X-Admin-Token header matching ADMIN_TOKEN. Without
+    ADMIN_TOKEN it is closed to every client but this machine's.
+    """
+    if ADMIN_TOKEN:
+        if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Admin token required")
+    elif not request.client or not _is_loopback(request.client.host):
+        raise HTTPException(status_code=403, detail="Admin endpoints are local-only unless ADMIN_TOKEN is set")
+
+@router.post("/admin/profile/route", response_model=ProfileCapture, dependencies=[Depends(require_admin)])
+async def profile_route(route: str, requests: int = 1, mode: str = "cprofile", method: Optional[str] = None):
+    """Profile the next `requests` calls to a route template, e.g. /channel/{channel_id}/videos."""
+    try:
+        capture = profiling.arm_route(route, requests, mode, method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return capture.info()
+
+@router.post("/admin/profile/job", response_model=ProfileCapture, dependencies=[Depends(require_admin)])
+async def profile_job(job_id: Optional[int] = None, kind: Optional[str] = None, mode: str = "cprofile"):
+    """Profile one analysis job: `job_id`, or the next leased job of `kind` (e.g. analyze_video)."""
+    try:
+        return await run_blocking(profiling.arm_job, job_id, kind, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/profiles", response_model=List[ProfileCapture], dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return await run_blocking(profiling.list_captures)
+
+@router.get("/admin/profiles/{capture_id}", response_class=FileResponse, dependencies=[Depends(require_admin)])
+async def download_profile(capture_id: str):
+    """The capture's .prof (load with pstats/snakeviz) or .speedscope.json (speedscope.app)."""
+    path = profiling.capture_file(capture_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found or not finished")
+    return FileResponse(path, filename=os.path.basename(path), media_type="application/octet-stream")
+
+@router.delete("/admin/profile/route/{capture_id}", response_model=ProfileCancelled, dependencies=[Depends(require_admin)])
+async def cancel_route_profile(capture_id: str):
+    if not profiling.cancel_route(capture_id):
+        raise HTTPException(status_code=404, detail="No armed route profile with that id")
+    return {"status": "cancelled", "id": capture_id}
+
+# --- Tracing (TRACE_EXPORTERS=memory) ---
+
+def _memory_traces():
+    if not tracing.memory_exporter:
+        raise HTTPException(status_code=404, detail="In-memory tracing is off; set TRACE_EXPORTERS=memory")
+    return tracing.memory_exporter
+
+@router.get("/admin/traces", response_model=List[TraceSummary], dependencies=[Depends(require_admin)])
+async def list_traces(limit: int = 50):
+    """Most recent traces in this API process (worker traces go to TRACE_DIR files)."""
+    return _memory_traces().traces(limit)
+
+@router.get("/admin/traces/export", response_class=JSONResponse, dependencies=[Depends(require_admin)])
+async def export_traces(trace_id: Optional[str] = None):
+    """Chrome trace-event JSON of one trace (or the whole buffer) for Perfetto / chrome://tracing."""
+    name = f"trace-{trace_id or 'all'}.json"
+    return JSONResponse(
+        _memory_traces().chrome_trace(trace_id),
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
+@router.delete("/admin/reset", response_model=StatusMessage, dependencies=[Depends(require_admin)])
+async def reset_database(db: AsyncSession = Depends(get_async_db)):
     """Clear basic data (Optional Admin Action)."""
     # For safety, we might not want to delete everything in a real app,
     # but for this local tool, it's useful.
     try:
-        db.query(Comment).delete()
-        db.query(Video).delete()
-        db.query(Channel).delete()
-        db.commit()
+        for model in (JobCheckpoint, Job, SentimentBucket, TopicSketch, Comment, Video, TrackedChannel, Channel):
+            await db.execute(delete(model))
+        # Versions only ever go up, so responses cached before the reset can't match again
+        await db.execute(update(DataVersion).values(version=DataVersion.version + 1))
+        await db.commit()
+        response_cache.clear()
         return {"status": "success", "message": "Database cleared."}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
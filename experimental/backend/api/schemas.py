@@ -0,0 +1,221 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from backend.models.models import SentimentType
+
+# Response models for the API routes. Declaring them lets FastAPI validate the
+# returned objects (ORM rows included, via from_attributes) and serialize straight
+# to JSON bytes in pydantic-core, instead of walking them with jsonable_encoder.
+# Routes that return a Response themselves (cached reads) dump through the same
+# models with response_cache.
+
+
+class _Schema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+Insights = Dict[str, List[str]] # Category -> rule-based insight lines
+
+
+class SentimentDistribution(_Schema):
+    positive: float
+    neutral: float
+    negative: float
+
+
+class ChannelOut(_Schema):
+    id: str
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    health_score: Optional[float] = None
+    last_updated: Optional[datetime] = None
+
+
+class ChannelAnalysisStarted(_Schema):
+    status: str
+    id: str
+    channel_id: str
+    channel_title: Optional[str] = None
+    health_score: Optional[float] = None
+    job_id: int
+    message: str
+
+
+class BulkAnalyzeRequest(BaseModel):
+    channels: List[str] # Channel IDs, @handles or channel URLs
+    force: bool = False # Re-analyze channels that are still fresh
+
+
+class BulkAnalyzeItem(_Schema):
+    input: str
+    channel_id: Optional[str] = None
+    status: str # queued, fresh, duplicate, not_found
+    job_id: Optional[int] = None
+    channel_title: Optional[str] = None
+
+
+class BulkAnalyzeResult(_Schema):
+    queued: int
+    results: List[BulkAnalyzeItem]
+
+
+class VideoOut(_Schema):
+    id: str
+    channel_id: Optional[str] = None
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    published_at: Optional[datetime] = None
+    view_count: Optional[int] = None
+    like_count: Optional[int] = None
+    comment_count: Optional[int] = None
+    sentiment_score: Optional[float] = None
+    analysis_status: Optional[str] = None
+
+
+class VideoListItem(_Schema):
+    """One row of /channel/{id}/videos; only the requested fields and expansions are set (dumped with exclude_unset)."""
+    id: str
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    published_at: Optional[str] = None
+    view_count: Optional[int] = None
+    like_count: Optional[int] = None
+    comment_count: Optional[int] = None
+    sentiment_score: Optional[float] = None
+    analysis_status: Optional[str] = None
+    distribution: Optional[SentimentDistribution] = None
+    insights: Optional[Insights] = None
+    top_50_analysis: Optional[Dict[str, Any]] = None
+
+
+class ModelComparison(_Schema):
+    distribution: SentimentDistribution
+    score: float
+
+
+class SentimentComparison(_Schema):
+    vader: ModelComparison
+    gemini: ModelComparison
+
+
+class VideoDetails(_Schema):
+    video: VideoOut
+    sentiment_distribution: SentimentDistribution
+    comparison: Optional[SentimentComparison] = None
+    insights: Insights
+    analyzed_comment_count: int
+    top_50_analysis: Optional[Dict[str, Any]] = None
+
+
+class TimeseriesPoint(_Schema):
+    start: datetime # Window start (UTC)
+    comments: int
+    positive: int
+    neutral: int
+    negative: int
+    avg_score: float
+    weighted_score: float # Like-weighted, as in the health score
+
+
+class Timeseries(_Schema):
+    scope: str
+    resolution: str # Bucket size read: hour, day or week
+    window_seconds: int # Width of each point after downsampling
+    start: Optional[datetime] = None # None when nothing is bucketed yet
+    end: Optional[datetime] = None
+    points: List[TimeseriesPoint]
+
+
+class TopicCount(_Schema):
+    topic: str
+    count: int # Lower bound: short by at most the summary's max_error
+
+
+class TopicSummary(_Schema):
+    scope: str
+    start: Optional[datetime] = None # Week-aligned range read; None for all comments
+    end: Optional[datetime] = None
+    mentions: int # Topic mentions summarized
+    max_error: float # Most any count undercounts by; topics mentioned more often are always listed
+    topics: List[TopicCount]
+
+
+class CommentOut(_Schema):
+    id: str
+    video_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    text: Optional[str] = None
+    author: Optional[str] = None
+    like_count: Optional[int] = None
+    published_at: Optional[datetime] = None
+    sentiment: Optional[SentimentType] = None
+    confidence_score: Optional[float] = None
+    vader_sentiment: Optional[str] = None
+    vader_score: Optional[float] = None
+    gemini_sentiment: Optional[str] = None
+    gemini_score: Optional[float] = None
+    emoji_detected: Optional[int] = None
+    topics: Optional[str] = None
+
+
+class JobOut(_Schema):
+    job_id: int
+    kind: str
+    status: str
+    progress: Optional[int] = None
+    total: Optional[int] = None
+    attempts: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class AnalysisDetached(_Schema):
+    status: str
+    video_id: str
+
+
+class SystemStats(_Schema):
+    total_channels: int
+    total_videos: int
+    total_comments: int
+    global_sentiment_average: float
+    youtube_quota: Dict[str, Any]
+    jobs: Dict[str, int]
+    batch_scheduler: Dict[str, Any]
+    event_bus: Dict[str, Any]
+    admission: Dict[str, Any]
+    refresh: Dict[str, Any]
+
+
+class ProfileCapture(_Schema):
+    id: str
+    target: str
+    mode: str
+    status: str = "armed"
+    requests: Optional[int] = None
+    completed: Optional[int] = None
+    created_at: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    file: Optional[str] = None
+    pid: Optional[int] = None
+
+
+class ProfileCancelled(_Schema):
+    status: str
+    id: str
+
+
+class TraceSummary(_Schema):
+    trace_id: str
+    name: str
+    start: float
+    duration_ms: float
+    attributes: Dict[str, Any]
+
+
+class StatusMessage(_Schema):
+    status: str
+    message: str
@@ -1,27 +1,51 @@
 import sqlite3
 
+# (table, column, DDL) for columns added after the table was first created.
+# create_all() only creates missing tables, so existing databases need these.
+MIGRATIONS = [
+    ("videos", "analysis_status", "ALTER TABLE videos ADD COLUMN analysis_status VARCHAR DEFAULT 'pending'"),
+    ("comments", "parent_id", "ALTER TABLE comments ADD COLUMN parent_id VARCHAR REFERENCES comments(id)"),
+    ("jobs", "result", "ALTER TABLE jobs ADD COLUMN result TEXT"),
+]
+
+# Indexes added after their table was first created (create_all() skips existing tables too)
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_videos_channel_id ON videos (channel_id)",
+    "CREATE INDEX IF NOT EXISTS ix_comments_video_id ON comments (video_id)",
+    # Cancel all but the newest active job per key first, or the unique index can't be built
+    "UPDATE jobs SET status = 'cancelled' WHERE status IN ('queued', 'running') AND dedup_key IS NOT NULL"
+    " AND id NOT IN (SELECT MAX(id) FROM jobs WHERE status IN ('queued', 'running') GROUP BY dedup_key)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_active_dedup_key ON jobs (dedup_key) WHERE status IN ('queued', 'running')",
+]
+
 def check_db_schema():
     try:
         conn = sqlite3.connect('pulsegrow.db')
         cursor = conn.cursor()
         
-        print("Checking 'videos' table schema...")
-        cursor.execute("PRAGMA table_info(videos)")
-        columns = [info[1] for info in cursor.fetchall()]
-        print(f"Columns: {columns}")
-        
-        if "analysis_status" in columns:
-            print("SUCCESS: 'analysis_status' column exists.")
-        else:
-            print("FAILURE: 'analysis_status' column MISSING!")
-            # Attempt to add it
-            print("Attempting to add column...")
-            try:
-                cursor.execute("ALTER TABLE videos ADD COLUMN analysis_status VARCHAR DEFAULT 'pending'")
-                conn.commit()
-                print("SUCCESS: Added 'analysis_status' column.")
-            except Exception as e:
-                print(f"ERROR adding column: {e}")
+        for table, column, ddl in MIGRATIONS:
+            print(f"Checking '{table}' table schema...")
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [info[1] for info in cursor.fetchall()]
+            print(f"Columns: {columns}")
+            
+            if column in columns:
+                print(f"SUCCESS: '{column}' column exists.")
+            else:
+                print(f"FAILURE: '{column}' column MISSING!")
+                # Attempt to add it
+                print("Attempting to add column...")
+                try:
+                    cursor.execute(ddl)
+                    conn.commit()
+                    print(f"SUCCESS: Added '{column}' column.")
+                except Exception as e:
+                    print(f"ERROR adding column: {e}")
+
+        for ddl in INDEXES:
+            cursor.execute(ddl)
+        conn.commit()
+        print(f"SUCCESS: {len(INDEXES)} index(es) in place.")
                 
         conn.close()
     except Exception as e:
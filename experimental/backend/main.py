@@ -1,4 +1,9 @@
-from fastapi import FastAPI
+import os
+import time
+from typing import Dict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from backend.database import engine, Base
 import backend.models.models # Import models so they are registered with Base
 
@@ -6,8 +11,29 @@ import backend.models.models # Import models so they are registered with Base
 Base.metadata.create_all(bind=engine)
 
 from backend.api import endpoints
+from backend.worker import recover_stuck_videos, start_worker_pool, stop_worker_pool
+from backend.services.metrics import registry
+from backend.services.profiling import capture_for_request, profiled
+from backend.services import tracing
+from backend.services.scheduler import run_blocking
 
-app = FastAPI(title="PulseGrow API", version="1.0.0")
+# Analysis runs in separate `pulsegrow-worker` processes (run_backend.sh starts one
+# next to the API). For single-process setups, WORKER_PROCESSES > 0 embeds that many
+# workers in the API instead.
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    recover_stuck_videos()
+    pool = start_worker_pool(WORKER_PROCESSES) if WORKER_PROCESSES > 0 else None
+    if pool:
+        from backend.services.refresh_service import start_refresh_daemon
+        start_refresh_daemon(pool[0]) # Embedded workers: this process schedules their refreshes too
+    yield
+    if pool:
+        stop_worker_pool(*pool)
+
+app = FastAPI(title="PulseGrow API", version="1.0.0", lifespan=lifespan)
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -21,10 +47,38 @@ app.add_middleware(
 
 app.include_router(endpoints.router, prefix="/api")
 
-@app.get("/")
+HTTP_SECONDS = registry.histogram("http_request_seconds", "Request latency by route template and status.", ["method", "route", "status"])
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    capture = capture_for_request(request.method, request.url.path) # None unless armed via /api/admin/profile/route
+    with tracing.span("http.request", method=request.method, path=request.url.path) as request_span:
+        if capture:
+            with profiled(capture):
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+        if request_span:
+            request_span.set_attribute("status", response.status_code)
+    route = request.scope.get("route")
+    # Templates ("/api/video/{video_id}") keep label cardinality bounded; unmatched paths share one label
+    HTTP_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method, route=getattr(route, "path", "unmatched"), status=response.status_code,
+    )
+    return response
+
+@app.get("/", response_model=Dict[str, str])
 def read_root():
     return {"message": "Welcome to PulseGrow API"}
 
-@app.get("/health")
+@app.get("/health", response_model=Dict[str, str])
 def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition: this process plus live worker snapshots."""
+    # Rendering reads worker snapshot files and job counts, so keep it off the event loop
+    return PlainTextResponse(await run_blocking(registry.render), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from backend.database import Base
 import datetime
@@ -24,7 +24,7 @@ class Video(Base):
     __tablename__ = "videos"
 
     id = Column(String, primary_key=True, index=True) # YouTube Video ID
-    channel_id = Column(String, ForeignKey("channels.id"))
+    channel_id = Column(String, ForeignKey("channels.id"), index=True)
     title = Column(String)
     thumbnail_url = Column(String)
     published_at = Column(DateTime)
@@ -42,7 +42,8 @@ class Comment(Base):
     __tablename__ = "comments"
 
     id = Column(String, primary_key=True, index=True)
-    video_id = Column(String, ForeignKey("videos.id"))
+    video_id = Column(String, ForeignKey("videos.id"), index=True)
+    parent_id = Column(String, ForeignKey("comments.id"), nullable=True, index=True) # Set for replies; top-level comment ID
     text = Column(Text)
     author = Column(String)
     like_count = Column(Integer, default=0)
@@ -64,3 +65,97 @@ class Comment(Base):
     topics = Column(Text, default="[]") # JSON string of top topics
     
     video = relationship("Video", back_populates="comments")
+
+class QuotaUsage(Base):
+    __tablename__ = "quota_usage"
+
+    # One row per (quota day, priority class, API method); units are incremented in place
+    day = Column(String, primary_key=True) # YYYY-MM-DD in Pacific time (YouTube's reset clock)
+    priority = Column(String, primary_key=True) # interactive, channel, backfill, refresh (scheduler.PRIORITY_CLASSES)
+    method = Column(String, primary_key=True) # e.g. "commentThreads.list"
+    units = Column(Integer, default=0)
+    calls = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, index=True) # analyze_channel, analyze_video
+    payload = Column(Text, default="{}") # JSON arguments for the handler
+    dedup_key = Column(String, index=True, nullable=True) # e.g. "video:<id>"; one active job per key
+    status = Column(String, default="queued", index=True) # queued, running, completed, failed, cancelled
+    priority = Column(Integer, default=0) # Higher runs first
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    lease_owner = Column(String, nullable=True) # "<host>:<pid>:<worker>" holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    run_after = Column(DateTime, default=datetime.datetime.utcnow) # Retry backoff
+    progress = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True) # JSON returned by the handler (e.g. the final SSE event)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        # One active job per dedup_key, enforced by SQLite so concurrent enqueues can't both insert
+        Index("ux_jobs_active_dedup_key", dedup_key, unique=True, sqlite_where=status.in_(("queued", "running"))),
+    )
+
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+
+    # A completed unit of work inside a job (e.g. stage "batch", key "30"); skipped on resume
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    stage = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    completed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    # Bumped in the same transaction as every write to a channel's or video's data
+    # (see response_cache); read endpoints key cached responses and ETags on it
+    scope = Column(String, primary_key=True) # "channel:<id>" or "video:<id>"
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class TrackedChannel(Base):
+    __tablename__ = "tracked_channels"
+
+    # Refresh schedule for a channel kept fresh by the refresh daemon (see refresh_service)
+    channel_id = Column(String, ForeignKey("channels.id"), primary_key=True)
+    uploads_playlist_id = Column(String, nullable=True) # Cached so a refresh skips channels.list
+    interval_seconds = Column(Float) # Adaptive cadence, before the fleet budget scale and jitter
+    next_refresh_at = Column(DateTime, index=True)
+    last_refresh_at = Column(DateTime, nullable=True)
+    comment_rate = Column(Float, default=0.0) # New comments per hour (EWMA)
+    upload_rate = Column(Float, default=0.0) # New uploads per day (EWMA)
+    refreshes = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class SentimentBucket(Base):
+    __tablename__ = "sentiment_buckets"
+
+    # Comment sentiment per time bucket of publication, kept current on every flush
+    # (see timeseries); the timeseries endpoints read these instead of comments
+    scope = Column(String, primary_key=True) # "channel:<id>" or "video:<id>"
+    resolution = Column(String, primary_key=True) # hour, day, week
+    bucket_start = Column(DateTime, primary_key=True) # UTC, aligned to the resolution
+    positive = Column(Integer, default=0)
+    neutral = Column(Integer, default=0)
+    negative = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0) # Sum of vader_score
+    weighted_sum = Column(Float, default=0.0) # Sum of vader_score * (1 + likes), as in the health score
+    weight_sum = Column(Float, default=0.0) # Sum of (1 + likes)
+
+class TopicSketch(Base):
+    __tablename__ = "topic_sketches"
+
+    # Bounded heavy-hitter summary of comment topics, kept current on every flush
+    # (see topic_sketches); top-topic reads merge these instead of scanning comments
+    scope = Column(String, primary_key=True) # "channel:<id>" or "video:<id>"
+    window = Column(String, primary_key=True) # "all", or "week" by comment publish time
+    window_start = Column(DateTime, primary_key=True) # Monday 00:00 UTC; the epoch for "all"
+    sketch = Column(Text) # JSON of aggregates.TopK: capacity, counts, total
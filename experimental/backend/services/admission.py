@@ -0,0 +1,217 @@
+import collections
+import os
+import threading
+import time
+
+from backend.services.job_queue import JobQueue
+from backend.services.metrics import registry
+from backend.services.quota_service import QuotaExceeded, quota_service
+from backend.services.scheduler import PRIORITY_RANK, run_blocking
+
+# Admission control for the analyze endpoints.
+#
+# Before an analyze request fetches or queues anything it is checked against the
+# load it would add:
+#   jobs     analysis jobs already queued in the shared job table
+#   batches  Gemini batches queued or running in the batch schedulers (this process
+#            plus worker metrics snapshots)
+#   quota    YouTube quota left today for the request's class, less what the active
+#            jobs are projected to spend
+#   client   a token bucket per client, so one caller's burst can't fill the queue
+#
+# Backfill/refresh requests (bulk onboarding, durable jobs) may only fill
+# BACKGROUND_SHARE of the job and batch limits, so under a burst they are shed
+# before interactive ones. A rejection carries a Retry-After projected from how fast
+# the limiting resource drains. Load is sampled off the event loop at most every
+# REFRESH_SECONDS; between samples admitted jobs are counted locally so a burst
+# can't slip in before the next sample.
+
+MAX_QUEUED_JOBS = int(os.getenv("ADMISSION_MAX_QUEUED_JOBS", "500"))
+MAX_INFLIGHT_BATCHES = int(os.getenv("ADMISSION_MAX_INFLIGHT_BATCHES", "200"))
+BACKGROUND_SHARE = float(os.getenv("ADMISSION_BACKGROUND_SHARE", "0.75"))
+CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", "1")) # Jobs per second per client; 0 disables
+CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", "30"))
+TRUST_FORWARDED = os.getenv("ADMISSION_TRUST_FORWARDED", "0") == "1" # Key clients by X-Forwarded-For behind a proxy
+REFRESH_SECONDS = float(os.getenv("ADMISSION_REFRESH_SECONDS", "1"))
+
+# Projected YouTube units per job: metadata plus one comment page for 10 videos, one video's pages, or an incremental refresh
+UNITS_PER_JOB = {
+    "analyze_channel": int(os.getenv("ADMISSION_CHANNEL_UNITS", "15")),
+    "analyze_video": int(os.getenv("ADMISSION_VIDEO_UNITS", "10")),
+    "refresh_channel": int(os.getenv("ADMISSION_REFRESH_UNITS", "4")),
+}
+DRAIN_WINDOW_SECONDS = 300 # Recent job completions used as the queue's drain rate
+DEFAULT_BATCH_SECONDS = 2.0 # Until a Gemini batch has been timed
+FALLBACK_RETRY_AFTER = 30.0 # Nothing drained recently to project from
+MAX_RETRY_AFTER = 600.0 # Load-based waits; quota waits run to the daily reset
+MAX_CLIENTS = 10_000
+
+ADMISSIONS = registry.counter(
+    "admission_decisions_total", "Analyze requests admitted or rejected, by class and limiting resource.",
+    ["priority", "result"],
+)
+
+
+class Overloaded(Exception):
+    """Raised when admitting a request would push a load limit past its class's share."""
+
+    def __init__(self, message: str, retry_after: float = None, resource: str = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.resource = resource
+
+
+def client_key(request) -> str:
+    if TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _sum_samples(merged: dict, name: str, first_label: str):
+    metric = merged.get(f"{registry.prefix}_{name}")
+    if not metric:
+        return 0
+    return sum(value for key, value in metric["samples"] if key and key[0] == first_label)
+
+
+def _clamp(seconds: float) -> float:
+    return min(MAX_RETRY_AFTER, max(1.0, seconds))
+
+
+class AdmissionController:
+    """Load, quota and per-client checks run before an analyze route does any work."""
+
+    def __init__(self, job_queue: JobQueue = None):
+        self.job_queue = job_queue or JobQueue()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._load = None
+        self._sampled_at = 0.0
+        self._buckets = collections.OrderedDict() # client -> [tokens, last refill]; LRU-bounded
+
+    # --- Load sampling ---
+
+    def _sample(self):
+        active, finished = self.job_queue.backlog(DRAIN_WINDOW_SECONDS)
+        merged = registry.merged()
+        batch_stats = merged.get(f"{registry.prefix}_stage_seconds", {"samples": []})
+        gemini = [value for key, value in batch_stats["samples"] if key == ["gemini_batch"]]
+        count = sum(value["count"] for value in gemini)
+        return {
+            "queued_jobs": sum(n for (_, status), n in active.items() if status == "queued"),
+            "committed_units": sum(UNITS_PER_JOB.get(kind, 0) * n for (kind, _), n in active.items()),
+            "jobs_per_second": finished / DRAIN_WINDOW_SECONDS,
+            "inflight_batches": (
+                _sum_samples(merged, "queue_depth", "batch_scheduler")
+                + _sum_samples(merged, "executor_busy", "batch_scheduler")
+            ),
+            "batch_workers": _sum_samples(merged, "executor_workers", "batch_scheduler") or 1,
+            "batch_seconds": sum(value["sum"] for value in gemini) / count if count else DEFAULT_BATCH_SECONDS,
+            "quota_headroom": {"interactive": quota_service.headroom("interactive"), "background": quota_service.headroom("backfill")},
+            "quota_resets_in": quota_service.seconds_until_reset(),
+        }
+
+    def _refresh(self):
+        with self._refresh_lock:
+            if self._load is not None and time.monotonic() - self._sampled_at < REFRESH_SECONDS:
+                return # Another request refreshed while we waited
+            load = self._sample()
+            with self._lock:
+                self._load = load
+                self._sampled_at = time.monotonic()
+
+    # --- Decisions ---
+
+    def _check_load(self, load: dict, priority: str, jobs: int, units: int):
+        share = 1.0 if PRIORITY_RANK.get(priority, 3) <= PRIORITY_RANK["channel"] else BACKGROUND_SHARE
+
+        job_limit = MAX_QUEUED_JOBS * share
+        jobs = min(jobs, job_limit) # A bulk request bigger than the limit still fits an empty queue
+        if load["queued_jobs"] + jobs > job_limit:
+            excess = load["queued_jobs"] + jobs - job_limit
+            rate = load["jobs_per_second"]
+            raise Overloaded(
+                "Analysis queue is full; try again later.",
+                retry_after=_clamp(excess / rate if rate else FALLBACK_RETRY_AFTER), resource="jobs",
+            )
+
+        batch_limit = MAX_INFLIGHT_BATCHES * share
+        if load["inflight_batches"] >= batch_limit:
+            # Batches ahead of the limit, cleared `batch_workers` at a time
+            excess = load["inflight_batches"] - batch_limit + 1
+            raise Overloaded(
+                "Too many Gemini batches in flight; try again later.",
+                retry_after=_clamp(excess * load["batch_seconds"] / load["batch_workers"]), resource="batches",
+            )
+
+        quota_class = "interactive" if priority == "interactive" else "background"
+        if load["committed_units"] + units > load["quota_headroom"][quota_class]:
+            raise QuotaExceeded(
+                "Queued analyses are projected to use the rest of today's YouTube quota.",
+                retry_after=load["quota_resets_in"],
+            )
+
+    def _take_tokens(self, client: str, jobs: int):
+        if CLIENT_RATE <= 0:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [CLIENT_BURST, now]
+            while len(self._buckets) > MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+        bucket[0] = min(CLIENT_BURST, bucket[0] + (now - bucket[1]) * CLIENT_RATE)
+        bucket[1] = now
+        # Any positive balance admits; a bulk request then runs the bucket into debt
+        if bucket[0] < 1:
+            raise Overloaded(
+                "Too many analyses requested from this client; try again later.",
+                retry_after=_clamp((1 - bucket[0]) / CLIENT_RATE), resource="client",
+            )
+        bucket[0] -= jobs
+
+    async def admit(self, client: str, priority: str, jobs: dict):
+        """
+        Admits a request that may queue `jobs` ({kind: count}) at `priority`, or raises
+        Overloaded / QuotaExceeded with a `retry_after`.
+        """
+        if self._load is None or time.monotonic() - self._sampled_at >= REFRESH_SECONDS:
+            await run_blocking(self._refresh) # DB and snapshot reads stay off the event loop
+        count = sum(jobs.values())
+        units = sum(UNITS_PER_JOB.get(kind, 0) * n for kind, n in jobs.items())
+        with self._lock:
+            try:
+                self._check_load(self._load, priority, count, units)
+                self._take_tokens(client, count)
+            except Overloaded as e:
+                ADMISSIONS.inc(priority=priority, result=e.resource)
+                raise
+            except QuotaExceeded:
+                ADMISSIONS.inc(priority=priority, result="quota")
+                raise
+            # Count what was admitted until the next sample sees it in the job table
+            self._load["queued_jobs"] += count
+            self._load["committed_units"] += units
+        ADMISSIONS.inc(priority=priority, result="admitted")
+
+    def stats(self):
+        """Limits and the last load sample, for /admin/stats."""
+        with self._lock:
+            return {
+                "limits": {
+                    "queued_jobs": MAX_QUEUED_JOBS,
+                    "inflight_batches": MAX_INFLIGHT_BATCHES,
+                    "background_share": BACKGROUND_SHARE,
+                    "client_rate": CLIENT_RATE,
+                    "client_burst": CLIENT_BURST,
+                },
+                "load": dict(self._load) if self._load else None,
+                "clients": len(self._buckets),
+            }
+
+
+# Process-wide controller shared by the analyze routes
+admission = AdmissionController()
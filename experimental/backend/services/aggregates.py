@@ -0,0 +1,251 @@
+import heapq
+
+# Mergeable partial aggregates for map-reduce style summaries of batch results.
+# Each shard/file folds its batches into a ChannelAggregate; partials combine with
+# `merge` in any order and grouping, and serialize to JSON for incremental runs.
+
+DEFAULT_TOPK_CAPACITY = 64
+
+
+def batch_number(batch_id: str) -> int:
+    """'<video_id>_batch_<n>' -> n."""
+    _, _, number = batch_id.rpartition("_batch_")
+    if not number.isdigit():
+        raise ValueError(f"Unexpected batch id '{batch_id}'")
+    return int(number)
+
+
+def merge_ranges(a: list, b: list):
+    """
+    Union of two sorted lists of disjoint [first, last] batch-number ranges, with
+    adjacent ranges joined; None if they overlap.
+    """
+    merged = []
+    for first, last in sorted(a + b):
+        if merged and first <= merged[-1][1]:
+            return None
+        if merged and first == merged[-1][1] + 1:
+            merged[-1][1] = last
+        else:
+            merged.append([first, last])
+    return merged
+
+
+class TopK:
+    """
+    Misra-Gries heavy-hitters summary holding at most `capacity` counters.
+
+    Counts are lower bounds, off by at most (items seen) / (capacity + 1), so any
+    topic more frequent than that is always kept. Merging adds counters and then
+    trims back to `capacity` by subtracting the (capacity+1)-th largest count,
+    which keeps the same error bound for the combined stream. `total` counts the
+    items seen, which tightens the bound to what the decrements actually removed.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TOPK_CAPACITY, counts: dict = None, total: int = None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+        self.total = sum(self.counts.values()) if total is None else total
+
+    def update(self, items):
+        for item in items:
+            self.total += 1
+            if item in self.counts:
+                self.counts[item] += 1
+            elif len(self.counts) < self.capacity:
+                self.counts[item] = 1
+            else:
+                # Decrement everything; the new item's single count cancels out too
+                for key in list(self.counts):
+                    self.counts[key] -= 1
+                    if self.counts[key] == 0:
+                        del self.counts[key]
+
+    def remove(self, items):
+        """
+        Takes items back out (a deleted or re-tagged comment). Only counted items
+        change: an item already decremented away has an estimate of 0 either way, and
+        leaving `total` alone for it keeps the error bound conservative.
+        """
+        for item in items:
+            if item in self.counts:
+                self.total -= 1
+                self.counts[item] -= 1
+                if self.counts[item] == 0:
+                    del self.counts[item]
+
+    def error_bound(self) -> float:
+        """Most any count here can undercount its item by."""
+        return max(0, self.total - sum(self.counts.values())) / (self.capacity + 1)
+
+    def _trim(self):
+        if len(self.counts) <= self.capacity:
+            return
+        cut = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.counts = {key: count - cut for key, count in self.counts.items() if count > cut}
+
+    def merge(self, other: "TopK") -> "TopK":
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self._trim()
+        return self
+
+    def most_common(self, n: int):
+        # Ties broken by key so every merge order gives the same answer
+        return heapq.nsmallest(n, self.counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "counts": self.counts, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["capacity"], data["counts"], data.get("total")) # Partials saved before `total` assume no decrements
+
+
+class VideoAggregate:
+    """Counts, sums, emoji totals and top topics for one video's analyzed comments."""
+
+    def __init__(self, video_id: str, title: str = None, index: int = None, topk_capacity: int = DEFAULT_TOPK_CAPACITY):
+        self.video_id = video_id
+        self.title = title
+        self.index = index # Position in the input, for ordering the summary
+        self.total_comments = 0
+        self.sentiment_sum = 0.0
+        self.sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
+        self.emoji_count = 0
+        self.topics = TopK(topk_capacity)
+        self.batches = [] # Batch numbers folded in, as [first, last] ranges
+
+    def add_results(self, results: list):
+        self.total_comments += len(results)
+        for r in results:
+            self.sentiment_sum += r['sentiment_score']
+            self.sentiment_counts[r['sentiment_label']] = self.sentiment_counts.get(r['sentiment_label'], 0) + 1
+            if r['emoji_detected']:
+                self.emoji_count += 1
+            self.topics.update(r['topics'])
+
+    def merge(self, other: "VideoAggregate") -> "VideoAggregate":
+        batches = merge_ranges(self.batches, other.batches)
+        if batches is None:
+            raise ValueError(f"Partials overlap on batches of video {self.video_id}")
+        self.batches = batches
+        self.title = self.title or other.title
+        if other.index is not None:
+            self.index = other.index if self.index is None else min(self.index, other.index)
+        self.total_comments += other.total_comments
+        self.sentiment_sum += other.sentiment_sum
+        for label, count in other.sentiment_counts.items():
+            self.sentiment_counts[label] = self.sentiment_counts.get(label, 0) + count
+        self.emoji_count += other.emoji_count
+        self.topics.merge(other.topics)
+        return self
+
+    def summary(self, top_n: int = 5):
+        total = self.total_comments
+        return {
+            "video_id": self.video_id,
+            "title": self.title,
+            "avg_sentiment": self.sentiment_sum / total if total > 0 else 0,
+            "sentiment_distribution": dict(self.sentiment_counts),
+            "emoji_driven_pct": (self.emoji_count / total) * 100 if total > 0 else 0,
+            "top_topics": [t for t, _ in self.topics.most_common(top_n)]
+        }
+
+    def to_dict(self):
+        return {
+            "video_id": self.video_id,
+            "title": self.title,
+            "index": self.index,
+            "total_comments": self.total_comments,
+            "sentiment_sum": self.sentiment_sum,
+            "sentiment_counts": self.sentiment_counts,
+            "emoji_count": self.emoji_count,
+            "topics": self.topics.to_dict(),
+            "batches": self.batches,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        agg = cls(data["video_id"], data.get("title"), data.get("index"))
+        agg.total_comments = data["total_comments"]
+        agg.sentiment_sum = data["sentiment_sum"]
+        agg.sentiment_counts = dict(data["sentiment_counts"])
+        agg.emoji_count = data["emoji_count"]
+        agg.topics = TopK.from_dict(data["topics"])
+        agg.batches = [list(r) for r in data.get("batches", [])]
+        return agg
+
+
+class ChannelAggregate:
+    """
+    Per-video aggregates over a set of batches. Partials built from disjoint sets of
+    batches merge associatively and commutatively (top topics within the TopK error
+    bound); each video records which of its batches are folded in, as ranges of batch
+    numbers (one range for a video read in order), so overlapping partials are
+    detected rather than double-counted without state growing with every batch.
+    """
+
+    def __init__(self, topk_capacity: int = DEFAULT_TOPK_CAPACITY):
+        self.topk_capacity = topk_capacity
+        self.videos = {}
+
+    def add_batch(self, batch: dict) -> bool:
+        """Folds one batch result record in. Returns False if it was already counted."""
+        number = batch_number(batch['batch_id'])
+        video = self.videos.get(batch['video_id'])
+        if video is None:
+            video = self.videos[batch['video_id']] = VideoAggregate(
+                batch['video_id'], batch['video_title'], batch.get('video_index'), self.topk_capacity
+            )
+        batches = merge_ranges(video.batches, [[number, number]])
+        if batches is None:
+            return False
+        video.batches = batches
+        video.add_results(batch['results'])
+        return True
+
+    def merge(self, other: "ChannelAggregate") -> "ChannelAggregate":
+        for video_id, video in other.videos.items():
+            # Checked up front so a failed merge leaves this partial unchanged
+            if video_id in self.videos and merge_ranges(self.videos[video_id].batches, video.batches) is None:
+                raise ValueError(f"Partials overlap on batches of video {video_id}")
+        for video_id, video in other.videos.items():
+            if video_id in self.videos:
+                self.videos[video_id].merge(video)
+            else:
+                self.videos[video_id] = VideoAggregate.from_dict(video.to_dict())
+        return self
+
+    def summary(self, top_n: int = 5):
+        ordered = sorted(
+            self.videos.values(),
+            key=lambda v: (v.index is None, v.index if v.index is not None else 0, v.video_id),
+        )
+        videos = [v.summary(top_n) for v in ordered]
+        scores = [v["avg_sentiment"] for v in videos]
+        return {
+            "channel_summary": {
+                "overall_avg_sentiment": sum(scores) / len(scores) if scores else 0,
+                "video_count": len(videos)
+            },
+            "videos": videos
+        }
+
+    def to_dict(self):
+        return {
+            "topk_capacity": self.topk_capacity,
+            "videos": [v.to_dict() for v in self.videos.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        agg = cls(data.get("topk_capacity", DEFAULT_TOPK_CAPACITY))
+        for v in data["videos"]:
+            agg.videos[v["video_id"]] = VideoAggregate.from_dict(v)
+        for batch_id in data.get("batch_ids", []): # Partials saved before the per-video ranges
+            number = batch_number(batch_id)
+            video = agg.videos[batch_id.rpartition("_batch_")[0]]
+            video.batches = merge_ranges(video.batches, [[number, number]])
+        return agg
@@ -1,7 +1,19 @@
+import os
 from backend.models.models import Comment, Video, Channel, SentimentType
+from backend.services.metrics import COMMENTS_PROCESSED, STAGE_SECONDS
+from backend.services.profiling import propagate
+from backend.services.quota_service import QuotaExceeded
+from backend.services import tracing
+from backend.services import response_cache # Registers the data-version bump on every flush
+from backend.services import timeseries # Registers the sentiment bucket upkeep on every flush
+from backend.services import topic_sketches # Registers the topic sketch upkeep on every flush
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
+COMMENTS_PER_BATCH = 30 # Comments per Gemini batch call in run_video_analysis
+REFRESH_MAX_COMMENTS_PER_VIDEO = int(os.getenv("REFRESH_MAX_COMMENTS_PER_VIDEO", "300")) # Caps one incremental sync
+
 class AnalyticsService:
     def __init__(self, db: Session):
         self.db = db
@@ -11,28 +23,20 @@ class AnalyticsService:
         Calculates channel health score (-1.0 to 1.0) based on weighted sentiment of recent comments.
         Engagement (likes) amplifies the sentiment impact.
         """
-        recent_comments = self.db.query(Comment).join(Video).filter(Video.channel_id == channel_id).all()
-        
-        if not recent_comments:
-            return 0.0
+        return self._weighted_sentiment(Comment.video_id.in_(select(Video.id).where(Video.channel_id == channel_id)))
 
-        total_weight = 0.0
-        weighted_score_sum = 0.0
-
-        for comment in recent_comments:
-            # Linear engagement impact: 1 + likes
-            weight = 1.0 + comment.like_count
-            
-            # Use granular VADER score (-1.0 to 1.0)
-            sentiment_val = comment.vader_score if comment.vader_score is not None else 0.0
-            
-            weighted_score_sum += sentiment_val * weight
-            total_weight += weight
+    def calculate_video_sentiment_score(self, video_id: str) -> float:
+        return self._weighted_sentiment(Comment.video_id == video_id)
 
-        if total_weight == 0:
+    def _weighted_sentiment(self, condition) -> float:
+        # Linear engagement impact: 1 + likes; granular VADER score (-1.0 to 1.0). Summed in SQL.
+        weight = 1.0 + func.coalesce(Comment.like_count, 0)
+        weighted_sum, total_weight = self.db.query(
+            func.sum(func.coalesce(Comment.vader_score, 0.0) * weight), func.sum(weight)
+        ).filter(condition).one()
+        if not total_weight:
             return 0.0
-            
-        return weighted_score_sum / total_weight
+        return weighted_sum / total_weight
 
     def calculate_video_sentiment_distribution(self, video_id: str):
         comments = self.db.query(Comment).filter(Comment.video_id == video_id).all()
@@ -122,23 +126,30 @@ class AnalyticsService:
 
         return categories
 
-    def _analyze_video_task(self, channel_id: str, vid_id: str):
+    def _analyze_video_task(self, channel_id: str, vid_id: str, comment_source=None, priority: str = "channel"):
         """
         Helper task for parallel execution.
         Fetches max 50 comments (for speed) and performs sentiment analysis.
         Returns a dictionary with video_id and processed comment data.
+        `comment_source` replaces the YouTube API (e.g. SpoolReplaySource for offline re-analysis).
+        Gemini batches run on the shared batch_scheduler under `priority`.
         """
-        from backend.services.youtube_service import YouTubeService
+        from backend.services.youtube_service import YouTubeService, flatten_comment_threads, _env_flag
         from backend.services.sentiment_service import LocalSentimentService
+        from backend.services.scheduler import batch_scheduler
         import json
         
         # Instantiate services locally for thread safety
-        yt = YouTubeService()
+        yt = comment_source or YouTubeService(priority=priority) # Charged to the job's class, like its Gemini batches
         sentiment_service = LocalSentimentService()
         
-        # Limit to 50 comments for "Top 50 Insights" feature - Massive Speedup
+        # Limit to 50 threads for "Top 50 Insights" feature - Massive Speedup
         # Use order='relevance' to get the "Most Liked" / Top comments first
-        comments_data = yt.get_video_comments(vid_id, max_results=50, order="relevance")
+        include_replies = _env_flag("INGEST_REPLIES")
+        with tracing.span("fetch_comments", channel_id=channel_id, video_id=vid_id):
+            comments_data = flatten_comment_threads(
+                yt.get_video_comments(vid_id, max_results=50, order="relevance", include_replies=include_replies)
+            )
         
         # Prepare for Batch Analysis
         processed_comments = []
@@ -154,68 +165,71 @@ class AnalyticsService:
             batch_id = f"{vid_id}_b{batch_idx}"
             batch_input = []
             for c_data in chunk_data:
-                snippet = c_data["snippet"]["topLevelComment"]["snippet"]
                 batch_input.append({
                     "id": c_data["id"],
-                    "text": snippet["textDisplay"]
+                    "text": c_data["text"]
                 })
             
             try:
                 # Call Batched Analysis
-                batch_result = sentiment_service.analyze_comment_batch(batch_input, vid_id, batch_id)
+                with tracing.span("analyze_batch", video_id=vid_id, batch_id=batch_id, comments=len(batch_input)):
+                    batch_result = sentiment_service.analyze_comment_batch(batch_input, vid_id, batch_id)
                 return batch_result["results"]
             except Exception as e:
                 print(f"Batch {batch_id} failed: {e}")
                 return []
 
-        # Run batches in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-             future_to_batch = {executor.submit(process_batch, i, chunk): chunk for i, chunk in enumerate(chunks)}
-             
-             for future in concurrent.futures.as_completed(future_to_batch):
-                 chunk = future_to_batch[future]
-                 try:
-                     results_list = future.result()
-                     results_map = {r["comment_id"]: r for r in results_list}
-                     
-                     # Merge back
-                     for c_data in chunk:
-                        snippet = c_data["snippet"]["topLevelComment"]["snippet"]
-                        cid = c_data["id"]
-                        
-                        analysis = results_map.get(cid, {
-                            "sentiment": "neutral",
-                            "score": 0.0,
-                            "emoji": False
-                        })
-                        
-                        processed_comments.append({
-                            "id": cid,
-                            "text": snippet["textDisplay"],
-                            "author": snippet["authorDisplayName"],
-                            "likeCount": snippet["likeCount"],
-                            "publishedAt": snippet["publishedAt"],
-                            "sentiment": analysis["sentiment"],
-                            "vader_sentiment": analysis["sentiment"], # Fallback/Aligned
-                            "vader_score": analysis["score"],
-                            "emoji_detected": 1 if analysis["emoji"] else 0,
-                            "topics": json.dumps([]) 
-                        })
-                 except Exception as e:
-                     print(f"Batch execution failed: {e}")
+        # Run batches in parallel on the shared scheduler (interactive work goes first)
+        future_to_batch = {
+            batch_scheduler.submit(priority, channel_id, process_batch, i, chunk): chunk
+            for i, chunk in enumerate(chunks)
+        }
+        
+        for future in concurrent.futures.as_completed(future_to_batch):
+            chunk = future_to_batch[future]
+            try:
+                results_list = future.result()
+                results_map = {r["comment_id"]: r for r in results_list}
+                
+                # Merge back
+                for c_data in chunk:
+                   cid = c_data["id"]
+                   
+                   analysis = results_map.get(cid, {
+                       "sentiment": "neutral",
+                       "score": 0.0,
+                       "emoji": False
+                   })
+                   
+                   processed_comments.append({
+                       "id": cid,
+                       "parent_id": c_data["parent_id"],
+                       "text": c_data["text"],
+                       "author": c_data["author"],
+                       "likeCount": c_data["like_count"],
+                       "publishedAt": c_data["published_at"],
+                       "sentiment": analysis["sentiment"],
+                       "vader_sentiment": analysis["sentiment"], # Fallback/Aligned
+                       "vader_score": analysis["score"],
+                       "emoji_detected": 1 if analysis["emoji"] else 0,
+                       "topics": json.dumps([]) 
+                   })
+            except Exception as e:
+                print(f"Batch execution failed: {e}")
                 
         return {
             "video_id": vid_id,
             "comments": processed_comments
         }
 
-    def prepare_analysis_metadata(self, channel_id: str):
+    def prepare_analysis_metadata(self, channel_id: str, priority: str = "interactive"):
         """
         Phase 1: Fetch metadata for latest 10 videos (Synchronous).
         This guarantees videos exist in DB before API responds to frontend.
+        Bulk onboarding runs it inside the channel job instead, at the job's priority.
         """
         from backend.services.youtube_service import YouTubeService
-        yt = YouTubeService()
+        yt = YouTubeService(priority=priority) # Interactive by default: the API response waits on this
         
         # 1. Fetch latest 10 videos
         videos_data = yt.get_recent_videos(channel_id, max_results=10)
@@ -230,18 +244,142 @@ class AnalyticsService:
                 video = Video(id=vid_id, channel_id=channel_id)
                 self.db.add(video)
             
-            video.title = v_data["snippet"]["title"]
-            video.published_at = datetime.fromisoformat(v_data["snippet"]["publishedAt"].replace('Z', '+00:00'))
-            video.thumbnail_url = v_data["snippet"]["thumbnails"]["medium"]["url"]
+            self._apply_video_metadata(video, v_data)
             video.analysis_status = "processing"
         
         self.db.commit() # Videos visible in UI immediately
         print("DEBUG: Phase 1 (Metadata) Complete - Videos Inserted")
 
-    def run_background_analysis(self, channel_id: str):
+    @staticmethod
+    def _apply_video_metadata(video: Video, v_data: dict):
+        video.title = v_data["snippet"]["title"]
+        video.published_at = datetime.fromisoformat(v_data["snippet"]["publishedAt"].replace('Z', '+00:00'))
+        video.thumbnail_url = v_data["snippet"]["thumbnails"]["medium"]["url"]
+        stats = v_data.get("statistics")
+        if stats:
+            video.view_count = int(stats.get("viewCount", 0))
+            video.like_count = int(stats.get("likeCount", 0))
+            video.comment_count = int(stats.get("commentCount", 0))
+
+    def refresh_channel(self, channel_id: str, uploads_playlist_id: str = None, priority: str = "refresh"):
+        """
+        Incremental refresh used by the refresh scheduler: picks up new uploads, updates
+        the latest videos' statistics, and fetches and analyzes only the comments posted
+        since the newest stored one, on videos whose comment count moved. Returns what
+        changed, for the scheduler's velocity estimates.
+        """
+        from backend.services.youtube_service import YouTubeService, flatten_comment_threads
+
+        yt = YouTubeService(priority=priority)
+        db = self.db
+        if not uploads_playlist_id:
+            uploads_playlist_id = yt.get_uploads_playlist_id(channel_id)
+        # playlistItems + videos.list: 2 units for the latest 10 uploads and their statistics
+        videos_data = yt.get_recent_videos(channel_id, max_results=10, uploads_playlist_id=uploads_playlist_id)
+
+        known = {v.id: v for v in db.query(Video).filter(Video.id.in_([v["id"] for v in videos_data]))}
+        to_sync, new_videos = [], 0
+        for v_data in videos_data:
+            video = known.get(v_data["id"])
+            previous_count = video.comment_count if video else None
+            if video is None:
+                video = Video(id=v_data["id"], channel_id=channel_id)
+                db.add(video)
+                new_videos += 1
+            self._apply_video_metadata(video, v_data)
+            if previous_count is None or video.comment_count != previous_count:
+                to_sync.append(video)
+        db.commit()
+
+        new_comments = {}
+        for video in to_sync:
+            newest = (
+                db.query(func.max(Comment.published_at))
+                .filter(Comment.video_id == video.id, Comment.parent_id.is_(None))
+                .scalar()
+            )
+            since = newest.strftime("%Y-%m-%dT%H:%M:%SZ") if newest else None
+            with tracing.span("fetch_new_comments", channel_id=channel_id, video_id=video.id):
+                rows = flatten_comment_threads(
+                    yt.get_comments_since(video.id, since, max_results=REFRESH_MAX_COMMENTS_PER_VIDEO), include_replies=False
+                )
+            existing = {cid for (cid,) in db.query(Comment.id).filter(Comment.id.in_([r["id"] for r in rows]))}
+            rows = [r for r in rows if r["id"] not in existing] # Same-second comments come back again
+            if rows:
+                new_comments[video.id] = rows
+
+        analyzed = self._analyze_new_comments(db, channel_id, new_comments, priority)
+        for video in to_sync:
+            if video.id in new_comments:
+                video.sentiment_score = self.calculate_video_sentiment_score(video.id)
+            if video.analysis_status in (None, "pending"):
+                video.analysis_status = "completed" # New upload: its comments so far are now analyzed
+        channel = db.query(Channel).filter(Channel.id == channel_id).first()
+        if channel:
+            if analyzed:
+                channel.health_score = self.calculate_health_score(channel_id)
+            channel.last_updated = datetime.utcnow()
+        db.commit()
+        return {
+            "uploads_playlist_id": uploads_playlist_id,
+            "new_videos": new_videos,
+            "videos_synced": len(to_sync),
+            "new_comments": analyzed,
+        }
+
+    def _analyze_new_comments(self, db: Session, channel_id: str, rows_by_video: dict, priority: str) -> int:
+        """Stores the new comments, then scores them in batches on the shared scheduler."""
+        from backend.services.sentiment_service import LocalSentimentService
+        from backend.services.scheduler import batch_scheduler
+        import concurrent.futures
+
+        if not rows_by_video:
+            return 0
+        for video_id, rows in rows_by_video.items():
+            for c_data in rows:
+                db.add(Comment(
+                    id=c_data["id"], video_id=video_id, parent_id=c_data["parent_id"], text=c_data["text"],
+                    author=c_data["author"], like_count=c_data["like_count"],
+                    published_at=datetime.fromisoformat(c_data["published_at"].replace('Z', '+00:00')),
+                ))
+        db.commit()
+
+        sentiment_service = LocalSentimentService()
+        futures = {}
+        for video_id, rows in rows_by_video.items():
+            for i in range(0, len(rows), COMMENTS_PER_BATCH):
+                batch = [{"id": r["id"], "text": r["text"] or ""} for r in rows[i:i + COMMENTS_PER_BATCH]]
+                future = batch_scheduler.submit(
+                    priority, channel_id, sentiment_service.analyze_comment_batch, batch, video_id, f"r_{i}"
+                )
+                futures[future] = (video_id, batch)
+
+        analyzed = 0
+        for future in concurrent.futures.as_completed(futures):
+            video_id, batch = futures[future]
+            try:
+                results = future.result().get("results", [])
+            except Exception as e:
+                print(f"Refresh batch for {video_id} failed: {e}") # Comments keep their neutral defaults
+                continue
+            for res in results:
+                c = db.query(Comment).filter(Comment.id == res["comment_id"]).first()
+                if c:
+                    c.sentiment = SentimentType(res["sentiment"])
+                    c.vader_score = res["score"]
+                    c.emoji_detected = 1 if res.get("emoji", False) else 0
+            with STAGE_SECONDS.time(stage="db_commit"):
+                db.commit()
+            COMMENTS_PROCESSED.inc(len(batch), channel_id=channel_id)
+            analyzed += len(batch)
+        return analyzed
+
+    def run_background_analysis(self, channel_id: str, comment_source=None, job=None, priority: str = "channel"):
         """
         Phase 2: Deep Analysis (Asynchronous / Background).
         Uses a FRESH DB Session to avoid 'Session closed' errors in background threads.
+        Pass a SpoolReplaySource as `comment_source` to re-analyze from spooled pages without the API.
+        With a JobContext (`job`), each finished video is checkpointed and skipped on resume.
         """
         from backend.services.youtube_service import YouTubeService
         from backend.database import SessionLocal # Import for fresh session
@@ -260,58 +398,53 @@ class AnalyticsService:
             # 1. Get IDs to process
             # We fetch from DB since Phase 1 just inserted them
             videos = db_session.query(Video).filter(Video.channel_id == channel_id).order_by(Video.published_at.desc()).limit(10).all()
-            ids_to_process = [v.id for v in videos]
+            ids_to_process = [v.id for v in videos if not (job and job.is_done("video", v.id))]
+            if job:
+                job.progress(len(videos) - len(ids_to_process), len(videos))
             
             # --- PHASE 2: Deep Analysis (Parallel) ---
             print(f"Starting parallel analysis for {len(ids_to_process)} videos...")
             
-            results = []
             with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
                 # Submit tasks (using self._analyze_video_task which is static-ish logic)
                 future_to_vid = {
-                    executor.submit(self._analyze_video_task, channel_id, vid_id): vid_id 
+                    executor.submit(propagate(self._analyze_video_task), channel_id, vid_id, comment_source, priority): vid_id 
                     for vid_id in ids_to_process
                 }
                 
+                # Write each video as soon as it finishes (sequential on this thread, so one session is safe)
                 for future in concurrent.futures.as_completed(future_to_vid):
                     vid_id = future_to_vid[future]
                     try:
-                        data = future.result()
-                        results.append(data)
+                        res = future.result()
                     except Exception as e:
+                        if job and isinstance(e, QuotaExceeded):
+                            raise # The job is requeued for the quota reset; its videos stay 'processing'
                         print(f"Video {vid_id} generated an exception: {e}")
                         video = db_session.query(Video).filter(Video.id == vid_id).first()
                         if video:
                             video.analysis_status = "error"
                             db_session.commit()
+                        continue
 
-            # Write results to DB (Sequential for safety) using background session
-            for res in results:
-                vid_id = res['video_id']
-                comments_list = res['comments']
-                
-                for c_data in comments_list:
-                    comment = db_session.query(Comment).filter(Comment.id == c_data['id']).first()
-                    if not comment:
-                        comment = Comment(id=c_data['id'], video_id=vid_id)
-                        db_session.add(comment)
+                    with tracing.span("persist_video", channel_id=channel_id, video_id=vid_id, comments=len(res['comments'])):
+                        self._store_analyzed_comments(db_session, vid_id, res['comments'])
+                    COMMENTS_PROCESSED.inc(len(res['comments']), channel_id=channel_id)
                     
-                    comment.text = c_data['text']
-                    comment.author = c_data['author']
-                    comment.like_count = c_data['likeCount']
-                    comment.published_at = datetime.fromisoformat(c_data['publishedAt'].replace('Z', '+00:00'))
-                    comment.sentiment = SentimentType(c_data['sentiment'])
-                    comment.vader_sentiment = c_data['vader_sentiment']
-                    comment.vader_score = c_data['vader_score']
-                    comment.emoji_detected = c_data['emoji_detected']
-                    comment.topics = c_data['topics']
-                
-                db_session.commit()
-                
-                video = db_session.query(Video).filter(Video.id == vid_id).first()
-                if video:
-                    video.analysis_status = "completed"
-                    db_session.commit()
+                    video = db_session.query(Video).filter(Video.id == vid_id).first()
+                    if video:
+                        video.analysis_status = "completed"
+                        db_session.commit()
+
+                    if job:
+                        job.mark_done("video", vid_id)
+                        job.progress(job.done_count("video"))
+                        if job.should_stop():
+                            # Lease lost or shutting down: the retry resumes from the checkpoints
+                            for pending in future_to_vid:
+                                pending.cancel()
+                            print(f"DEBUG: Channel job {job.job_id} stopping early; will resume.")
+                            return
 
             # Update Channel
             channel = db_session.query(Channel).filter(Channel.id == channel_id).first()
@@ -332,10 +465,257 @@ class AnalyticsService:
             print(f"CRITICAL BACKGROUND ERROR: {e}")
             import traceback
             traceback.print_exc()
+            if job:
+                raise # Let the job queue retry it
         finally:
             db_session.close()
             print("DEBUG: Background DB Session Closed.")
 
+    def _store_analyzed_comments(self, db_session: Session, vid_id: str, comments_list: list):
+        """Upserts the processed comments produced by _analyze_video_task."""
+        for c_data in comments_list:
+            comment = db_session.query(Comment).filter(Comment.id == c_data['id']).first()
+            if not comment:
+                comment = Comment(id=c_data['id'], video_id=vid_id)
+                db_session.add(comment)
+            
+            comment.parent_id = c_data['parent_id']
+            comment.text = c_data['text']
+            comment.author = c_data['author']
+            comment.like_count = c_data['likeCount']
+            comment.published_at = datetime.fromisoformat(c_data['publishedAt'].replace('Z', '+00:00'))
+            comment.sentiment = SentimentType(c_data['sentiment'])
+            comment.vader_sentiment = c_data['vader_sentiment']
+            comment.vader_score = c_data['vader_score']
+            comment.emoji_detected = c_data['emoji_detected']
+            comment.topics = c_data['topics']
+        
+        with STAGE_SECONDS.time(stage="db_commit"):
+            db_session.commit()
+
+    def run_video_analysis(self, video_id: str, youtube=None, sentiment_service=None, job=None,
+                           include_replies: bool = None, max_batches: int = None, with_top_50: bool = True,
+                           priority: str = "interactive", cancel_event=None):
+        """
+        Fetches, stores and batch-analyzes one video's comments, yielding progress events.
+
+        Shared by the SSE endpoint and the `analyze_video` job. `max_batches` caps
+        Gemini calls (interactive path); None analyzes every comment. With a
+        JobContext every finished batch is checkpointed, and a resumed job skips the
+        fetch and all completed batches instead of starting over. `priority` is the
+        batch_scheduler class its Gemini batches (and default YouTube client) run under.
+
+        Setting `cancel_event` (SSE client gone) cancels batches that haven't started;
+        batches already committed are kept and the video goes back to 'pending'.
+        """
+        # The run yields mid-way, so its span is ended here rather than by a `with`
+        root = tracing.start_span(
+            "analyze_video", video_id=video_id, priority=priority, max_batches=max_batches,
+            job_id=job.job_id if job else None,
+        )
+        try:
+            yield from self._run_video_analysis(
+                root, video_id, youtube, sentiment_service, job, include_replies, max_batches,
+                with_top_50, priority, cancel_event,
+            )
+        finally:
+            if root:
+                root.end()
+
+    def _run_video_analysis(self, root, video_id, youtube, sentiment_service, job, include_replies,
+                            max_batches, with_top_50, priority, cancel_event):
+        from backend.services.youtube_service import YouTubeService, flatten_comment_threads
+        from backend.services.sentiment_service import LocalSentimentService
+        from backend.services.scheduler import batch_scheduler
+        import concurrent.futures
+
+        yt = youtube or YouTubeService(priority=priority)
+        sentiment_service = sentiment_service or LocalSentimentService()
+        db = self.db
+
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if not video:
+            raise ValueError(f"Video {video_id} not found locally.")
+        video.analysis_status = "processing"
+        db.commit()
+
+        # 1. Fetch comments (Fetch ALL available) and PRE-UPSERT them (Sequential, Fast)
+        # This ensures all Comment records exist with basic info before we update them in random order
+        comment_ids = None
+        if not (job and job.is_done("fetch", "all")):
+            with tracing.span("fetch_comments", parent=root, video_id=video_id) as fetch_span:
+                comments_data = flatten_comment_threads(
+                    yt.get_video_comments(video_id, max_results=None, include_replies=include_replies)
+                )
+                if fetch_span:
+                    fetch_span.set_attribute("comments", len(comments_data))
+            if not comments_data:
+                video.analysis_status = "completed"
+                db.commit()
+                yield {"status": "completed", "message": "No comments found"}
+                return
+
+            limit_total = len(comments_data)
+            if max_batches is not None:
+                limit_total = min(limit_total, max_batches * COMMENTS_PER_BATCH)
+            comments_to_process = comments_data[0:limit_total]
+
+            with tracing.span("store_comments", parent=root, video_id=video_id, comments=len(comments_to_process)):
+                for c_data in comments_to_process:
+                    comment = db.query(Comment).filter(Comment.id == c_data["id"]).first()
+                    if not comment:
+                        comment = Comment(id=c_data["id"], video_id=video_id)
+                        db.add(comment)
+                    
+                    comment.parent_id = c_data["parent_id"]
+                    comment.text = c_data["text"]
+                    comment.author = c_data["author"]
+                    comment.like_count = c_data["like_count"]
+                    comment.published_at = datetime.fromisoformat(c_data["published_at"].replace('Z', '+00:00'))
+                db.commit()
+
+            if job:
+                job.mark_done("fetch", "all")
+            else:
+                comment_ids = [c["id"] for c in comments_to_process]
+
+        if comment_ids is None:
+            # Jobs take the batch plan from the DB so a resumed run sees identical batches.
+            # Capped (interactive) jobs take the most-liked comments first.
+            query = db.query(Comment.id).filter(Comment.video_id == video_id)
+            if max_batches is not None:
+                query = query.order_by(Comment.like_count.desc(), Comment.id).limit(max_batches * COMMENTS_PER_BATCH)
+            else:
+                query = query.order_by(Comment.id)
+            comment_ids = [cid for (cid,) in query]
+
+        total_comments = len(comment_ids)
+        texts = dict(db.query(Comment.id, Comment.text).filter(Comment.video_id == video_id).all())
+
+        # 2. Prepare Chunks; a resumed job skips batches that were already committed
+        chunks = []
+        processed_count = 0
+        for i in range(0, total_comments, COMMENTS_PER_BATCH):
+            ids = comment_ids[i:i + COMMENTS_PER_BATCH]
+            if job and job.is_done("batch", i):
+                processed_count += len(ids)
+                continue
+            chunks.append((i, [{"id": cid, "text": texts.get(cid) or ""} for cid in ids]))
+
+        if job:
+            job.progress(processed_count, total_comments)
+        if cancelled():
+            yield self._cancel_video_analysis(video, processed_count, total_comments)
+            return
+        yield {"status": "processing", "progress": processed_count, "total": total_comments}
+
+        def process_batch_live(start_idx, comments_input):
+            # Gemini Call
+            with tracing.span("analyze_batch", video_id=video_id, batch_id=f"b_{start_idx}", comments=len(comments_input)):
+                return sentiment_service.analyze_comment_batch(comments_input, video_id, f"b_{start_idx}")
+
+        # 3. Run Parallel Analysis on the shared scheduler (GEMINI_WORKERS caps rate-limit pressure)
+        with tracing.use_span(root): # Batches run as children of this analysis
+            future_to_batch = {
+                batch_scheduler.submit(priority, video.channel_id, process_batch_live, i, chunk): (i, chunk)
+                for i, chunk in chunks
+            }
+        
+        stopping = False
+        for future in concurrent.futures.as_completed(future_to_batch):
+            if future.cancelled():
+                continue
+            start_idx, batch_data = future_to_batch[future]
+            try:
+                batch_results = future.result()
+                
+                # Update DB with Analysis Results
+                with tracing.span("persist_batch", parent=root, video_id=video_id, batch_id=f"b_{start_idx}"):
+                    for res in batch_results.get("results", []):
+                        c = db.query(Comment).filter(Comment.id == res["comment_id"]).first()
+                        if c:
+                            c.sentiment = SentimentType(res["sentiment"])
+                            c.vader_score = res["score"]
+                            c.emoji_detected = 1 if res.get("emoji", False) else 0
+
+                    processed_count += len(batch_data)
+                    with STAGE_SECONDS.time(stage="db_commit"):
+                        db.commit()
+                COMMENTS_PROCESSED.inc(len(batch_data), channel_id=video.channel_id)
+                if job:
+                    job.mark_done("batch", start_idx)
+                    job.progress(processed_count)
+                
+            except Exception as e:
+                db.rollback()
+                print(f"Batch failed: {e}")
+
+            if not stopping and ((job and job.should_stop()) or cancelled()):
+                # Drop queued batches; ones already running still finish and get committed
+                stopping = True
+                for pending in future_to_batch:
+                    pending.cancel()
+
+            # Yield Progress
+            if not stopping:
+                yield {"status": "processing", "progress": processed_count, "total": total_comments}
+
+        if stopping:
+            if job:
+                print(f"DEBUG: Video job {job.job_id} stopping early at {processed_count}/{total_comments}; will resume.")
+            else:
+                yield self._cancel_video_analysis(video, processed_count, total_comments)
+            return
+
+        # 4. Finalize
+        final_comments = db.query(Comment).filter(Comment.video_id == video_id).all()
+        total_score = 0.0
+        total_weight = 0.0
+        all_comments_list = []
+        for c in final_comments:
+            val = c.vader_score if c.vader_score is not None else 0.0
+            w = 1.0 + c.like_count
+            total_score += val * w
+            total_weight += w
+            all_comments_list.append({"id": c.id, "text": c.text, "author": c.author, "like_count": c.like_count})
+        
+        if total_weight > 0:
+            video.sentiment_score = total_score / total_weight
+        video.analysis_status = "completed"
+        db.commit()
+        print(f"DEBUG: Calculated Video {video.id} Sentiment Score: {video.sentiment_score} (Total Weight: {total_weight})")
+
+        channel = db.query(Channel).filter(Channel.id == video.channel_id).first()
+        if channel:
+            channel.health_score = self.calculate_health_score(channel.id)
+            db.commit()
+
+        # 5. Generate Top 50 Insights (Gemini)
+        top_50_insights = None
+        if with_top_50:
+            yield {"status": "processing", "message": "Generative AI is analyzing top 50 comments..."}
+            with tracing.span("top50_insights", parent=root, video_id=video_id):
+                top_50_insights = sentiment_service.generate_top_50_insights(all_comments_list)
+
+        yield {
+            "status": "completed",
+            "video": {"id": video.id, "sentiment_score": video.sentiment_score},
+            "health_score": channel.health_score if channel else 0.0,
+            "insights": self.generate_video_insights(video_id),
+            "distribution": self.calculate_video_sentiment_distribution(video_id),
+            "top_50_analysis": top_50_insights
+        }
+
+    def _cancel_video_analysis(self, video: Video, processed_count: int, total_comments: int):
+        """Nobody is watching any more: keep committed batches, let the video be re-analyzed."""
+        video.analysis_status = "pending"
+        self.db.commit()
+        print(f"DEBUG: Video {video.id} analysis cancelled at {processed_count}/{total_comments}.")
+        return {"status": "cancelled", "progress": processed_count, "total": total_comments}
+
     def generate_channel_insights(self, channel_id: str):
         """
         Fallback method for when deep analysis data is missing.
@@ -353,29 +733,24 @@ class AnalyticsService:
         """
         Synthesizes deep analysis data into creator-focused insights.
         """
-        import json
         videos = self.db.query(Video).filter(Video.channel_id == channel_id, Video.analysis_status == 'completed').all()
         if not videos:
              return self.generate_channel_insights(channel_id)
 
-        all_comments = self.db.query(Comment).join(Video).filter(Video.channel_id == channel_id).all()
-        if not all_comments:
+        # Aggregated in SQL and from the channel's topic sketch, so memory doesn't grow with comments
+        total, emoji_count, score_sum = self.db.query(
+            func.count(Comment.id),
+            func.coalesce(func.sum(case((Comment.emoji_detected == 1, 1), else_=0)), 0),
+            func.coalesce(func.sum(Comment.vader_score), 0.0),
+        ).join(Video).filter(Video.channel_id == channel_id).one()
+        if not total:
              return self.generate_channel_insights(channel_id)
 
-        total = len(all_comments)
-        emoji_comments = [c for c in all_comments if c.emoji_detected == 1]
-        emoji_pct = (len(emoji_comments) / total) * 100 if total > 0 else 0
-        
-        all_topics = []
-        for c in all_comments:
-            try:
-                all_topics.extend(json.loads(c.topics))
-            except: pass
+        emoji_pct = (emoji_count / total) * 100 if total > 0 else 0
         
-        from collections import Counter
-        top_topics = [t for t, _ in Counter(all_topics).most_common(5)]
+        top_topics = topic_sketches.top_topics(self.db, response_cache.channel_scope(channel_id), 5)
         
-        avg_sentiment = sum(c.vader_score for c in all_comments) / total if total > 0 else 0
+        avg_sentiment = score_sum / total if total > 0 else 0
         
         # Build Report
         insights = {
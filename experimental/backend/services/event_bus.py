@@ -0,0 +1,228 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+from backend.services.metrics import CACHE_REQUESTS
+
+# How long a finished analysis stays attachable, so late viewers and reconnects
+# (Last-Event-ID) still get its final events instead of starting a new run
+FLIGHT_RETENTION_SECONDS = float(os.getenv("FLIGHT_RETENTION_SECONDS", "120"))
+# A run nobody is subscribed to is cancelled after this grace period, which
+# leaves room for an EventSource to reconnect with Last-Event-ID first
+CANCEL_GRACE_SECONDS = float(os.getenv("FLIGHT_CANCEL_GRACE_SECONDS", "5"))
+KEEPALIVE_SECONDS = 15.0
+
+
+class Flight:
+    """
+    One in-progress analysis and its event log.
+
+    The producer publishes events; every subscriber replays the log from its
+    cursor and then follows new events, so viewers that join late or reconnect
+    see the same stream as the one that started the run. Event ids are
+    "<flight id>:<seq>", so a Last-Event-ID from an older run restarts at 0.
+
+    When the last subscriber leaves, `cancel_event` is set (after
+    CANCEL_GRACE_SECONDS) unless the flight was detached to finish in the background.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.id = uuid.uuid4().hex[:12]
+        self.events = []
+        self.done = False
+        self.finished_at = None
+        self.subscribers = 0
+        self.detached = False
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._async_waiters = set() # (loop, asyncio.Event) of subscribers
+
+    def publish(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+            self._wake_async()
+
+    def finish(self):
+        with self._lock:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._wake_async()
+
+    def _wake_async(self):
+        for loop, wake in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass # Loop already closed
+
+    def detach(self):
+        """Keep running to completion even with no one watching."""
+        with self._lock:
+            self.detached = True
+
+    def _cancel_if_abandoned(self):
+        with self._lock:
+            if self.subscribers == 0 and not self.done and not self.detached:
+                print(f"Flight {self.key}: no subscribers left, cancelling.")
+                self.cancel_event.set()
+
+    def cursor_from(self, last_event_id: str = None) -> int:
+        """Index of the first event a subscriber with `last_event_id` hasn't seen."""
+        if last_event_id:
+            flight_id, _, seq = last_event_id.partition(":")
+            if flight_id == self.id and seq.isdigit():
+                return int(seq) + 1
+        return 0
+
+    async def asubscribe(self, last_event_id: str = None):
+        """
+        Yields (event_id, event) until the flight finishes, and (None, None) every
+        KEEPALIVE_SECONDS while idle so the caller can keep the connection alive.
+        Waits on the event loop instead of holding a thread for the life of the stream.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        wake = waiter[1]
+        cursor = self.cursor_from(last_event_id)
+        with self._lock:
+            self.subscribers += 1
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                wake.clear()
+                with self._lock:
+                    pending = self.events[cursor:]
+                    done = self.done
+                for event in pending:
+                    yield f"{self.id}:{cursor}", event
+                    cursor += 1
+                if done and cursor >= len(self.events):
+                    return
+                if not pending:
+                    try:
+                        await asyncio.wait_for(wake.wait(), KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield None, None
+        finally:
+            with self._lock:
+                self._async_waiters.discard(waiter)
+            self._leave()
+
+    def _leave(self):
+        with self._lock:
+            self.subscribers -= 1
+            abandoned = self.subscribers == 0 and not self.done and not self.detached
+        if abandoned:
+            timer = threading.Timer(CANCEL_GRACE_SECONDS, self._cancel_if_abandoned)
+            timer.daemon = True
+            timer.start()
+
+
+class EventBus:
+    """
+    In-process single-flight registry keyed by resource ("video:<id>", "channel:<id>").
+
+    `attach` starts a producer only if no run for the key is active; every other
+    caller subscribes to the existing run. `call` does the same for plain
+    request/response work: concurrent callers wait for and share the leader's result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._calls = {}
+
+    def _purge(self):
+        now = time.monotonic()
+        for key in [k for k, f in self._flights.items() if f.done and now - f.finished_at > FLIGHT_RETENTION_SECONDS]:
+            del self._flights[key]
+
+    def _active(self, key: str):
+        self._purge()
+        return self._flights.get(key)
+
+    def get(self, key: str):
+        with self._lock:
+            return self._active(key)
+
+    def attach(self, key: str, producer, last_event_id: str = None, detach: bool = False):
+        """
+        Returns (flight, started). `producer` is called with the Flight and returns
+        an iterable of events; it runs on its own thread only when `started` is True
+        and should stop early once `flight.cancel_event` is set. A finished flight is
+        reused only when the caller is resuming it (matching Last-Event-ID);
+        otherwise a new run starts. `detach` marks the run to finish regardless of viewers.
+        """
+        with self._lock:
+            flight = self._active(key)
+            resuming = flight is not None and flight.cursor_from(last_event_id) > 0
+            if flight and (not flight.done or resuming) and not flight.cancel_event.is_set():
+                CACHE_REQUESTS.inc(cache="analysis_flight", result="hit")
+                if detach:
+                    flight.detach()
+                return flight, False
+            CACHE_REQUESTS.inc(cache="analysis_flight", result="miss")
+            flight = Flight(key)
+            flight.detached = detach
+            self._flights[key] = flight
+
+        def run():
+            try:
+                for event in producer(flight):
+                    flight.publish(event)
+            except Exception as e:
+                print(f"Flight {key} failed: {e}")
+                flight.publish({"status": "error", "message": str(e)})
+            finally:
+                flight.finish()
+
+        threading.Thread(target=run, daemon=True, name=f"flight-{key}").start()
+        return flight, True
+
+    def call(self, key: str, fn):
+        """Runs `fn` once for all concurrent callers with the same key and returns its result."""
+        with self._lock:
+            entry = self._calls.get(key)
+            leader = entry is None
+            CACHE_REQUESTS.inc(cache="single_flight", result="miss" if leader else "hit")
+            if leader:
+                entry = self._calls[key] = {"event": threading.Event(), "result": None, "error": None}
+
+        if not leader:
+            entry["event"].wait()
+            if entry["error"] is not None:
+                raise entry["error"]
+            return entry["result"]
+
+        try:
+            entry["result"] = fn()
+            return entry["result"]
+        except Exception as e:
+            entry["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            entry["event"].set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "flights": {
+                    key: {
+                        "events": len(f.events),
+                        "subscribers": f.subscribers,
+                        "done": f.done,
+                        "detached": f.detached,
+                        "cancelled": f.cancel_event.is_set(),
+                    }
+                    for key, f in self._flights.items()
+                },
+                "calls_in_flight": len(self._calls),
+            }
+
+
+# Process-wide bus shared by the API routes
+event_bus = EventBus()
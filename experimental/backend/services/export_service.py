@@ -0,0 +1,68 @@
+import csv
+import io
+import os
+import zlib
+
+from sqlalchemy import select
+
+from backend.api.schemas import CommentOut
+from backend.database import AsyncSessionLocal
+from backend.models.models import Comment, Video
+
+# Streaming comment exports (gzip-compressed NDJSON or CSV).
+#
+# Rows come off a server-side cursor EXPORT_CHUNK_ROWS at a time, are encoded and
+# pushed through one incremental gzip stream, and every chunk is yielded as soon as
+# the compressor emits it, so memory stays flat however many rows there are and the
+# download starts with the first chunk.
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+COLUMNS = list(CommentOut.model_fields)
+
+
+def _comments_query(video_id: str = None, channel_id: str = None):
+    query = select(*(getattr(Comment, name) for name in COLUMNS))
+    if video_id is not None:
+        query = query.filter(Comment.video_id == video_id)
+    else:
+        query = query.join(Video, Comment.video_id == Video.id).filter(Video.channel_id == channel_id)
+    # No ORDER BY: a sort would have to finish before the first row streams
+    return query.execution_options(yield_per=EXPORT_CHUNK_ROWS)
+
+
+def _encode_ndjson(rows, header: bool) -> bytes:
+    return b"".join(
+        CommentOut.model_validate(dict(zip(COLUMNS, row))).model_dump_json().encode("utf-8") + b"\n" for row in rows
+    )
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow(CommentOut.model_validate(dict(zip(COLUMNS, row))).model_dump(mode="json").values())
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_comments(fmt: str, video_id: str = None, channel_id: str = None):
+    """Yields the gzip-compressed export of a video's (or a channel's) comments."""
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # 16+: gzip container
+    header = True
+    # Own session: the request's session is closed before a streamed body runs
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(_comments_query(video_id, channel_id))
+        async for rows in result.partitions():
+            chunk = compressor.compress(encode(rows, header))
+            header = False
+            if chunk:
+                yield chunk
+        if header: # No rows: a CSV still gets its header line
+            chunk = compressor.compress(encode([], header))
+            if chunk:
+                yield chunk
+    yield compressor.flush()
@@ -0,0 +1,333 @@
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.database import SessionLocal
+from backend.models.models import Job, JobCheckpoint
+
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+MAX_BACKOFF_SECONDS = 300
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def worker_identity(name: str) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{name}"
+
+
+class JobQueue:
+    """
+    Persistent job queue stored in the `jobs` table.
+
+    Workers lease a job for LEASE_SECONDS and must heartbeat to keep it. A lease
+    that expires (worker crashed or was killed) makes the job available again, and
+    the next worker resumes it from its `job_checkpoints`. Failures are retried
+    with exponential backoff up to `max_attempts`; quota errors wait for the
+    quota to come back instead and don't use up an attempt.
+    """
+
+    def enqueue(self, kind: str, payload: dict, dedup_key: str = None, priority: int = 0, max_attempts: int = 3) -> Job:
+        """
+        Queue a job. If an active job with the same dedup_key exists, returns it instead.
+        The unique index on active dedup keys makes this atomic across processes: of two
+        racing enqueues, one inserts and the other gets the inserted job back.
+        """
+        values = {
+            "kind": kind, "payload": json.dumps(payload), "dedup_key": dedup_key,
+            "priority": priority, "max_attempts": max_attempts,
+        }
+        for _ in range(5):
+            if dedup_key:
+                existing = self.active_job(dedup_key)
+                if existing:
+                    return existing
+            db = SessionLocal()
+            try:
+                result = db.execute(insert(Job).values(**values).on_conflict_do_nothing())
+                db.commit()
+                if result.rowcount == 1:
+                    job = db.get(Job, result.inserted_primary_key[0])
+                    db.expunge(job)
+                    return job
+            finally:
+                db.close()
+            # Lost the race to another enqueue; its job may even have finished already, so look again
+        raise RuntimeError(f"Could not enqueue {kind} job for {dedup_key}")
+
+    def get(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def active_job(self, dedup_key: str):
+        db = SessionLocal()
+        try:
+            job = (
+                db.query(Job)
+                .filter(Job.dedup_key == dedup_key, Job.status.in_(ACTIVE_STATUSES))
+                .first()
+            )
+            if job:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def _reclaim_expired(self, db, now: datetime):
+        """Expired leases go back to the queue, or fail if they've used every attempt."""
+        expired = Job.status == "running", Job.lease_expires_at < now
+        db.execute(
+            update(Job)
+            .where(*expired, Job.attempts >= Job.max_attempts)
+            .values(status="failed", lease_owner=None, last_error="Lease expired on final attempt", updated_at=now)
+        )
+        db.execute(
+            update(Job)
+            .where(*expired)
+            .values(status="queued", lease_owner=None, updated_at=now)
+        )
+
+    def lease(self, owner: str, kinds: list = None, lease_seconds: int = LEASE_SECONDS, min_priority: int = None):
+        """Atomically claim the next runnable job (of at least `min_priority`). Returns None when there is none."""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            self._reclaim_expired(db, now)
+            db.commit()
+
+            for _ in range(5):
+                query = db.query(Job.id).filter(Job.status == "queued", Job.run_after <= now)
+                if kinds:
+                    query = query.filter(Job.kind.in_(kinds))
+                if min_priority is not None:
+                    query = query.filter(Job.priority >= min_priority)
+                candidate = query.order_by(Job.priority.desc(), Job.id).first()
+                if not candidate:
+                    return None
+
+                # Compare-and-set on status: another worker may have claimed it first
+                result = db.execute(
+                    update(Job)
+                    .where(Job.id == candidate.id, Job.status == "queued")
+                    .values(
+                        status="running",
+                        lease_owner=owner,
+                        lease_expires_at=now + timedelta(seconds=lease_seconds),
+                        attempts=Job.attempts + 1,
+                        updated_at=now,
+                    )
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    job = db.query(Job).filter(Job.id == candidate.id).first()
+                    db.expunge(job)
+                    return job
+            return None
+        finally:
+            db.close()
+
+    def _update_owned(self, job_id: int, owner: str, **values) -> bool:
+        db = SessionLocal()
+        try:
+            values["updated_at"] = datetime.utcnow()
+            result = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.lease_owner == owner, Job.status == "running")
+                .values(**values)
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: int = LEASE_SECONDS) -> bool:
+        """Extends the lease. False means it was lost and the worker must stop working on the job."""
+        return self._update_owned(
+            job_id, owner, lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)
+        )
+
+    def set_progress(self, job_id: int, owner: str, progress: int, total: int = None) -> bool:
+        values = {"progress": progress}
+        if total is not None:
+            values["total"] = total
+        return self._update_owned(job_id, owner, **values)
+
+    def complete(self, job_id: int, owner: str, result=None) -> bool:
+        values = {"status": "completed", "lease_owner": None, "lease_expires_at": None}
+        if result is not None:
+            values["result"] = json.dumps(result)
+        return self._update_owned(job_id, owner, **values)
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a queued or running job. A running worker notices on its next
+        heartbeat/progress write (it no longer owns a running job) and stops.
+        """
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_(ACTIVE_STATUSES))
+                .values(status="cancelled", lease_owner=None, lease_expires_at=None, updated_at=datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def follow(self, job_id: int, interval: float = 0.5, stop_event=None):
+        """
+        Yields the job each time its status or progress changes, until it leaves the
+        active states. Lets the API stream progress of work running in a worker process.
+        """
+        last = None
+        while stop_event is None or not stop_event.is_set():
+            job = self.get(job_id)
+            if not job:
+                return
+            state = (job.status, job.progress, job.total)
+            if state != last:
+                last = state
+                yield job
+            if job.status not in ACTIVE_STATUSES:
+                return
+            if stop_event is not None:
+                stop_event.wait(interval)
+            else:
+                time.sleep(interval)
+
+    def release(self, job_id: int, owner: str) -> bool:
+        """Hand a job back without counting the attempt (e.g. worker shutdown)."""
+        return self._update_owned(
+            job_id, owner, status="queued", lease_owner=None, lease_expires_at=None, attempts=Job.attempts - 1
+        )
+
+    def fail(self, job_id: int, owner: str, error: str, retry_after: float = None) -> bool:
+        """
+        Requeue with backoff, or mark failed once max_attempts is reached. Returns True if it will retry.
+        With `retry_after` (a quota wait) the job runs again after it without spending the attempt.
+        """
+        job = self.get(job_id)
+        if not job:
+            return False
+        if retry_after is not None:
+            return self._update_owned(
+                job_id, owner,
+                status="queued", lease_owner=None, lease_expires_at=None, last_error=error,
+                attempts=Job.attempts - 1, run_after=datetime.utcnow() + timedelta(seconds=retry_after),
+            )
+        if job.attempts >= job.max_attempts:
+            self._update_owned(job_id, owner, status="failed", lease_owner=None, lease_expires_at=None, last_error=error)
+            return False
+        backoff = min(MAX_BACKOFF_SECONDS, 5 * 2 ** (job.attempts - 1))
+        self._update_owned(
+            job_id, owner,
+            status="queued", lease_owner=None, lease_expires_at=None, last_error=error,
+            run_after=datetime.utcnow() + timedelta(seconds=backoff),
+        )
+        return True
+
+    # --- Checkpoints ---
+
+    def checkpoint(self, job_id: int, stage: str, key: str):
+        db = SessionLocal()
+        try:
+            db.execute(
+                insert(JobCheckpoint)
+                .values(job_id=job_id, stage=stage, key=str(key), completed_at=datetime.utcnow())
+                .on_conflict_do_nothing()
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def completed_keys(self, job_id: int, stage: str) -> set:
+        db = SessionLocal()
+        try:
+            rows = db.query(JobCheckpoint.key).filter(JobCheckpoint.job_id == job_id, JobCheckpoint.stage == stage).all()
+            return {key for (key,) in rows}
+        finally:
+            db.close()
+
+    def backlog(self, window_seconds: float):
+        """
+        Active jobs as {(kind, status): count}, and how many jobs finished in the last
+        `window_seconds` (the drain rate admission control projects waits from).
+        """
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Job.kind, Job.status, func.count(Job.id))
+                .filter(Job.status.in_(ACTIVE_STATUSES))
+                .group_by(Job.kind, Job.status)
+                .all()
+            )
+            since = datetime.utcnow() - timedelta(seconds=window_seconds)
+            finished = (
+                db.query(func.count(Job.id))
+                .filter(Job.status.notin_(ACTIVE_STATUSES), Job.updated_at >= since)
+                .scalar()
+            )
+            return {(kind, status): count for kind, status, count in rows}, finished or 0
+        finally:
+            db.close()
+
+    def counts(self):
+        """Job counts by status, for /admin/stats."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+            return {status: count for status, count in rows}
+        finally:
+            db.close()
+
+
+class JobContext:
+    """
+    Handed to job handlers: resume state, progress reporting and a stop signal.
+
+    `should_stop()` turns True when the worker lost its lease (another worker may
+    already be resuming the job) or is shutting down; handlers check it between
+    units of work and simply return, leaving the remaining work for the retry.
+    """
+
+    def __init__(self, queue: JobQueue, job: Job, owner: str, stop_event=None):
+        self.queue = queue
+        self.job = job
+        self.job_id = job.id
+        self.owner = owner
+        self.payload = json.loads(job.payload or "{}")
+        self.stop_event = stop_event
+        self.lease_lost = False
+        self._done = {}
+
+    def should_stop(self) -> bool:
+        return self.lease_lost or (self.stop_event is not None and self.stop_event.is_set())
+
+    def is_done(self, stage: str, key) -> bool:
+        if stage not in self._done:
+            self._done[stage] = self.queue.completed_keys(self.job_id, stage)
+        return str(key) in self._done[stage]
+
+    def done_count(self, stage: str) -> int:
+        if stage not in self._done:
+            self._done[stage] = self.queue.completed_keys(self.job_id, stage)
+        return len(self._done[stage])
+
+    def mark_done(self, stage: str, key):
+        self.queue.checkpoint(self.job_id, stage, key)
+        self._done.setdefault(stage, set()).add(str(key))
+
+    def progress(self, progress: int, total: int = None):
+        if not self.queue.set_progress(self.job_id, self.owner, progress, total):
+            self.lease_lost = True
@@ -0,0 +1,329 @@
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+# In-process metrics rendered at /metrics in the Prometheus text exposition format;
+# no client library or collector is needed, any scraper (or curl) can read it.
+#
+# Analysis runs in pulsegrow-worker processes, so each worker periodically writes a
+# snapshot of its registry to METRICS_DIR and the API merges those into its own
+# output: counters and histograms are summed across processes, as are gauges
+# (queue depths and busy workers add up).
+
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "pulsegrow-metrics"))
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """{label values tuple: value}; histograms map to their bucket state."""
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A settable value, or values computed at collection time via `add_function`."""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._functions = []
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def add_function(self, fn):
+        """`fn()` returns {label values tuple: value}; evaluated on every collection."""
+        self._functions.append(fn)
+
+    def samples(self):
+        values = super().samples()
+        for fn in self._functions:
+            try:
+                values.update({tuple(str(v) for v in key): value for key, value in fn().items()})
+            except Exception as e:
+                print(f"Metric {self.name} collection failed: {e}")
+        return values
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            return {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]} for key, s in self._values.items()}
+
+
+class Registry:
+    def __init__(self, prefix: str = "pulsegrow"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help, labelnames=(), **kwargs):
+        full_name = f"{self.prefix}_{name}"
+        with self._lock:
+            if full_name not in self._metrics:
+                self._metrics[full_name] = cls(full_name, help, labelnames, **kwargs)
+            return self._metrics[full_name]
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def snapshot(self):
+        """JSON-serializable state of every metric, as written to METRICS_DIR."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            m.name: {
+                "type": m.type,
+                "help": m.help,
+                "labelnames": list(m.labelnames),
+                "buckets": list(getattr(m, "buckets", ())),
+                "samples": [[list(key), value] for key, value in m.samples().items()],
+            }
+            for m in metrics
+        }
+
+    def merged(self, include_workers: bool = True):
+        """This process's snapshot with live worker snapshots merged in."""
+        merged = self.snapshot()
+        if include_workers:
+            for snapshot in read_snapshots():
+                _merge_snapshot(merged, snapshot)
+        return merged
+
+    def render(self, include_workers: bool = True) -> str:
+        """Text exposition of this process's metrics merged with worker snapshots."""
+        merged = self.merged(include_workers)
+
+        lines = []
+        for name in sorted(merged):
+            metric = merged[name]
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            names = metric["labelnames"]
+            for key, value in sorted(metric["samples"], key=lambda sample: sample[0]):
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_format_labels(names, key)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(metric["buckets"]) + [float("inf")], value["counts"]):
+                    cumulative += count
+                    le = _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels(names, key, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(names, key)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(names, key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge_snapshot(into: dict, snapshot: dict):
+    for name, metric in snapshot.items():
+        target = into.setdefault(name, dict(metric, samples=[]))
+        if target["type"] != metric["type"] or target["labelnames"] != metric["labelnames"]:
+            continue # Definition changed between versions; keep ours
+        samples = {tuple(key): value for key, value in target["samples"]}
+        for key, value in metric["samples"]:
+            key = tuple(key)
+            if key not in samples:
+                samples[key] = value
+            elif metric["type"] == "histogram":
+                if len(value["counts"]) != len(samples[key]["counts"]):
+                    continue
+                samples[key] = {
+                    "counts": [a + b for a, b in zip(samples[key]["counts"], value["counts"])],
+                    "sum": samples[key]["sum"] + value["sum"],
+                    "count": samples[key]["count"] + value["count"],
+                }
+            else:
+                samples[key] = samples[key] + value
+        target["samples"] = [[list(key), value] for key, value in samples.items()]
+
+
+# --- Worker snapshots ---
+
+def _snapshot_path(pid: int = None) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid or os.getpid()}.json")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_snapshot():
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _snapshot_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def remove_snapshot():
+    try:
+        os.remove(_snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+def read_snapshots():
+    """Snapshots of live worker processes; files left by dead ones are removed."""
+    snapshots = []
+    for path in glob.glob(os.path.join(METRICS_DIR, "worker-*.json")):
+        try:
+            pid = int(os.path.basename(path)[len("worker-"):-len(".json")])
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        if not _pid_alive(pid):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path, "r") as f:
+                snapshots.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return snapshots
+
+
+def start_snapshot_writer(stop_event: threading.Event):
+    """Flushes this process's metrics every METRICS_FLUSH_SECONDS until `stop_event` is set."""
+    def loop():
+        while not stop_event.wait(METRICS_FLUSH_SECONDS):
+            try:
+                write_snapshot()
+            except OSError as e:
+                print(f"Metrics snapshot failed: {e}")
+        remove_snapshot()
+
+    thread = threading.Thread(target=loop, daemon=True, name="metrics-snapshot")
+    thread.start()
+    return thread
+
+
+registry = Registry()
+
+# --- Metrics shared across modules ---
+
+STAGE_SECONDS = registry.histogram(
+    "stage_seconds",
+    "Latency of pipeline stages (youtube_page, gemini_batch, vader_batch, db_commit, top50_insights).",
+    ["stage"],
+)
+FALLBACKS = registry.counter(
+    "sentiment_fallbacks_total", "Comments scored by VADER instead of Gemini, by reason.", ["reason"]
+)
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Lookups that could reuse earlier or in-flight work, by cache and result (hit/miss).",
+    ["cache", "result"],
+)
+COMMENTS_PROCESSED = registry.counter(
+    "comments_processed_total", "Comments analyzed and committed; rate() gives comments/s per channel.",
+    ["channel_id"],
+)
+QUEUE_DEPTH = registry.gauge("queue_depth", "Items waiting, by queue and class or status.", ["queue", "class"])
+EXECUTOR_BUSY = registry.gauge("executor_busy", "Busy workers per executor.", ["executor"])
+EXECUTOR_WORKERS = registry.gauge("executor_workers", "Worker capacity per executor.", ["executor"])
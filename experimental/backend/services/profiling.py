@@ -0,0 +1,363 @@
+import contextlib
+import contextvars
+import cProfile
+import glob
+import json
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# On-demand profiling, armed from /api/admin/profile/*.
+#
+# A capture covers the next N requests to a route (in the API process) or one
+# analysis job (in whichever worker process leases it). Work the request/job hands
+# to other threads (run_blocking, the batch scheduler, per-video fetch pools) is
+# followed through contextvars, so the profile shows where the time actually goes.
+#
+# Modes:
+#   cprofile  deterministic, per-thread cProfile merged into one .prof (pstats) file
+#   sampling  stack samples of the participating threads every SAMPLE_INTERVAL,
+#             written as a speedscope JSON file (https://www.speedscope.app)
+#
+# When nothing is armed, the request path costs one dict check and the thread
+# hand-offs one ContextVar lookup.
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "pulsegrow-profiles"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+MAX_PROFILED_REQUESTS = 100
+MODES = ("cprofile", "sampling")
+EXTENSIONS = {"cprofile": ".prof", "sampling": ".speedscope.json"}
+
+_current = contextvars.ContextVar("profile_capture", default=None)
+_thread_state = threading.local()
+
+
+def _template_regex(template: str):
+    """'/channel/{channel_id}/videos' -> matches '/channel/x/videos' and '/api/channel/x/videos'."""
+    template = "/" + template.strip("/")
+    if template.startswith("/api/"):
+        template = template[len("/api"):]
+    parts = re.split(r"\{[^}]+\}", template)
+    return re.compile(r"^(/api)?" + r"[^/]+".join(re.escape(p) for p in parts) + r"/?$")
+
+
+class Capture:
+    """One armed profile; collects per-thread cProfile stats or stack samples until finished."""
+
+    def __init__(self, target: str, mode: str = "cprofile", requests: int = 1):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.id = uuid.uuid4().hex[:12]
+        self.target = target
+        self.mode = mode
+        self.requests = requests
+        self.remaining = requests
+        self.completed = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.path = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._profiles = []
+        self._threads = {} # thread id -> nesting depth, for the sampler
+        self._samples = {} # thread name -> list of stacks
+        self._sampler = None
+        self._sampler_stop = threading.Event()
+
+    # --- Lifecycle ---
+
+    def claim(self) -> bool:
+        """Takes one of the remaining profiled runs."""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self._active += 1
+            if self.started_at is None:
+                self.started_at = time.time()
+                if self.mode == "sampling":
+                    self._sampler = threading.Thread(target=self._sample_loop, daemon=True, name=f"profiler-{self.id}")
+                    self._sampler.start()
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self.completed += 1
+            done = self.remaining <= 0 and self._active == 0
+        if done:
+            self._finish()
+
+    def _finish(self):
+        self._sampler_stop.set()
+        if self._sampler:
+            self._sampler.join()
+        self.finished_at = time.time()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, self.id + EXTENSIONS[self.mode])
+        if self.mode == "cprofile":
+            self._write_pstats(path)
+        else:
+            self._write_speedscope(path)
+        self.path = path
+        with open(os.path.join(PROFILE_DIR, self.id + ".meta.json"), "w") as f:
+            json.dump(self.info(), f)
+
+    def info(self):
+        return {
+            "id": self.id,
+            "target": self.target,
+            "mode": self.mode,
+            "requests": self.requests,
+            "completed": self.completed,
+            "status": "finished" if self.path else "running" if self.started_at else "armed",
+            "created_at": self.created_at,
+            "duration_seconds": (self.finished_at - self.started_at) if self.finished_at and self.started_at else None,
+            "file": os.path.basename(self.path) if self.path else None,
+            "pid": os.getpid(),
+        }
+
+    # --- Per-thread collection ---
+
+    @contextlib.contextmanager
+    def thread(self):
+        """Profiles the current thread for the duration of the block."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        profiler = None
+        # One cProfile hook per thread: a concurrent request on the event loop
+        # thread (or another capture) already profiling it keeps the hook
+        if self.mode == "cprofile" and not getattr(_thread_state, "profiling", False):
+            profiler = cProfile.Profile()
+            _thread_state.profiling = True
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                _thread_state.profiling = False
+            with self._lock:
+                if profiler:
+                    self._profiles.append(profiler)
+                count = self._threads[ident] - 1
+                if count:
+                    self._threads[ident] = count
+                else:
+                    del self._threads[ident]
+
+    def _sample_loop(self):
+        names = {}
+        while not self._sampler_stop.wait(SAMPLE_INTERVAL):
+            with self._lock:
+                idents = list(self._threads)
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                if ident not in names:
+                    names[ident] = next((t.name for t in threading.enumerate() if t.ident == ident), str(ident))
+                self._samples.setdefault(names[ident], []).append(stack)
+
+    def _write_pstats(self, path: str):
+        if not self._profiles:
+            cProfile.Profile().dump_stats(path)
+            return
+        stats = pstats.Stats(self._profiles[0])
+        for profiler in self._profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+    def _write_speedscope(self, path: str):
+        frames, index = [], {}
+        profiles = []
+        for thread_name, stacks in sorted(self._samples.items()):
+            samples = []
+            for stack in stacks:
+                sample = []
+                for name, filename, line in stack:
+                    key = (name, filename, line)
+                    if key not in index:
+                        index[key] = len(frames)
+                        frames.append({"name": name, "file": filename, "line": line})
+                    sample.append(index[key])
+                samples.append(sample)
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": len(samples) * SAMPLE_INTERVAL,
+                "samples": samples,
+                "weights": [SAMPLE_INTERVAL] * len(samples),
+            })
+        with open(path, "w") as f:
+            json.dump({
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": f"pulsegrow {self.target}",
+                "exporter": "pulsegrow",
+                "shared": {"frames": frames},
+                "profiles": profiles,
+            }, f)
+
+
+# --- Propagation across threads ---
+
+def propagate(fn):
+    """
+    Wraps `fn` to run in a copy of the caller's context (so the current trace span
+    follows it too), profiled if the caller is inside a capture. Use it wherever
+    work is handed to another thread.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(_call, fn, args, kwargs)
+    return run
+
+
+def _call(fn, args, kwargs):
+    capture = _current.get()
+    if capture is None:
+        return fn(*args, **kwargs)
+    with capture.thread():
+        return fn(*args, **kwargs)
+
+
+@contextlib.contextmanager
+def profiled(capture: Capture):
+    """Runs the block (and anything it propagates to other threads) under `capture`."""
+    token = _current.set(capture)
+    try:
+        with capture.thread():
+            yield
+    finally:
+        _current.reset(token)
+        capture.release()
+
+
+# --- Route captures (API process) ---
+
+_route_captures = {} # capture id -> (compiled path regex, method or None, Capture)
+_route_lock = threading.Lock()
+
+
+def arm_route(route: str, requests: int = 1, mode: str = "cprofile", method: str = None) -> Capture:
+    requests = max(1, min(requests, MAX_PROFILED_REQUESTS))
+    capture = Capture(f"route:{method + ' ' if method else ''}{route}", mode, requests)
+    with _route_lock:
+        _route_captures[capture.id] = (_template_regex(route), method.upper() if method else None, capture)
+    return capture
+
+
+def capture_for_request(method: str, path: str):
+    """Claims a profiled run for this request if a capture is armed for its route."""
+    if not _route_captures:
+        return None
+    with _route_lock:
+        for capture_id, (pattern, wanted_method, capture) in list(_route_captures.items()):
+            if wanted_method and wanted_method != method:
+                continue
+            if pattern.match(path) and capture.claim():
+                if capture.remaining <= 0:
+                    del _route_captures[capture_id]
+                return capture
+    return None
+
+
+def cancel_route(capture_id: str) -> bool:
+    with _route_lock:
+        return _route_captures.pop(capture_id, None) is not None
+
+
+# --- Job captures (worker processes) ---
+# Workers are separate processes, so arming a job capture drops a request file in
+# PROFILE_DIR; the worker that leases the matching job claims it by renaming it.
+
+def _requests_dir():
+    return os.path.join(PROFILE_DIR, "requests")
+
+
+def arm_job(job_id: int = None, kind: str = None, mode: str = "cprofile"):
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode '{mode}' (expected one of {', '.join(MODES)})")
+    if (job_id is None) == (kind is None):
+        raise ValueError("Pass exactly one of job_id or kind")
+    if kind is not None and not re.fullmatch(r"[a-z_]+", kind):
+        raise ValueError(f"Invalid job kind '{kind}'") # It names the request file
+    key = f"job-{job_id}" if job_id is not None else f"kind-{kind}"
+    os.makedirs(_requests_dir(), exist_ok=True)
+    request = {"id": uuid.uuid4().hex[:12], "target": key, "mode": mode, "created_at": time.time()}
+    with open(os.path.join(_requests_dir(), key + ".json"), "w") as f:
+        json.dump(request, f)
+    return request
+
+
+def claim_job_capture(job_id: int, kind: str):
+    """Returns a claimed Capture if one was armed for this job (by id, else by kind)."""
+    for key in (f"job-{job_id}", f"kind-{kind}"):
+        path = os.path.join(_requests_dir(), key + ".json")
+        if not os.path.exists(path):
+            continue
+        claimed = f"{path}.{os.getpid()}"
+        try:
+            os.rename(path, claimed) # Atomic: only one worker wins
+            with open(claimed, "r") as f:
+                request = json.load(f)
+            os.remove(claimed)
+        except (OSError, json.JSONDecodeError):
+            continue
+        capture = Capture(f"job:{job_id} ({kind})", request.get("mode", "cprofile"))
+        capture.id = request["id"]
+        capture.claim()
+        return capture
+    return None
+
+
+# --- Listing / download ---
+
+def list_captures():
+    captures = {}
+    for path in glob.glob(os.path.join(PROFILE_DIR, "*.meta.json")):
+        try:
+            with open(path, "r") as f:
+                info = json.load(f)
+            captures[info["id"]] = info
+        except (OSError, json.JSONDecodeError):
+            continue
+    for path in glob.glob(os.path.join(_requests_dir(), "*.json")):
+        try:
+            with open(path, "r") as f:
+                request = json.load(f)
+            captures[request["id"]] = dict(request, status="armed", file=None)
+        except (OSError, json.JSONDecodeError):
+            continue
+    with _route_lock:
+        for _, _, capture in _route_captures.values():
+            captures[capture.id] = capture.info()
+    return sorted(captures.values(), key=lambda c: c.get("created_at", 0), reverse=True)
+
+
+def capture_file(capture_id: str):
+    """Path of a finished capture's output file, or None."""
+    if not re.fullmatch(r"[0-9a-f]{12}", capture_id):
+        return None
+    for extension in EXTENSIONS.values():
+        path = os.path.join(PROFILE_DIR, capture_id + extension)
+        if os.path.exists(path):
+            return path
+    return None
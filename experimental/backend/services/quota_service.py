@@ -0,0 +1,269 @@
+import atexit
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.database import SessionLocal
+from backend.models.models import QuotaUsage
+from backend.services.scheduler import PRIORITY_CLASSES
+
+# YouTube Data API v3 cost per call (units). Everything we use today is a 1-unit list call.
+QUOTA_COSTS = {
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "videos.list": 1,
+    "commentThreads.list": 1,
+    "comments.list": 1,
+    "search.list": 100,
+}
+DEFAULT_COST = 1
+
+# Quota classes are the scheduler's priority classes, so a call is charged to the class it runs under
+PRIORITIES = PRIORITY_CLASSES
+
+# The daily quota resets at midnight Pacific time
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+INTERACTIVE_RESERVE = float(os.getenv("YOUTUBE_INTERACTIVE_RESERVE", "0.2")) # Fraction of DAILY_QUOTA
+PACING_BURST = float(os.getenv("YOUTUBE_PACING_BURST", "0.05")) # Fraction of the background budget usable ahead of pace
+FLUSH_INTERVAL = 5.0 # Seconds between ledger writes
+
+
+class QuotaExceeded(Exception):
+    """Raised when a call can't fit in today's remaining quota for its priority class."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def quota_day(now: datetime = None) -> str:
+    now = now or datetime.now(PACIFIC)
+    return now.astimezone(PACIFIC).strftime("%Y-%m-%d")
+
+
+class QuotaService:
+    """
+    Per-call YouTube quota accounting persisted in `quota_usage`, plus a scheduler.
+
+    Increments are buffered in memory and flushed as atomic `units = units + n`
+    upserts, so every API/worker process shares one ledger that survives restarts.
+
+    Scheduling: `interactive` calls may use the whole daily quota. Background classes
+    (channel, backfill, refresh) share what is left after the interactive reserve, and are
+    paced across the day: by a given time they may only have used that fraction of the
+    background budget (plus a small burst), so a backfill can't drain the quota at 9am.
+    """
+
+    def __init__(self, daily_limit: int = DAILY_QUOTA, interactive_reserve: float = INTERACTIVE_RESERVE):
+        self.daily_limit = daily_limit
+        self.reserve_units = int(daily_limit * interactive_reserve)
+        self._lock = threading.Lock()
+        self._day = None
+        self._persisted = {}  # priority -> units already in the DB for self._day
+        self._pending = {}    # (priority, method) -> [units, calls] not yet flushed
+        self._last_flush = 0.0
+
+    # --- Accounting ---
+
+    def cost_of(self, method: str) -> int:
+        return QUOTA_COSTS.get(method, DEFAULT_COST)
+
+    def record(self, priority: str, method: str, units: int = None):
+        """Account for one API call that was actually made."""
+        units = self.cost_of(method) if units is None else units
+        with self._lock:
+            self._roll_day()
+            entry = self._pending.setdefault((priority, method), [0, 0])
+            entry[0] += units
+            entry[1] += 1
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _roll_day(self):
+        today = quota_day()
+        if today != self._day:
+            if self._day is not None:
+                self._flush_locked()
+            self._day = today
+            self._pending = {}
+            self._load_locked()
+
+    def _load_locked(self):
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(QuotaUsage.priority, func.sum(QuotaUsage.units))
+                .filter(QuotaUsage.day == self._day)
+                .group_by(QuotaUsage.priority)
+                .all()
+            )
+            self._persisted = {priority: int(units or 0) for priority, units in rows}
+        except Exception as e:
+            # Keep the last known totals; accounting must never break the API call itself
+            print(f"Quota ledger read failed: {e}")
+        finally:
+            db.close()
+
+    def _flush_locked(self):
+        if self._pending:
+            db = SessionLocal()
+            try:
+                for (priority, method), (units, calls) in self._pending.items():
+                    stmt = insert(QuotaUsage).values(
+                        day=self._day, priority=priority, method=method,
+                        units=units, calls=calls, updated_at=datetime.utcnow()
+                    )
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["day", "priority", "method"],
+                        set_={
+                            "units": QuotaUsage.units + stmt.excluded.units,
+                            "calls": QuotaUsage.calls + stmt.excluded.calls,
+                            "updated_at": stmt.excluded.updated_at,
+                        },
+                    )
+                    db.execute(stmt)
+                db.commit()
+                self._pending = {}
+            except Exception as e:
+                db.rollback()
+                print(f"Quota ledger flush failed (will retry): {e}")
+                return
+            finally:
+                db.close()
+        # Re-read so usage from other processes is reflected in scheduling decisions
+        self._load_locked()
+        self._last_flush = time.monotonic()
+
+    def _used_locked(self):
+        used = dict(self._persisted)
+        for (priority, _), (units, _) in self._pending.items():
+            used[priority] = used.get(priority, 0) + units
+        return used
+
+    # --- Scheduling ---
+
+    def _day_fraction(self, now: datetime) -> float:
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return min(1.0, (now - start).total_seconds() / 86400.0)
+
+    def _check_locked(self, priority: str, units: int):
+        """Returns 0 if the call may proceed now, else seconds to wait. Raises if it can't fit today."""
+        used = self._used_locked()
+        total_used = sum(used.values())
+        if total_used + units > self.daily_limit:
+            raise QuotaExceeded("YouTube daily quota exhausted.", retry_after=self._seconds_until_reset())
+
+        if priority == "interactive":
+            return 0
+
+        background_budget = self.daily_limit - self.reserve_units
+        background_used = total_used - used.get("interactive", 0)
+        if background_used + units > background_budget:
+            raise QuotaExceeded(
+                "Background share of the YouTube quota is exhausted; the remainder is reserved for interactive analyses.",
+                retry_after=self._seconds_until_reset(),
+            )
+
+        now = datetime.now(PACIFIC)
+        allowed = background_budget * self._day_fraction(now) + background_budget * PACING_BURST
+        if background_used + units <= allowed:
+            return 0
+        # Time until the pacing line catches up with this call
+        deficit = background_used + units - allowed
+        return deficit / background_budget * 86400.0
+
+    def acquire(self, priority: str, units: int = DEFAULT_COST, wait: bool = True):
+        """
+        Blocks (background classes) until `units` fit the pacing schedule.
+        Raises QuotaExceeded if they can't fit in today's quota at all, or if
+        `wait` is False and the call would have to wait.
+        """
+        while True:
+            with self._lock:
+                self._roll_day()
+                delay = self._check_locked(priority, units)
+            if delay <= 0:
+                return
+            if not wait:
+                raise QuotaExceeded(f"{priority} quota is paced; retry later.", retry_after=delay)
+            # Sleep in short steps so a day roll or other processes' usage is picked up
+            time.sleep(min(delay, 30.0))
+            self.flush()
+
+    def used(self, priority: str) -> int:
+        """Units `priority` has spent today, across processes as of the last flush."""
+        with self._lock:
+            self._roll_day()
+            return self._used_locked().get(priority, 0)
+
+    def headroom(self, priority: str) -> int:
+        """Units `priority` may still spend today (interactive: whole quota; others: the background budget), pacing aside."""
+        with self._lock:
+            self._roll_day()
+            used = self._used_locked()
+        total_used = sum(used.values())
+        if priority == "interactive":
+            return max(0, self.daily_limit - total_used)
+        background_used = total_used - used.get("interactive", 0)
+        return max(0, min(self.daily_limit - total_used, self.daily_limit - self.reserve_units - background_used))
+
+    def seconds_until_reset(self) -> float:
+        return self._seconds_until_reset()
+
+    def _next_reset(self, now: datetime) -> datetime:
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _seconds_until_reset(self) -> float:
+        now = datetime.now(PACIFIC)
+        return (self._next_reset(now) - now).total_seconds()
+
+    # --- Reporting ---
+
+    def snapshot(self):
+        """Remaining quota and an end-of-day projection for /admin/stats."""
+        with self._lock:
+            self._roll_day()
+            self._flush_locked()
+            used = self._used_locked()
+
+        now = datetime.now(PACIFIC)
+        total_used = sum(used.values())
+        fraction = self._day_fraction(now)
+        background_budget = self.daily_limit - self.reserve_units
+        background_used = total_used - used.get("interactive", 0)
+
+        # Linear projection of today's burn rate to the end of the quota day
+        projected = total_used / fraction if fraction > 0 else float(total_used)
+        exhaustion_at = None
+        if total_used > 0 and projected > self.daily_limit:
+            rate_per_sec = total_used / (fraction * 86400.0)
+            exhaustion_at = (now + timedelta(seconds=(self.daily_limit - total_used) / rate_per_sec)).isoformat()
+
+        return {
+            "day": self._day,
+            "daily_limit": self.daily_limit,
+            "used": total_used,
+            "remaining": max(0, self.daily_limit - total_used),
+            "used_by_priority": {p: used.get(p, 0) for p in PRIORITIES},
+            "interactive_reserve": self.reserve_units,
+            "background_remaining": max(0, background_budget - background_used),
+            "projected_usage": int(projected),
+            "projected_exhaustion_at": exhaustion_at,
+            "resets_at": self._next_reset(now).isoformat(),
+        }
+
+
+# Process-wide ledger shared by every YouTubeService instance
+quota_service = QuotaService()
+atexit.register(quota_service.flush)
@@ -0,0 +1,191 @@
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.database import SessionLocal
+from backend.models.models import Job, TrackedChannel
+from backend.services.job_queue import ACTIVE_STATUSES, JobQueue
+from backend.services.quota_service import quota_service
+from backend.services.scheduler import JOB_PRIORITY
+
+# Scheduled incremental refresh of tracked channels.
+#
+# Every analyzed channel is tracked. The refresh daemon wakes every
+# REFRESH_TICK_SECONDS, claims channels whose next_refresh_at has passed (a
+# conditional UPDATE, so several daemons never claim the same channel) and queues
+# `refresh_channel` jobs: new uploads, video statistics, and only the comments
+# posted since the last sync (AnalyticsService.refresh_channel).
+#
+# Cadence adapts per channel: an EWMA of new comments/hour and uploads/day sets the
+# interval so a refresh finds about REFRESH_TARGET_COMMENTS new comments, and at
+# least REFRESH_CHECKS_PER_UPLOAD checks land between uploads. Quiet channels back
+# off towards REFRESH_MAX_SECONDS. Every interval gets +/- REFRESH_JITTER so
+# channels tracked together don't refresh in lockstep.
+#
+# The fleet stays within a fixed budget: when the summed cadence would spend more
+# than REFRESH_DAILY_UNITS of YouTube quota per day, every interval is stretched by
+# the same factor. At most REFRESH_MAX_ACTIVE refresh jobs are queued or running,
+# and their Gemini batches run in the scheduler's lowest ("refresh") class.
+
+REFRESH_TICK_SECONDS = float(os.getenv("REFRESH_TICK_SECONDS", "30"))
+REFRESH_BASE_SECONDS = float(os.getenv("REFRESH_BASE_SECONDS", str(6 * 3600))) # First refresh after an analysis
+REFRESH_MIN_SECONDS = float(os.getenv("REFRESH_MIN_SECONDS", "900"))
+REFRESH_MAX_SECONDS = float(os.getenv("REFRESH_MAX_SECONDS", str(7 * 86400)))
+REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "0.1"))
+REFRESH_TARGET_COMMENTS = float(os.getenv("REFRESH_TARGET_COMMENTS", "100"))
+REFRESH_CHECKS_PER_UPLOAD = float(os.getenv("REFRESH_CHECKS_PER_UPLOAD", "4"))
+REFRESH_DAILY_UNITS = float(os.getenv("REFRESH_DAILY_UNITS", "2000"))
+REFRESH_UNITS_ESTIMATE = float(os.getenv("REFRESH_UNITS_ESTIMATE", "4")) # playlistItems + videos + ~2 comment pages
+REFRESH_MAX_ACTIVE = int(os.getenv("REFRESH_MAX_ACTIVE", "4"))
+BACKOFF_FACTOR = 1.5 # A refresh that found nothing new stretches the interval by this much
+EWMA_ALPHA = 0.5
+
+job_queue = JobQueue()
+
+
+def _jittered(seconds: float) -> timedelta:
+    return timedelta(seconds=seconds * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER))
+
+
+def track_channel(db, channel_id: str):
+    """Starts tracking `channel_id` (no-op if tracked); its first refresh is REFRESH_BASE_SECONDS out. Caller commits."""
+    stmt = insert(TrackedChannel).values(
+        channel_id=channel_id,
+        interval_seconds=REFRESH_BASE_SECONDS,
+        next_refresh_at=datetime.utcnow() + _jittered(REFRESH_BASE_SECONDS),
+        created_at=datetime.utcnow(),
+    )
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["channel_id"]))
+
+
+def budget_scale(db) -> float:
+    """Factor stretching every interval so the fleet's projected daily units fit REFRESH_DAILY_UNITS."""
+    refreshes_per_day = db.query(func.sum(86400.0 / TrackedChannel.interval_seconds)).scalar() or 0.0
+    return max(1.0, refreshes_per_day * REFRESH_UNITS_ESTIMATE / REFRESH_DAILY_UNITS)
+
+
+def next_interval(tracked: TrackedChannel, elapsed_seconds: float, new_comments: int, new_videos: int) -> float:
+    """Updates the channel's velocity estimates from one refresh and returns its new interval."""
+    hours = max(elapsed_seconds, 1.0) / 3600.0
+    tracked.comment_rate = EWMA_ALPHA * (new_comments / hours) + (1 - EWMA_ALPHA) * (tracked.comment_rate or 0.0)
+    tracked.upload_rate = EWMA_ALPHA * (new_videos / hours * 24) + (1 - EWMA_ALPHA) * (tracked.upload_rate or 0.0)
+
+    if not new_comments and not new_videos:
+        interval = (tracked.interval_seconds or REFRESH_BASE_SECONDS) * BACKOFF_FACTOR
+    else:
+        interval = REFRESH_MAX_SECONDS
+        if tracked.comment_rate > 0:
+            interval = REFRESH_TARGET_COMMENTS / tracked.comment_rate * 3600
+        if tracked.upload_rate > 0:
+            interval = min(interval, 86400 / tracked.upload_rate / REFRESH_CHECKS_PER_UPLOAD)
+    return min(REFRESH_MAX_SECONDS, max(REFRESH_MIN_SECONDS, interval))
+
+
+def record_refresh(db, channel_id: str, summary: dict):
+    """Folds one refresh's results into the channel's schedule. Caller commits."""
+    tracked = db.query(TrackedChannel).filter(TrackedChannel.channel_id == channel_id).first()
+    if tracked is None:
+        return # Untracked while the refresh ran
+    now = datetime.utcnow()
+    elapsed = (now - (tracked.last_refresh_at or tracked.created_at or now)).total_seconds()
+    tracked.interval_seconds = next_interval(tracked, elapsed, summary["new_comments"], summary["new_videos"])
+    tracked.uploads_playlist_id = summary.get("uploads_playlist_id") or tracked.uploads_playlist_id
+    tracked.last_refresh_at = now
+    tracked.refreshes = (tracked.refreshes or 0) + 1
+    db.flush()
+    tracked.next_refresh_at = now + _jittered(tracked.interval_seconds * budget_scale(db))
+
+
+def enqueue_refresh(channel_id: str, priority: str = "refresh"):
+    return job_queue.enqueue(
+        "refresh_channel",
+        {"channel_id": channel_id, "priority": priority},
+        dedup_key=f"refresh:{channel_id}",
+        priority=JOB_PRIORITY.get(priority, JOB_PRIORITY["refresh"]),
+    )
+
+
+class RefreshScheduler:
+    """Claims due tracked channels and queues their refresh jobs, within the fleet budget."""
+
+    def tick(self) -> int:
+        """One scheduling pass; returns how many refreshes were queued."""
+        db = SessionLocal()
+        try:
+            active = dict(
+                db.query(Job.dedup_key, Job.kind)
+                .filter(Job.status.in_(ACTIVE_STATUSES), Job.kind.in_(("refresh_channel", "analyze_channel")))
+                .all()
+            )
+            slots = REFRESH_MAX_ACTIVE - sum(1 for kind in active.values() if kind == "refresh_channel")
+            if slots <= 0:
+                return 0
+            if quota_service.used("refresh") >= REFRESH_DAILY_UNITS:
+                return 0 # Today's refresh budget is spent; due channels wait for the reset
+
+            now = datetime.utcnow()
+            due = (
+                db.query(TrackedChannel.channel_id, TrackedChannel.next_refresh_at, TrackedChannel.interval_seconds)
+                .filter(TrackedChannel.next_refresh_at <= now)
+                .order_by(TrackedChannel.next_refresh_at)
+                .limit(slots * 2)
+                .all()
+            )
+            scale = budget_scale(db)
+            queued = 0
+            for channel_id, due_at, interval in due:
+                if queued >= slots:
+                    break
+                # Provisional next run: holds if the job fails; record_refresh replaces it on success
+                claimed = db.execute(
+                    update(TrackedChannel)
+                    .where(TrackedChannel.channel_id == channel_id, TrackedChannel.next_refresh_at == due_at)
+                    .values(next_refresh_at=now + _jittered((interval or REFRESH_BASE_SECONDS) * scale))
+                ).rowcount
+                db.commit()
+                if not claimed:
+                    continue # Another daemon got it
+                if f"channel:{channel_id}" in active:
+                    continue # A full analysis is running; it refreshes the channel anyway
+                enqueue_refresh(channel_id)
+                queued += 1
+            return queued
+        finally:
+            db.close()
+
+    def stats(self):
+        """Tracked channels, overdue ones and the budget scale, for /admin/stats."""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            return {
+                "tracked": db.query(func.count(TrackedChannel.channel_id)).scalar(),
+                "due": db.query(func.count(TrackedChannel.channel_id)).filter(TrackedChannel.next_refresh_at <= now).scalar(),
+                "budget_scale": budget_scale(db),
+                "daily_units": REFRESH_DAILY_UNITS,
+                "units_used_today": quota_service.used("refresh"),
+            }
+        finally:
+            db.close()
+
+
+def start_refresh_daemon(stop_event: threading.Event):
+    """Runs RefreshScheduler.tick every REFRESH_TICK_SECONDS until `stop_event` is set."""
+    scheduler = RefreshScheduler()
+
+    def loop():
+        while not stop_event.wait(REFRESH_TICK_SECONDS):
+            try:
+                queued = scheduler.tick()
+                if queued:
+                    print(f"REFRESH: queued {queued} channel refresh(es).")
+            except Exception as e:
+                print(f"REFRESH: scheduling pass failed: {e}")
+
+    thread = threading.Thread(target=loop, daemon=True, name="refresh-daemon")
+    thread.start()
+    return thread
@@ -0,0 +1,169 @@
+import collections
+import functools
+import hashlib
+import itertools
+import os
+import threading
+from datetime import datetime
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, attributes
+
+from backend.models.models import Channel, Comment, DataVersion, Video
+from backend.services.metrics import CACHE_REQUESTS
+
+# Response cache for the polled read endpoints (/channel/{id}/videos, /video/{id},
+# /channel/{id}/insights).
+#
+# Every flush that touches a Channel, Video or Comment bumps the data version of
+# the affected video and channel scopes in the same transaction, whichever process
+# writes (API or worker). A read first looks up its scope's version (one primary-key
+# read); if this process already rendered the response at that version it is
+# served as-is, or as a 304 when the client's If-None-Match matches. Only a new
+# version pays for the distributions, insights and top-50 call again.
+#
+# ETags are strong: a hash of the exact body bytes, so they hold across API
+# processes and restarts even though the top-50 text is regenerated per render.
+# Bulk Query.update()/delete() skip flush events; call bump_versions() after them.
+
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "512"))
+
+
+# --- Data versions ---
+
+def channel_scope(channel_id: str) -> str:
+    return f"channel:{channel_id}"
+
+
+def video_scope(video_id: str) -> str:
+    return f"video:{video_id}"
+
+
+def bump_versions(session, channel_ids=(), video_ids=()):
+    """Bumps the given scopes, plus the channels owning `video_ids`, on the session's connection."""
+    channel_ids = {c for c in channel_ids if c}
+    video_ids = {v for v in video_ids if v}
+    if not channel_ids and not video_ids:
+        return
+    connection = session.connection()
+    if video_ids:
+        owners = connection.execute(select(Video.channel_id).where(Video.id.in_(video_ids))).scalars()
+        channel_ids.update(c for c in owners if c)
+    now = datetime.utcnow()
+    scopes = [channel_scope(c) for c in sorted(channel_ids)] + [video_scope(v) for v in sorted(video_ids)]
+    stmt = insert(DataVersion).values([{"scope": scope, "version": 1, "updated_at": now} for scope in scopes])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"version": DataVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    connection.execute(stmt)
+
+
+def _with_previous(obj, name: str):
+    """The attribute's current value plus, if this flush changed it, the one it replaced."""
+    return [getattr(obj, name), *attributes.get_history(obj, name).deleted]
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    # new/dirty/deleted and attribute history still describe the flushed changes here;
+    # a comment or video moved to another parent bumps the old parent's scope too
+    channel_ids, video_ids = set(), set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Comment):
+            video_ids.update(_with_previous(obj, "video_id"))
+        elif isinstance(obj, Video):
+            video_ids.add(obj.id)
+            channel_ids.update(_with_previous(obj, "channel_id"))
+        elif isinstance(obj, Channel):
+            channel_ids.add(obj.id)
+    bump_versions(session, channel_ids, video_ids)
+
+
+async def current_version(db, scope: str) -> int:
+    """Data version of `scope` from an AsyncSession (0 if it was never written)."""
+    return await db.scalar(select(DataVersion.version).where(DataVersion.scope == scope)) or 0
+
+
+# --- Response cache ---
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model):
+    return TypeAdapter(model)
+
+
+def render(model, data) -> bytes:
+    """JSON body of `data` (ORM rows allowed) through the response model, as FastAPI would render it."""
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True), exclude_unset=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """LRU of rendered JSON bodies: key -> (data version, ETag, body)."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version: int):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version: int, etag: str, body: bytes):
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > version:
+                return # A newer render already landed
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def respond(self, request, db, scope: str, compute, model):
+        """
+        Serves the response for `request` at `scope`'s current data version, calling
+        `compute()` (async, returns the payload for response model `model`) only on a miss.
+        """
+        version = await current_version(db, scope)
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+        entry = self.get(key, version)
+        CACHE_REQUESTS.inc(cache="response", result="hit" if entry else "miss")
+        if entry is None:
+            body = render(model, await compute())
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            self.put(key, version, etag, body)
+        else:
+            _, etag, body = entry
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"} # Revalidate every time; 304s are cheap
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,243 @@
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import os
+import threading
+import time
+
+from backend.services.metrics import EXECUTOR_BUSY, EXECUTOR_WORKERS, QUEUE_DEPTH
+from backend.services.profiling import propagate
+
+# Priority classes, most urgent first. quota_service charges YouTube units to the same classes.
+PRIORITY_CLASSES = ("interactive", "channel", "backfill", "refresh")
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITY_CLASSES)}
+
+# Job-queue priority (higher leases first) for each class, so worker processes pick
+# work in the same order the in-process scheduler runs it
+JOB_PRIORITY = {"interactive": 30, "channel": 20, "backfill": 10, "refresh": 0}
+
+GEMINI_WORKERS = int(os.getenv("GEMINI_WORKERS", "5")) # ~15 RPS free-tier limit; per process (a worker pool splits it)
+AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "60")) # Starvation guard for lower classes
+BLOCKING_WORKERS = int(os.getenv("API_BLOCKING_WORKERS", "8")) # Sync ORM/LLM/YouTube work from async routes
+
+
+def _rank(priority: str) -> int:
+    return PRIORITY_RANK.get(priority, len(PRIORITY_CLASSES) - 1)
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "enqueued_at")
+
+    def __init__(self, future, fn, args, kwargs):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.monotonic()
+
+
+class BatchScheduler:
+    """
+    Shared worker pool for LLM comment batches, replacing per-request executors.
+
+    Scheduling happens per batch: whenever a worker frees up it takes the next batch
+    from the most urgent non-empty class, so a new interactive analysis waits for at
+    most one in-flight batch rather than behind a whole backfill.
+
+    Within a class, channels take equal turns: each dispatch advances the channel's
+    `pass` by one and the lowest pass runs next, so a channel with a thousand queued
+    batches can't crowd out one with ten. A channel that (re)joins starts at the
+    class's current minimum, so it can't bank credit while idle. Tasks waiting longer than AGING_SECONDS are served regardless
+    of class so bulk work still makes progress under sustained interactive load.
+    """
+
+    def __init__(self, workers: int = GEMINI_WORKERS):
+        self._cond = threading.Condition()
+        # class rank -> channel -> deque of tasks
+        self._queues = [collections.OrderedDict() for _ in PRIORITY_CLASSES]
+        self._pass = [dict() for _ in PRIORITY_CLASSES]
+        self._running = 0
+        self._started = False
+        self.workers = workers
+
+    def _ensure_started(self):
+        # Threads start on first use so processes that never analyze don't carry them
+        if not self._started:
+            self._started = True
+            for i in range(self.workers):
+                threading.Thread(target=self._worker, daemon=True, name=f"batch-scheduler-{i}").start()
+
+    def resize(self, workers: int):
+        """Sets the number of worker threads; only before the first batch is submitted."""
+        with self._cond:
+            if self._started:
+                raise RuntimeError("BatchScheduler is already running")
+            self.workers = workers
+
+    def submit(self, priority: str, channel_id: str, fn, *args, **kwargs) -> concurrent.futures.Future:
+        """Queue one batch. Cancelling the returned future before it starts drops the batch."""
+        future = concurrent.futures.Future()
+        rank = _rank(priority)
+        with self._cond:
+            self._ensure_started()
+            queues = self._queues[rank]
+            if channel_id not in queues:
+                queues[channel_id] = collections.deque()
+                passes = self._pass[rank]
+                active = [passes[c] for c in queues if c in passes and c != channel_id]
+                passes[channel_id] = min(active) if active else 0.0
+            queues[channel_id].append(_Task(future, propagate(fn), args, kwargs))
+            self._cond.notify()
+        return future
+
+    def _next_task(self):
+        now = time.monotonic()
+
+        # Starvation guard: oldest head-of-line task that has waited too long
+        oldest = None
+        for rank, queues in enumerate(self._queues):
+            for channel_id, tasks in queues.items():
+                if tasks and now - tasks[0].enqueued_at > AGING_SECONDS:
+                    if oldest is None or tasks[0].enqueued_at < oldest[2].enqueued_at:
+                        oldest = (rank, channel_id, tasks[0])
+        if oldest:
+            return self._pop(oldest[0], oldest[1])
+
+        for rank, queues in enumerate(self._queues):
+            if not queues:
+                continue
+            passes = self._pass[rank]
+            channel_id = min(queues, key=lambda c: passes.get(c, 0.0))
+            return self._pop(rank, channel_id)
+        return None
+
+    def _pop(self, rank: int, channel_id: str):
+        queues = self._queues[rank]
+        task = queues[channel_id].popleft()
+        self._pass[rank][channel_id] = self._pass[rank].get(channel_id, 0.0) + 1.0
+        if not queues[channel_id]:
+            del queues[channel_id]
+            del self._pass[rank][channel_id]
+        return task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None:
+                    self._cond.wait()
+                    task = self._next_task()
+                self._running += 1
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.fn(*task.args, **task.kwargs))
+                    except BaseException as e:
+                        task.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+
+    def stats(self):
+        """Queue depth per class and busy workers."""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": {
+                    PRIORITY_CLASSES[rank]: sum(len(t) for t in queues.values())
+                    for rank, queues in enumerate(self._queues)
+                },
+            }
+
+
+class PrioritySemaphore:
+    """
+    Counting semaphore that hands freed slots to the most urgent waiting class
+    first. Used for the shared YouTube concurrency budget.
+    """
+
+    def __init__(self, value: int):
+        self._cond = threading.Condition()
+        self._value = value
+        self._waiting = [0] * len(PRIORITY_CLASSES)
+
+    def acquire(self, priority: str = "backfill"):
+        rank = _rank(priority)
+        with self._cond:
+            self._waiting[rank] += 1
+            try:
+                # Wait while out of slots or while someone more urgent is waiting
+                while self._value <= 0 or any(self._waiting[r] for r in range(rank)):
+                    self._cond.wait()
+                self._value -= 1
+            finally:
+                self._waiting[rank] -= 1
+                if self._value > 0:
+                    # Less urgent waiters that deferred to this one may now take a free slot
+                    self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._value += 1
+            self._cond.notify_all()
+
+    def slot(self, priority: str = "backfill"):
+        return _SemaphoreSlot(self, priority)
+
+    def stats(self):
+        """Free slots and waiters per class."""
+        with self._cond:
+            return {
+                "available": self._value,
+                "waiting": {cls: self._waiting[rank] for rank, cls in enumerate(PRIORITY_CLASSES)},
+            }
+
+
+class _SemaphoreSlot:
+    def __init__(self, semaphore: PrioritySemaphore, priority: str):
+        self.semaphore = semaphore
+        self.priority = priority
+
+    def __enter__(self):
+        self.semaphore.acquire(self.priority)
+
+    def __exit__(self, *exc):
+        self.semaphore.release()
+
+
+# Process-wide scheduler shared by the SSE endpoint and channel/backfill analyses
+batch_scheduler = BatchScheduler()
+
+# Bounded pool for blocking calls made by async routes. Kept apart from the
+# event loop's default threadpool so slow Gemini/YouTube calls queue here
+# instead of starving light requests.
+_blocking_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=BLOCKING_WORKERS, thread_name_prefix="api-blocking"
+)
+
+
+def _run_counted(fn, *args, **kwargs):
+    EXECUTOR_BUSY.inc(executor="api_blocking")
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        EXECUTOR_BUSY.dec(executor="api_blocking")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Await a blocking callable on the bounded API executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(_run_counted, propagate(fn), *args, **kwargs))
+
+
+def _queue_metrics():
+    depths = {("batch_scheduler", cls): count for cls, count in batch_scheduler.stats()["queued"].items()}
+    depths[("api_blocking", "all")] = _blocking_executor._work_queue.qsize()
+    return depths
+
+
+EXECUTOR_BUSY.add_function(lambda: {("batch_scheduler",): batch_scheduler.stats()["running"]})
+EXECUTOR_WORKERS.add_function(lambda: {("batch_scheduler",): batch_scheduler.workers, ("api_blocking",): BLOCKING_WORKERS})
+QUEUE_DEPTH.add_function(_queue_metrics)
@@ -4,6 +4,9 @@ from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from transformers import pipeline
 import torch
 
+from backend.services.metrics import FALLBACKS, STAGE_SECONDS
+from backend.services import tracing
+
 class LocalSentimentService:
     def __init__(self):
         print("--- INITIALIZING SENTIMENT SERVICE ---")
@@ -144,14 +147,7 @@ class LocalSentimentService:
 
         if not self.gemini_client:
             # Fallback to VADER for all if Gemini is down
-            for c in comments_list:
-                ana = self.analyze_comment(c["text"])
-                result_batch["results"].append({
-                    "comment_id": c["id"],
-                    "sentiment": ana["final_sentiment"],
-                    "score": ana["final_score"],
-                    "emoji": ana["emoji_detected"]
-                })
+            result_batch["results"] = self._vader_batch(comments_list, "gemini_unavailable")
             return result_batch
 
         # Construct Batched Prompt
@@ -179,10 +175,11 @@ class LocalSentimentService:
         batch_prompt += json.dumps(comments_payload)
 
         try:
-            response = self.gemini_client.models.generate_content(
-                model=self.model_name,
-                contents=batch_prompt
-            )
+            with STAGE_SECONDS.time(stage="gemini_batch"), tracing.span("gemini.generate_content", batch_id=batch_id):
+                response = self.gemini_client.models.generate_content(
+                    model=self.model_name,
+                    contents=batch_prompt
+                )
             try:
                 # Use regex to find the JSON block in case of conversational fluff
                 json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
@@ -203,38 +200,33 @@ class LocalSentimentService:
                             })
                         else:
                             # Fallback for missing items in batch response
-                            ana = self.analyze_comment(c["text"])
-                            result_batch["results"].append({
-                                "comment_id": c["id"],
-                                "sentiment": ana["final_sentiment"],
-                                "score": ana["final_score"],
-                                "emoji": ana["emoji_detected"]
-                            })
+                            result_batch["results"].extend(self._vader_batch([c], "missing_result"))
                 else:
                     raise ValueError("No JSON found in response")
             except Exception as e:
                 print(f"Batch Parsing Error: {e}")
                 # Fallback to individual analysis if batch response is malformed
-                for c in comments_list:
-                    ana = self.analyze_comment(c["text"])
-                    result_batch["results"].append({
-                        "comment_id": c["id"],
-                        "sentiment": ana["final_sentiment"],
-                        "score": ana["final_score"],
-                        "emoji": ana["emoji_detected"]
-                    })
+                result_batch["results"] = self._vader_batch(comments_list, "parse_error")
         except Exception as e:
             print(f"Batch Gemini Error: {e}")
+            result_batch["results"] = self._vader_batch(comments_list, "gemini_error")
+
+        return result_batch
+
+    def _vader_batch(self, comments_list: list, reason: str):
+        """Per-comment analysis for comments the Gemini batch couldn't score, counted by `reason`."""
+        FALLBACKS.inc(len(comments_list), reason=reason)
+        results = []
+        with STAGE_SECONDS.time(stage="vader_batch"), tracing.span("vader_fallback", reason=reason, comments=len(comments_list)):
             for c in comments_list:
                 ana = self.analyze_comment(c["text"])
-                result_batch["results"].append({
+                results.append({
                     "comment_id": c["id"],
                     "sentiment": ana["final_sentiment"],
                     "score": ana["final_score"],
                     "emoji": ana["emoji_detected"]
                 })
-
-        return result_batch
+        return results
 
 
     def generate_top_50_insights(self, comments_list: list):
@@ -295,10 +287,11 @@ class LocalSentimentService:
              return {"error": "Gemini API key not configured."}
         
         try:
-            response = self.gemini_client.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
+            with STAGE_SECONDS.time(stage="top50_insights"):
+                response = self.gemini_client.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt
+                )
             json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
             if json_match:
                 return json.loads(json_match.group())
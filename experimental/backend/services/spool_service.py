@@ -0,0 +1,184 @@
+import gzip
+import io
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # Optional: fall back to gzip frames
+    zstandard = None
+
+SPOOL_FORMAT_VERSION = 1
+
+
+class CommentSpool:
+    """
+    Append-only spool of raw YouTube API pages, one compressed JSONL file per video.
+
+    Every page returned by the API is written as its own compressed frame
+    (zstd if `zstandard` is installed, gzip otherwise). Both formats decode
+    concatenated frames as one stream, so appending never rewrites old data.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.extension = ".jsonl.zst" if zstandard else ".jsonl.gz"
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Spool into COMMENT_SPOOL_DIR (default ./spool). Set it to an empty string to disable."""
+        root = os.getenv("COMMENT_SPOOL_DIR", "./spool")
+        if not root:
+            return None
+        return cls(root)
+
+    def _lock_for(self, video_id: str):
+        with self._locks_guard:
+            if video_id not in self._locks:
+                self._locks[video_id] = threading.Lock()
+            return self._locks[video_id]
+
+    def _paths_for(self, video_id: str):
+        # A spool written with zstd stays readable after switching to gzip (and vice versa)
+        return [self.root / f"{video_id}{ext}" for ext in (".jsonl.zst", ".jsonl.gz") if (self.root / f"{video_id}{ext}").exists()]
+
+    def _compress(self, payload: bytes) -> bytes:
+        if zstandard:
+            return zstandard.ZstdCompressor(level=3).compress(payload)
+        return gzip.compress(payload)
+
+    def new_fetch_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def append_page(self, video_id: str, fetch_id: str, page: int, kind: str, params: dict, response: dict):
+        """Append one raw API response page for a video."""
+        record = {
+            "v": SPOOL_FORMAT_VERSION,
+            "kind": kind,  # "commentThreads" or "comments" (reply pages)
+            "video_id": video_id,
+            "fetch_id": fetch_id,
+            "page": page,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "params": params,
+            "response": response,
+        }
+        frame = self._compress((json.dumps(record) + "\n").encode("utf-8"))
+        path = self.root / f"{video_id}{self.extension}"
+        with self._lock_for(video_id):
+            # Single write on an O_APPEND handle: frames from concurrent writers never interleave
+            with open(path, "ab") as f:
+                f.write(frame)
+
+    def iter_records(self, video_id: str):
+        """Yield every spooled record for a video in the order it was written."""
+        for path in self._paths_for(video_id):
+            with open(path, "rb") as raw:
+                if path.name.endswith(".zst"):
+                    if not zstandard:
+                        print(f"Skipping {path}: zstandard is not installed.")
+                        continue
+                    stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+                else:
+                    stream = gzip.GzipFile(fileobj=raw)
+                try:
+                    for line in io.TextIOWrapper(stream, encoding="utf-8"):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            print(f"Skipping corrupt spool record in {path}")
+                except Exception as e:
+                    # A torn final frame (crash mid-write) only loses that page
+                    print(f"Spool read stopped early for {path}: {e}")
+
+    def has_video(self, video_id: str) -> bool:
+        return bool(self._paths_for(video_id))
+
+    def video_ids(self):
+        ids = set()
+        for path in self.root.iterdir():
+            for ext in (".jsonl.zst", ".jsonl.gz"):
+                if path.name.endswith(ext):
+                    ids.add(path.name[:-len(ext)])
+        return sorted(ids)
+
+
+class SpoolMiss(LookupError):
+    """The spool holds no fetch that answers a request the way the live API would."""
+
+
+class SpoolReplaySource:
+    """
+    Drop-in replacement for YouTubeService.get_video_comments that reads from the spool.
+
+    Replays the newest spooled fetch of the video made with the same `order`, following
+    its pages by pageToken exactly as the live fetch paged them, and the reply pages
+    fetched with it. A request that no spooled fetch covers (a different order, or more
+    threads than were spooled) raises SpoolMiss rather than returning different data.
+    Only this call is replayed; refreshes (get_comments_since) always go to the API.
+    Costs zero API quota.
+    """
+
+    def __init__(self, spool: CommentSpool = None):
+        self.spool = spool or CommentSpool.from_env()
+
+    def _fetches(self, video_id: str, order: str):
+        """{fetch_id: {pageToken: response}} for commentThreads pages, and reply pages by fetch and parent."""
+        fetches = {}
+        replies = {}  # fetch_id -> parent_id -> [reply pages]
+        for record in self.spool.iter_records(video_id):
+            params = record.get("params") or {}
+            if record.get("kind") == "commentThreads" and params.get("order") == order:
+                fetches.setdefault(record["fetch_id"], {})[params.get("pageToken")] = record["response"]
+            elif record.get("kind") == "comments":
+                replies.setdefault(record["fetch_id"], {}).setdefault(params.get("parentId"), []).append(record["response"])
+        return fetches, replies
+
+    def _walk(self, pages: dict, max_results: int = None):
+        """The fetch's threads in page order, or None if it stops short of `max_results`."""
+        items = []
+        token = None
+        while token in pages:
+            response = pages[token]
+            items.extend(response.get("items", []))
+            if max_results and len(items) >= max_results:
+                return items[:max_results]
+            token = response.get("nextPageToken")
+            if not token:
+                return items # The live fetch ran out of threads here too
+        return None # A page the live fetch would read next was never spooled
+
+    def get_video_comments(self, video_id: str, max_results: int = None, order: str = "relevance", include_replies: bool = False):
+        if not self.spool.has_video(video_id):
+            raise SpoolMiss(f"No spooled pages for video {video_id}.")
+
+        fetches, replies = self._fetches(video_id, order)
+        # Newest fetch first (dicts keep the order fetches were first written in)
+        for fetch_id in reversed(list(fetches)):
+            items = self._walk(fetches[fetch_id], max_results)
+            if items is not None:
+                break
+        else:
+            raise SpoolMiss(
+                f"No spooled fetch of video {video_id} in '{order}' order covers {max_results or 'all'} threads."
+            )
+
+        for thread in items:
+            if not include_replies:
+                thread.pop("replies", None)
+                continue
+            merged = {r["id"]: r for r in thread.get("replies", {}).get("comments", [])}
+            for page in replies.get(fetch_id, {}).get(thread["id"], []):
+                merged.update((r["id"], r) for r in page.get("items", []))
+            if merged:
+                thread["replies"] = {"comments": list(merged.values())}
+        return items
@@ -0,0 +1,240 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, attributes
+
+from backend.models.models import Comment, SentimentBucket, SentimentType, Video
+from backend.services.response_cache import channel_scope, video_scope
+
+# Sentiment time series per video and channel, bucketed by comment publish time.
+#
+# Every flush that inserts, re-scores or deletes comments folds the change into
+# hour, day and week buckets of the video's and its channel's scope, in the same
+# transaction (attribute history gives the old contribution of a re-scored comment,
+# so a batch scoring pre-inserted comments moves counts from neutral to its label).
+# Bulk Query.update()/delete() on comments skip this; run rebuild() after them.
+#
+# Reads pick the finest resolution whose bucket count over the requested span fits
+# MAX_BUCKET_ROWS, then fold buckets into at most `points` windows, so a chart
+# reads a bounded number of rows however many comments there are.
+
+RESOLUTIONS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+MAX_BUCKET_ROWS = 500
+DEFAULT_POINTS = 200
+MAX_POINTS = 1000
+LABELS = ("positive", "neutral", "negative")
+SUMS = LABELS + ("score_sum", "weighted_sum", "weight_sum") # Additive columns of a bucket
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_start(value: datetime, resolution: str) -> datetime:
+    value = _naive_utc(value)
+    if resolution == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "week":
+        return day - timedelta(days=day.weekday()) # Weeks start on Monday
+    return day
+
+
+# --- Maintenance on write ---
+
+def _contribution(published_at, sentiment, score, likes):
+    """(published_at, label, score, weight) a comment adds to its buckets, or None if it has no timestamp."""
+    if published_at is None:
+        return None
+    label = sentiment.value if isinstance(sentiment, SentimentType) else (sentiment or "neutral")
+    score = score or 0.0
+    return (published_at, label, score, 1.0 + (likes or 0))
+
+
+def _old_value(obj, name: str):
+    history = attributes.get_history(obj, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, name)
+
+
+def _add(deltas: dict, video_id: str, contribution, sign: int):
+    if contribution is None or video_id is None:
+        return
+    published_at, label, score, weight = contribution
+    for resolution in RESOLUTIONS:
+        row = deltas.setdefault((video_id, resolution, bucket_start(published_at, resolution)), dict.fromkeys(SUMS, 0))
+        row[label if label in LABELS else "neutral"] += sign
+        row["score_sum"] += sign * score
+        row["weighted_sum"] += sign * score * weight
+        row["weight_sum"] += sign * weight
+
+
+def apply_deltas(connection, deltas: dict):
+    """Upserts {(video_id, resolution, bucket_start): sums} into the video and owning channel scopes."""
+    if not deltas:
+        return
+    video_ids = {video_id for video_id, _, _ in deltas}
+    owners = dict(connection.execute(select(Video.id, Video.channel_id).where(Video.id.in_(video_ids))).all())
+    rows = {}
+    for (video_id, resolution, start), sums in deltas.items():
+        scopes = [video_scope(video_id)]
+        if owners.get(video_id):
+            scopes.append(channel_scope(owners[video_id]))
+        for scope in scopes:
+            row = rows.setdefault((scope, resolution, start), dict.fromkeys(sums, 0))
+            for key, value in sums.items():
+                row[key] += value
+    values = [
+        {"scope": scope, "resolution": resolution, "bucket_start": start, **sums}
+        for (scope, resolution, start), sums in sorted(rows.items())
+        if any(sums.values())
+    ]
+    if not values:
+        return
+    stmt = insert(SentimentBucket).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope", "resolution", "bucket_start"],
+        set_={name: getattr(SentimentBucket, name) + getattr(stmt.excluded, name) for name in SUMS},
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(Session, "after_flush")
+def _bucket_on_flush(session, flush_context):
+    # new/dirty/deleted and attribute history still describe the flushed changes here
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, Comment):
+            _add(deltas, obj.video_id, _contribution(obj.published_at, obj.sentiment, obj.vader_score, obj.like_count), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Comment):
+            old = _contribution(*(_old_value(obj, n) for n in ("published_at", "sentiment", "vader_score", "like_count")))
+            _add(deltas, _old_value(obj, "video_id"), old, -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Comment) or not session.is_modified(obj):
+            continue
+        old = _contribution(*(_old_value(obj, n) for n in ("published_at", "sentiment", "vader_score", "like_count")))
+        new = _contribution(obj.published_at, obj.sentiment, obj.vader_score, obj.like_count)
+        old_video = _old_value(obj, "video_id")
+        if old == new and old_video == obj.video_id:
+            continue
+        _add(deltas, old_video, old, -1)
+        _add(deltas, obj.video_id, new, 1)
+    apply_deltas(session.connection(), deltas)
+
+
+def rebuild(db, video_ids: list = None):
+    """Recomputes the buckets of `video_ids` (default: every video) from their comments; caller commits."""
+    query = db.query(Video.id)
+    if video_ids is not None:
+        query = query.filter(Video.id.in_(video_ids))
+    for (video_id,) in query.all():
+        # Channel buckets are sums over videos: subtract this video's current share, then add it back
+        deltas = {}
+        for row in db.query(SentimentBucket).filter(SentimentBucket.scope == video_scope(video_id)):
+            deltas[(video_id, row.resolution, row.bucket_start)] = {name: -(getattr(row, name) or 0) for name in SUMS}
+        comments = db.query(Comment.published_at, Comment.sentiment, Comment.vader_score, Comment.like_count).filter(
+            Comment.video_id == video_id
+        )
+        for comment in comments:
+            _add(deltas, video_id, _contribution(*comment), 1)
+        apply_deltas(db.connection(), deltas)
+    db.query(SentimentBucket).filter(SentimentBucket.positive + SentimentBucket.neutral + SentimentBucket.negative == 0).delete(
+        synchronize_session=False
+    )
+
+
+# --- Reads ---
+
+def _choose_resolution(span_seconds: float, requested: str = None) -> str:
+    if requested:
+        if span_seconds / RESOLUTIONS[requested] > MAX_BUCKET_ROWS:
+            raise ValueError(
+                f"At most {MAX_BUCKET_ROWS} {requested} buckets per query; narrow start/end or use a coarser resolution"
+            )
+        return requested
+    for resolution, seconds in RESOLUTIONS.items():
+        if span_seconds / seconds <= MAX_BUCKET_ROWS:
+            return resolution
+    return "week"
+
+
+async def load_timeseries(db, scope: str, start: datetime = None, end: datetime = None,
+                          resolution: str = None, points: int = DEFAULT_POINTS):
+    """
+    Time series for `scope` between `start` and `end` (default: its first and last
+    buckets), at `resolution` or the finest one that fits, in at most `points` windows.
+    Returns None when the scope has no buckets; ValueError if `resolution` is too fine for the span.
+    """
+    first, last = (await db.execute(
+        select(func.min(SentimentBucket.bucket_start), func.max(SentimentBucket.bucket_start))
+        .where(SentimentBucket.scope == scope, SentimentBucket.resolution == "week")
+    )).one()
+    if first is None:
+        return None
+    start = _naive_utc(start) if start else first
+    end = _naive_utc(end) if end else last + timedelta(days=7)
+    resolution = _choose_resolution((end - start).total_seconds(), resolution)
+    bucket_seconds = RESOLUTIONS[resolution]
+    start = bucket_start(start, resolution)
+
+    rows = (await db.execute(
+        select(SentimentBucket)
+        .where(
+            SentimentBucket.scope == scope, SentimentBucket.resolution == resolution,
+            SentimentBucket.bucket_start >= start, SentimentBucket.bucket_start < end,
+        )
+        .order_by(SentimentBucket.bucket_start)
+    )).scalars().all()
+
+    # Downsample: fold buckets into fixed windows of a whole number of buckets
+    buckets_in_span = max(1, math.ceil((end - start).total_seconds() / bucket_seconds))
+    window_seconds = bucket_seconds * max(1, math.ceil(buckets_in_span / points))
+    windows = {}
+    for row in rows:
+        index = int((row.bucket_start - start).total_seconds() // window_seconds)
+        window = windows.setdefault(index, dict.fromkeys(SUMS, 0))
+        for name in window:
+            window[name] += getattr(row, name) or 0
+
+    series = []
+    for index in sorted(windows):
+        w = windows[index]
+        total = w["positive"] + w["neutral"] + w["negative"]
+        if total <= 0:
+            continue
+        series.append({
+            "start": start + timedelta(seconds=index * window_seconds),
+            "comments": total,
+            "positive": w["positive"],
+            "neutral": w["neutral"],
+            "negative": w["negative"],
+            "avg_score": w["score_sum"] / total,
+            "weighted_score": w["weighted_sum"] / w["weight_sum"] if w["weight_sum"] else 0.0,
+        })
+    return {
+        "scope": scope,
+        "resolution": resolution,
+        "window_seconds": window_seconds,
+        "start": start,
+        "end": end,
+        "points": series,
+    }
+
+
+if __name__ == "__main__":
+    # Backfill buckets for comments written before this table existed
+    from backend.database import Base, SessionLocal, engine
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        db.commit()
+        print("Sentiment buckets rebuilt.")
+    finally:
+        db.close()
@@ -0,0 +1,213 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, attributes
+
+from backend.models.models import Comment, TopicSketch, Video
+from backend.services.aggregates import DEFAULT_TOPK_CAPACITY, TopK
+from backend.services.response_cache import channel_scope, video_scope
+from backend.services.timeseries import MAX_BUCKET_ROWS, _naive_utc, bucket_start
+
+# Top comment topics per video and channel, in constant memory.
+#
+# Each scope keeps a Misra-Gries TopK sketch (aggregates.TopK) of the topics of all
+# its comments, plus one per week of comment publish time. Every flush that inserts,
+# re-tags or deletes comments folds the change into the affected sketches in the
+# same transaction (SQLite's single writer makes the read-modify-write safe), so
+# reads never touch comments: a range query merges at most MAX_BUCKET_ROWS weekly
+# sketches of TOPIC_SKETCH_CAPACITY counters each.
+#
+# A count is a lower bound, short by at most the sketch's error_bound(); any topic
+# with more mentions than that is guaranteed to be listed. Deletions keep counts
+# lower bounds but can leave the bound looser than necessary, and bulk
+# Query.update()/delete() on comments skip the hook; rebuild() recomputes exactly.
+
+TOPIC_SKETCH_CAPACITY = int(os.getenv("TOPIC_SKETCH_CAPACITY", str(DEFAULT_TOPK_CAPACITY)))
+ALL_TIME = datetime(1970, 1, 1) # window_start of the "all" sketch
+DEFAULT_TOP_N = 5
+
+
+def parse_topics(value) -> list:
+    """Topics of a comment from its JSON column; malformed or missing values count as none."""
+    if not value:
+        return []
+    try:
+        topics = json.loads(value) if isinstance(value, str) else value
+    except ValueError:
+        return []
+    if not isinstance(topics, list):
+        return []
+    return [t.strip() for t in topics if isinstance(t, str) and t.strip()]
+
+
+def _windows(published_at):
+    yield ("all", ALL_TIME)
+    if published_at is not None:
+        yield ("week", bucket_start(published_at, "week"))
+
+
+# --- Maintenance on write ---
+
+def _add(changes: dict, video_id: str, published_at, topics: list, sign: int):
+    if not topics or video_id is None:
+        return
+    for window, start in _windows(published_at):
+        added, removed = changes.setdefault((video_id, window, start), ([], []))
+        (added if sign > 0 else removed).extend(topics)
+
+
+def _old_value(obj, name: str):
+    history = attributes.get_history(obj, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, name)
+
+
+def apply_changes(connection, changes: dict):
+    """Folds {(video_id, window, window_start): (added, removed)} into the video and owning channel sketches."""
+    if not changes:
+        return
+    video_ids = {video_id for video_id, _, _ in changes}
+    owners = dict(connection.execute(select(Video.id, Video.channel_id).where(Video.id.in_(video_ids))).all())
+    by_key = {}
+    for (video_id, window, start), (added, removed) in changes.items():
+        scopes = [video_scope(video_id)]
+        if owners.get(video_id):
+            scopes.append(channel_scope(owners[video_id]))
+        for scope in scopes:
+            entry = by_key.setdefault((scope, window, start), ([], []))
+            entry[0].extend(added)
+            entry[1].extend(removed)
+
+    keys = sorted(by_key)
+    sketches = {
+        (row.scope, row.window, row.window_start): TopK.from_dict(json.loads(row.sketch))
+        for row in connection.execute(
+            select(TopicSketch).where(tuple_(TopicSketch.scope, TopicSketch.window, TopicSketch.window_start).in_(keys))
+        )
+    }
+    values = []
+    for key in keys:
+        added, removed = by_key[key]
+        sketch = sketches.get(key) or TopK(TOPIC_SKETCH_CAPACITY)
+        sketch.remove(removed)
+        sketch.update(added)
+        scope, window, start = key
+        values.append({"scope": scope, "window": window, "window_start": start, "sketch": json.dumps(sketch.to_dict())})
+    stmt = insert(TopicSketch).values(values)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=["scope", "window", "window_start"], set_={"sketch": stmt.excluded.sketch},
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _sketch_on_flush(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        if isinstance(obj, Comment):
+            _add(changes, obj.video_id, obj.published_at, parse_topics(obj.topics), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Comment):
+            topics = parse_topics(_old_value(obj, "topics"))
+            _add(changes, _old_value(obj, "video_id"), _old_value(obj, "published_at"), topics, -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Comment) or not session.is_modified(obj):
+            continue
+        old = (_old_value(obj, "video_id"), _old_value(obj, "published_at"), parse_topics(_old_value(obj, "topics")))
+        new = (obj.video_id, obj.published_at, parse_topics(obj.topics))
+        if old == new:
+            continue
+        _add(changes, *old, -1)
+        _add(changes, *new, 1)
+    apply_changes(session.connection(), changes)
+
+
+def rebuild(db, channel_ids: list = None):
+    """Recomputes the sketches of `channel_ids` (default: every channel) and their videos from comments; caller commits."""
+    query = db.query(Video.channel_id).filter(Video.channel_id.isnot(None)).distinct()
+    if channel_ids is not None:
+        query = query.filter(Video.channel_id.in_(channel_ids))
+    for (channel_id,) in query.all():
+        video_ids = [video_id for (video_id,) in db.query(Video.id).filter(Video.channel_id == channel_id)]
+        scopes = [channel_scope(channel_id)] + [video_scope(video_id) for video_id in video_ids]
+        db.query(TopicSketch).filter(TopicSketch.scope.in_(scopes)).delete(synchronize_session=False)
+        changes = {}
+        comments = (
+            db.query(Comment.video_id, Comment.published_at, Comment.topics)
+            .filter(Comment.video_id.in_(video_ids))
+            .yield_per(1000)
+        )
+        for video_id, published_at, topics in comments:
+            _add(changes, video_id, published_at, parse_topics(topics), 1)
+        apply_changes(db.connection(), changes)
+
+
+# --- Reads ---
+
+def _merge(rows) -> TopK:
+    merged = TopK(TOPIC_SKETCH_CAPACITY)
+    for row in rows:
+        merged.merge(TopK.from_dict(json.loads(row.sketch)))
+    return merged
+
+
+def top_topics(db, scope: str, n: int = DEFAULT_TOP_N) -> list:
+    """The `n` most mentioned topics across all of `scope`'s comments (sync sessions)."""
+    rows = db.query(TopicSketch).filter(
+        TopicSketch.scope == scope, TopicSketch.window == "all", TopicSketch.window_start == ALL_TIME
+    ).all()
+    return [topic for topic, _ in _merge(rows).most_common(n)]
+
+
+async def load_topics(db, scope: str, start: datetime = None, end: datetime = None, n: int = DEFAULT_TOP_N):
+    """
+    Top `n` topics of `scope` with their lower-bound counts, over all comments or, with
+    `start`/`end` (an open end defaults to the first/last week with topics), over the
+    weeks of comment publish time the range touches.
+    ValueError if the range spans more than MAX_BUCKET_ROWS weeks.
+    """
+    if start is None and end is None:
+        rows = (await db.execute(select(TopicSketch).where(
+            TopicSketch.scope == scope, TopicSketch.window == "all", TopicSketch.window_start == ALL_TIME
+        ))).scalars().all()
+    else:
+        first, last = (await db.execute(
+            select(func.min(TopicSketch.window_start), func.max(TopicSketch.window_start))
+            .where(TopicSketch.scope == scope, TopicSketch.window == "week")
+        )).one()
+        start = bucket_start(start, "week") if start else first
+        end = _naive_utc(end) if end else (last + timedelta(weeks=1) if last else None)
+        rows = []
+        if start is not None and end is not None:
+            if (end - start) / timedelta(weeks=1) > MAX_BUCKET_ROWS:
+                raise ValueError(f"At most {MAX_BUCKET_ROWS} weeks of topics per query; narrow start/end")
+            rows = (await db.execute(select(TopicSketch).where(
+                TopicSketch.scope == scope, TopicSketch.window == "week",
+                TopicSketch.window_start >= start, TopicSketch.window_start < end,
+            ))).scalars().all()
+
+    merged = _merge(rows)
+    return {
+        "scope": scope,
+        "start": start,
+        "end": end,
+        "mentions": merged.total,
+        "max_error": merged.error_bound(),
+        "topics": [{"topic": topic, "count": count} for topic, count in merged.most_common(n)],
+    }
+
+
+if __name__ == "__main__":
+    # Backfill sketches for comments written before this table existed
+    from backend.database import Base, SessionLocal, engine
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        db.commit()
+        print("Topic sketches rebuilt.")
+    finally:
+        db.close()
@@ -0,0 +1,202 @@
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+# Lightweight tracing: spans around fetch / analyze / persist stages, with the
+# current span kept in a ContextVar so it follows work onto the batch scheduler,
+# run_blocking and fetch pools (they copy the caller's context, see
+# profiling.propagate). Finished spans go to the configured exporters:
+#
+#   TRACE_EXPORTERS=memory       last TRACE_BUFFER_SPANS spans, served by /api/admin/traces
+#   TRACE_EXPORTERS=file         TRACE_DIR/trace-<pid>.json, appended as spans finish
+#   TRACE_EXPORTERS=memory,file  both
+#
+# Both produce Chrome trace-event JSON, which loads in https://ui.perfetto.dev or
+# chrome://tracing: one row per thread, spans nested by time, attributes under "args".
+# With no exporter configured (the default) span() is a no-op.
+
+TRACE_EXPORTERS = [e.strip() for e in os.getenv("TRACE_EXPORTERS", "").split(",") if e.strip()]
+TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(tempfile.gettempdir(), "pulsegrow-traces"))
+TRACE_BUFFER_SPANS = int(os.getenv("TRACE_BUFFER_SPANS", "20000"))
+
+_current_span = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start", "end_time", "thread_id", "thread_name")
+
+    def __init__(self, name: str, parent: "Span" = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self.end_time = None
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_time is None:
+            self.end_time = time.time()
+            for exporter in _exporters:
+                exporter.export(self)
+
+    def to_event(self):
+        """Chrome trace 'complete' event."""
+        args = {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for k, v in self.attributes.items()}
+        args.update(trace_id=self.trace_id, span_id=self.span_id, parent_id=self.parent_id)
+        return {
+            "name": self.name,
+            "cat": "pulsegrow",
+            "ph": "X",
+            "ts": int(self.start * 1_000_000),
+            "dur": int(((self.end_time or time.time()) - self.start) * 1_000_000),
+            "pid": os.getpid(),
+            "tid": self.thread_id,
+            "args": args,
+        }
+
+
+def _thread_name_event(pid: int, tid: int, name: str):
+    return {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+
+
+class InMemoryExporter:
+    """Ring buffer of finished spans."""
+
+    def __init__(self, capacity: int = TRACE_BUFFER_SPANS):
+        self.spans = collections.deque(maxlen=capacity)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def chrome_trace(self, trace_id: str = None):
+        spans = [s for s in list(self.spans) if trace_id is None or s.trace_id == trace_id]
+        threads = {(os.getpid(), s.thread_id): s.thread_name for s in spans}
+        events = [_thread_name_event(pid, tid, name) for (pid, tid), name in threads.items()]
+        return {"traceEvents": events + [s.to_event() for s in spans], "displayTimeUnit": "ms"}
+
+    def traces(self, limit: int = 50):
+        """Most recent root spans: one entry per trace."""
+        roots = [s for s in list(self.spans) if s.parent_id is None]
+        return [
+            {
+                "trace_id": s.trace_id,
+                "name": s.name,
+                "start": s.start,
+                "duration_ms": (s.end_time - s.start) * 1000,
+                "attributes": s.attributes,
+            }
+            for s in reversed(roots[-limit:])
+        ]
+
+
+class FileExporter:
+    """
+    Appends events to TRACE_DIR/trace-<pid>.json in Chrome's JSON Array Format, whose
+    closing bracket is optional, so the file stays loadable while the process runs
+    and after a crash.
+    """
+
+    def __init__(self, directory: str = TRACE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+        self._threads = set()
+
+    def _open(self):
+        pid = os.getpid()
+        if self._file is None or self._pid != pid: # Re-open after fork/spawn
+            os.makedirs(self.directory, exist_ok=True)
+            self.path = os.path.join(self.directory, f"trace-{pid}.json")
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._file.tell() == 0:
+                self._file.write("[\n")
+            self._pid = pid
+            self._threads = set()
+        return self._file
+
+    def export(self, span: Span):
+        with self._lock:
+            f = self._open()
+            if span.thread_id not in self._threads:
+                self._threads.add(span.thread_id)
+                f.write(json.dumps(_thread_name_event(self._pid, span.thread_id, span.thread_name)) + ",\n")
+            f.write(json.dumps(span.to_event()) + ",\n")
+            f.flush()
+
+
+_exporters = []
+memory_exporter = None
+if "memory" in TRACE_EXPORTERS:
+    memory_exporter = InMemoryExporter()
+    _exporters.append(memory_exporter)
+if "file" in TRACE_EXPORTERS:
+    _exporters.append(FileExporter())
+
+
+def enabled() -> bool:
+    return bool(_exporters)
+
+
+def add_exporter(exporter):
+    """Registers an exporter at runtime (e.g. an InMemoryExporter in a benchmark)."""
+    _exporters.append(exporter)
+    return exporter
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextlib.contextmanager
+def span(name: str, parent: Span = None, **attributes):
+    """Runs the block as a child span of `parent` or the current span (a new trace if neither)."""
+    if not _exporters:
+        yield None
+        return
+    s = Span(name, parent or _current_span.get(), attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set_attribute("error", repr(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end()
+
+
+def start_span(name: str, **attributes):
+    """
+    A span the caller ends explicitly, for work that can't sit in one `with` block
+    (e.g. a generator that yields mid-way). Make it current with use_span().
+    """
+    if not _exporters:
+        return None
+    return Span(name, _current_span.get(), attributes)
+
+
+@contextlib.contextmanager
+def use_span(s: Span):
+    """Makes `s` the current span for the block without ending it."""
+    if s is None:
+        yield None
+        return
+    token = _current_span.set(s)
+    try:
+        yield s
+    finally:
+        _current_span.reset(token)
@@ -1,9 +1,19 @@
 from googleapiclient.discovery import build
 import os
+import threading
+import time
+import concurrent.futures
 from dotenv import load_dotenv
 
 from pathlib import Path
 
+from backend.services.spool_service import CommentSpool
+from backend.services.quota_service import quota_service, QuotaExceeded, PRIORITIES
+from backend.services.scheduler import PrioritySemaphore
+from backend.services.metrics import EXECUTOR_BUSY, EXECUTOR_WORKERS, QUEUE_DEPTH, STAGE_SECONDS
+from backend.services.profiling import propagate
+from backend.services import tracing
+
 # Explicitly load from backend/.env or parent .env
 env_path = Path(__file__).resolve().parent.parent.parent / '.env'
 if not env_path.exists():
@@ -13,14 +23,125 @@ load_dotenv(dotenv_path=env_path)
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
+# Shared across every YouTubeService instance in the process: caps concurrent API calls
+# no matter how many videos/channels are being ingested in parallel. Freed slots go
+# to interactive callers before bulk ingestion. The budget is per process; a worker
+# pool splits it between its processes (see worker._split_budget).
+YOUTUBE_MAX_CONCURRENCY = int(os.getenv("YOUTUBE_MAX_CONCURRENCY", "8"))
+_api_slots = PrioritySemaphore(YOUTUBE_MAX_CONCURRENCY)
+
+# Reply pages are fetched here while the caller keeps paging top-level threads
+_reply_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=YOUTUBE_MAX_CONCURRENCY, thread_name_prefix="yt-replies"
+)
+
+def _api_slot_metrics():
+    stats = _api_slots.stats()
+    return {("youtube_api",): YOUTUBE_MAX_CONCURRENCY - stats["available"]}
+
+EXECUTOR_BUSY.add_function(_api_slot_metrics)
+EXECUTOR_WORKERS.add_function(lambda: {("youtube_api",): YOUTUBE_MAX_CONCURRENCY})
+QUEUE_DEPTH.add_function(lambda: {("youtube_api", cls): n for cls, n in _api_slots.stats()["waiting"].items()})
+
+def set_concurrency(limit: int):
+    """Resizes this process's YouTube concurrency budget; call before any API calls are made."""
+    global YOUTUBE_MAX_CONCURRENCY, _api_slots
+    YOUTUBE_MAX_CONCURRENCY = limit
+    _api_slots = PrioritySemaphore(limit)
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+def flatten_comment_threads(threads: list, include_replies: bool = True):
+    """
+    Flattens commentThreads items (and their replies) into plain comment rows.
+    Replies carry the top-level comment ID in `parent_id`; top-level rows have None.
+    """
+    rows = []
+    for thread in threads:
+        snippet = thread["snippet"]["topLevelComment"]["snippet"]
+        rows.append({
+            "id": thread["id"],
+            "text": snippet["textDisplay"],
+            "author": snippet["authorDisplayName"],
+            "like_count": snippet["likeCount"],
+            "published_at": snippet["publishedAt"],
+            "parent_id": None,
+        })
+        if not include_replies:
+            continue
+        for reply in thread.get("replies", {}).get("comments", []):
+            r_snippet = reply["snippet"]
+            rows.append({
+                "id": reply["id"],
+                "text": r_snippet["textDisplay"],
+                "author": r_snippet["authorDisplayName"],
+                "like_count": r_snippet["likeCount"],
+                "published_at": r_snippet["publishedAt"],
+                "parent_id": thread["id"],
+            })
+    return rows
+
+def parse_channel_input(channel_id: str) -> str:
+    """Channel URL, @handle or ID -> '@handle' or channel ID."""
+    channel_id = channel_id.strip()
+    # Handle URL input
+    if "youtube.com" in channel_id or "youtu.be" in channel_id:
+         # Try to extract handle or ID
+         if "@" in channel_id:
+             channel_id = "@" + channel_id.split("@")[-1].split("/")[0]
+         elif "/channel/" in channel_id:
+             channel_id = channel_id.split("/channel/")[-1].split("/")[0]
+    return channel_id
+
+CHANNELS_PER_REQUEST = 50 # channels().list accepts up to 50 IDs per call
+
 class YouTubeService:
-    def __init__(self):
+    def __init__(self, spool: CommentSpool = None, priority: str = "backfill"):
+        # Raw commentThreads pages are spooled so re-analysis can replay them offline
+        self.spool = spool if spool is not None else CommentSpool.from_env()
+        # Quota class for every call made by this instance (see quota_service.PRIORITIES)
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown quota class '{priority}' (expected one of {', '.join(PRIORITIES)})")
+        self.priority = priority
+        # googleapiclient clients are not thread-safe; reply fetches get their own per thread
+        self._local = threading.local()
         if not YOUTUBE_API_KEY:
             print("Warning: YOUTUBE_API_KEY not found in environment variables.")
             self.youtube = None
         else:
             self.youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
 
+    def _thread_client(self):
+        if not hasattr(self._local, "youtube"):
+            self._local.youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+        return self._local.youtube
+
+    def _execute(self, request):
+        """Every API call goes through here so the shared concurrency and quota budgets apply."""
+        method = getattr(request, "methodId", "").replace("youtube.", "", 1)
+        with tracing.span(f"youtube.{method}", priority=self.priority) as call_span:
+            waiting_since = time.perf_counter()
+            # Wait for quota before taking a concurrency slot, so paced calls don't hold one
+            quota_service.acquire(self.priority, quota_service.cost_of(method))
+            with _api_slots.slot(self.priority):
+                if call_span:
+                    call_span.set_attribute("wait_ms", round((time.perf_counter() - waiting_since) * 1000, 1))
+                try:
+                    with STAGE_SECONDS.time(stage="youtube_page"):
+                        return request.execute()
+                finally:
+                    # Failed calls are still charged by YouTube
+                    quota_service.record(self.priority, method)
+
+    def _spool_page(self, video_id: str, fetch_id: str, page: int, kind: str, params: dict, response: dict):
+        if not self.spool:
+            return
+        try:
+            self.spool.append_page(video_id, fetch_id, page, kind, params, response)
+        except Exception as e:
+            print(f"Spool write failed for video {video_id}: {e}")
+
     def get_channel_details(self, channel_id: str):
         if not self.youtube or channel_id == "demo":
              return {
@@ -35,13 +156,7 @@ class YouTubeService:
                 }
             }
         
-        # Handle URL input
-        if "youtube.com" in channel_id or "youtu.be" in channel_id:
-             # Try to extract handle or ID
-             if "@" in channel_id:
-                 channel_id = "@" + channel_id.split("@")[-1].split("/")[0]
-             elif "/channel/" in channel_id:
-                 channel_id = channel_id.split("/channel/")[-1].split("/")[0]
+        channel_id = parse_channel_input(channel_id)
 
         # Handle Handle input (e.g. @mkbhd)
         if channel_id.startswith("@"):
@@ -56,12 +171,36 @@ class YouTubeService:
                 id=channel_id
             )
             
-        response = request.execute()
+        response = self._execute(request)
         if "items" in response and len(response["items"]) > 0:
             return response["items"][0]
         return None
 
-    def get_recent_videos(self, channel_id: str, max_results: int = 10):
+    def get_channels_details(self, inputs: list):
+        """
+        Resolves many channel URLs/handles/IDs at once: {input: channel item or None}.
+        IDs go CHANNELS_PER_REQUEST to a channels().list call; handles can only be
+        looked up one per call (forHandle takes a single value).
+        """
+        parsed = {raw: parse_channel_input(raw) for raw in inputs}
+        if not self.youtube:
+            return {raw: self.get_channel_details(channel_id) for raw, channel_id in parsed.items()}
+        found = {}
+        ids = sorted({c for c in parsed.values() if not c.startswith("@") and c != "demo"})
+        for i in range(0, len(ids), CHANNELS_PER_REQUEST):
+            request = self.youtube.channels().list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(ids[i:i + CHANNELS_PER_REQUEST]),
+                maxResults=CHANNELS_PER_REQUEST,
+            )
+            for item in self._execute(request).get("items", []):
+                found[item["id"]] = item
+        for handle in sorted({c for c in parsed.values() if c.startswith("@") or c == "demo"}):
+            found[handle] = self.get_channel_details(handle)
+        return {raw: found.get(channel_id) for raw, channel_id in parsed.items()}
+
+    def get_recent_videos(self, channel_id: str, max_results: int = 10, uploads_playlist_id: str = None):
+        """Latest uploads with snippet and statistics. Pass a known `uploads_playlist_id` to skip the channels.list call."""
         if not self.youtube or channel_id == "demo":
             return [
                 {
@@ -103,18 +242,17 @@ class YouTubeService:
             ]
 
         # First get uploads playlist ID
-        channel_data = self.get_channel_details(channel_id)
-        if not channel_data:
-            return []
-        
-        uploads_playlist_id = channel_data["contentDetails"]["relatedPlaylists"]["uploads"]
+        if not uploads_playlist_id:
+            uploads_playlist_id = self.get_uploads_playlist_id(channel_id)
+            if not uploads_playlist_id:
+                return []
         
         request = self.youtube.playlistItems().list(
             part="snippet,contentDetails",
             playlistId=uploads_playlist_id,
             maxResults=max_results
         )
-        response = request.execute()
+        response = self._execute(request)
         playlist_items = response.get("items", [])
         
         if not playlist_items:
@@ -128,22 +266,83 @@ class YouTubeService:
             part="snippet,statistics,contentDetails",
             id=",".join(video_ids)
         )
-        stats_response = stats_request.execute()
+        stats_response = self._execute(stats_request)
         return stats_response.get("items", [])
 
-    def get_video_comments(self, video_id: str, max_results: int = 100, order: str = "relevance"):
+    def get_uploads_playlist_id(self, channel_id: str):
+        channel_data = self.get_channel_details(channel_id)
+        if not channel_data:
+            return None
+        return channel_data["contentDetails"]["relatedPlaylists"]["uploads"]
+
+    def get_comments_since(self, video_id: str, since: str = None, max_results: int = 300):
+        """
+        Top-level commentThreads newer than `since` (ISO 8601), newest first. Pages
+        with order=time and stops at the first thread at or before `since`, so an
+        incremental sync costs one page when little has changed.
+        """
         if not self.youtube or video_id.startswith("demo_"):
-             return [
+            threads = self.get_video_comments(video_id, include_replies=False)
+            return [t for t in threads if not since or t["snippet"]["topLevelComment"]["snippet"]["publishedAt"] > since]
+
+        threads = []
+        next_page_token = None
+        fetch_id = self.spool.new_fetch_id() if self.spool else None
+        page = 0
+        while len(threads) < max_results:
+            request = self.youtube.commentThreads().list(
+                part="snippet",
+                videoId=video_id,
+                maxResults=min(100, max_results - len(threads)),
+                textFormat="plainText",
+                pageToken=next_page_token,
+                order="time",
+            )
+            response = self._execute(request)
+            self._spool_page(video_id, fetch_id, page, "commentThreads", {"order": "time", "pageToken": next_page_token}, response)
+            page += 1
+            reached_known = False
+            for thread in response.get("items", []):
+                # Same format on both sides (RFC 3339 UTC), so strings compare chronologically
+                if since and thread["snippet"]["topLevelComment"]["snippet"]["publishedAt"] <= since:
+                    reached_known = True
+                    break
+                threads.append(thread)
+            next_page_token = response.get("nextPageToken")
+            if reached_known or not next_page_token:
+                break
+        return threads[:max_results]
+
+    def get_video_comments(self, video_id: str, max_results: int = 100, order: str = "relevance", include_replies: bool = None):
+        """
+        Fetches commentThreads for a video. `max_results` counts top-level threads.
+        With `include_replies` (default: INGEST_REPLIES env flag) each thread's
+        `replies.comments` is completed, paging comments().list(parentId=...) for
+        threads with more replies than the API inlines.
+        """
+        if include_replies is None:
+            include_replies = _env_flag("INGEST_REPLIES")
+
+        if not self.youtube or video_id.startswith("demo_"):
+             demo_threads = [
                 {"id": "c1", "snippet": {"topLevelComment": {"snippet": {"textDisplay": "This is exactly what I needed! Finally proper analytics.", "authorDisplayName": "CreatorFan1", "likeCount": 120, "publishedAt": "2023-10-25T10:05:00Z"}}}},
-                {"id": "c2", "snippet": {"topLevelComment": {"snippet": {"textDisplay": "Not sure about the UI, looks a bit cluttered.", "authorDisplayName": "Critic007", "likeCount": 5, "publishedAt": "2023-10-25T11:20:00Z"}}}},
+                {"id": "c2", "snippet": {"totalReplyCount": 1, "topLevelComment": {"snippet": {"textDisplay": "Not sure about the UI, looks a bit cluttered.", "authorDisplayName": "Critic007", "likeCount": 5, "publishedAt": "2023-10-25T11:20:00Z"}}},
+                 "replies": {"comments": [{"id": "c2.r1", "snippet": {"parentId": "c2", "textDisplay": "Agreed, the sidebar is way too busy.", "authorDisplayName": "UXNerd", "likeCount": 3, "publishedAt": "2023-10-25T11:42:00Z"}}]}},
                 {"id": "c3", "snippet": {"topLevelComment": {"snippet": {"textDisplay": "Can you add support for Instagram soon?", "authorDisplayName": "InstaStar", "likeCount": 45, "publishedAt": "2023-10-25T12:00:00Z"}}}},
                 {"id": "c4", "snippet": {"topLevelComment": {"snippet": {"textDisplay": "Super helpful tool.", "authorDisplayName": "GrowthHacker", "likeCount": 12, "publishedAt": "2023-10-25T13:45:00Z"}}}},
                  {"id": "c5", "snippet": {"topLevelComment": {"snippet": {"textDisplay": "Pricing is too high for small creators.", "authorDisplayName": "SmallTimer", "likeCount": 8, "publishedAt": "2023-10-25T14:10:00Z"}}}}
             ]
+             if not include_replies:
+                 for thread in demo_threads:
+                     thread.pop("replies", None)
+             return demo_threads
 
+        reply_futures = {}
         try:
             all_comments = []
             next_page_token = None
+            fetch_id = self.spool.new_fetch_id() if self.spool else None
+            page = 0
             
             # Use configurable limit or default to None (Unlimited)
             env_max = os.getenv("MAX_COMMENTS_PER_VIDEO")
@@ -172,22 +371,73 @@ class YouTubeService:
                     break
 
                 request = self.youtube.commentThreads().list(
-                    part="snippet",
+                    part="snippet,replies" if include_replies else "snippet",
                     videoId=video_id,
                     maxResults=fetch_size,
                     textFormat="plainText",
                     pageToken=next_page_token,
                     order=order
                 )
-                response = request.execute()
+                response = self._execute(request)
+                self._spool_page(video_id, fetch_id, page, "commentThreads", {"order": order, "pageToken": next_page_token}, response)
+                page += 1
                 items = response.get("items", [])
                 all_comments.extend(items)
+
+                if include_replies:
+                    # Only threads with more replies than were inlined need extra pages.
+                    # They run on the shared reply pool while we keep paging top-level threads.
+                    for thread in items:
+                        inlined = len(thread.get("replies", {}).get("comments", []))
+                        if thread["snippet"].get("totalReplyCount", 0) > inlined:
+                            reply_futures[thread["id"]] = _reply_executor.submit(
+                                propagate(self._fetch_replies), video_id, thread["id"], fetch_id
+                            )
                 
                 next_page_token = response.get("nextPageToken")
                 if not next_page_token:
                     break
+
+            for thread in all_comments:
+                future = reply_futures.get(thread["id"])
+                if not future:
+                    continue
+                try:
+                    thread.setdefault("replies", {})["comments"] = future.result()
+                except Exception as e:
+                    # Keep the inlined replies; a failed reply page shouldn't drop the thread
+                    print(f"Error fetching replies for thread {thread['id']}: {e}")
                     
             return all_comments
+        except QuotaExceeded:
+            for future in reply_futures.values():
+                future.cancel()
+            raise
         except Exception as e:
             print(f"Error fetching comments for video {video_id}: {e}")
+            for future in reply_futures.values():
+                future.cancel()
             return []
+
+    def _fetch_replies(self, video_id: str, parent_id: str, fetch_id: str):
+        """Pages every reply of one thread via comments().list(parentId=...)."""
+        replies = []
+        next_page_token = None
+        page = 0
+        while True:
+            request = self._thread_client().comments().list(
+                part="snippet",
+                parentId=parent_id,
+                maxResults=100,
+                textFormat="plainText",
+                pageToken=next_page_token
+            )
+            response = self._execute(request)
+            self._spool_page(video_id, fetch_id, page, "comments", {"parentId": parent_id, "pageToken": next_page_token}, response)
+            page += 1
+            replies.extend(response.get("items", []))
+
+            next_page_token = response.get("nextPageToken")
+            if not next_page_token:
+                break
+        return replies
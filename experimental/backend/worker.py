@@ -0,0 +1,317 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import threading
+import traceback
+
+from backend.database import engine, Base, SessionLocal
+import backend.models.models # Import models so they are registered with Base
+from backend.models.models import Video, Job, TrackedChannel
+from backend.services.job_queue import JobQueue, JobContext, worker_identity, LEASE_SECONDS, ACTIVE_STATUSES
+from backend.services.metrics import start_snapshot_writer
+from backend.services.profiling import claim_job_capture, profiled
+from backend.services.quota_service import QuotaExceeded
+from backend.services.response_cache import bump_versions
+from backend.services.scheduler import GEMINI_WORKERS, JOB_PRIORITY, batch_scheduler
+from backend.services import tracing
+
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+WORKER_JOBS = int(os.getenv("WORKER_JOBS", "2")) # Jobs each worker process runs at once, plus the interactive lane
+
+
+def _handle_analyze_channel(ctx: JobContext):
+    """Jobs from bulk onboarding (`prepare_metadata`) also fetch the video list that the single-channel route fetches up front."""
+    from backend.services.analytics_service import AnalyticsService
+    channel_id = ctx.payload["channel_id"]
+    priority = ctx.payload.get("priority", "channel")
+    if ctx.payload.get("prepare_metadata") and not ctx.is_done("metadata", "all"):
+        db = SessionLocal()
+        try:
+            AnalyticsService(db).prepare_analysis_metadata(channel_id, priority=priority)
+        finally:
+            db.close()
+        ctx.mark_done("metadata", "all")
+    AnalyticsService(None).run_background_analysis(channel_id, job=ctx, priority=priority)
+
+
+def _handle_analyze_video(ctx: JobContext):
+    """
+    Backfill jobs analyze every comment and leave top-50 insights to be generated
+    on read. Interactive (SSE) jobs set `max_batches`/`with_top_50`; the final event
+    is returned so the API can stream it from the job's result.
+    """
+    from backend.services.analytics_service import AnalyticsService
+    db = SessionLocal()
+    try:
+        analytics = AnalyticsService(db)
+        last_event = None
+        for last_event in analytics.run_video_analysis(
+            ctx.payload["video_id"],
+            job=ctx,
+            include_replies=ctx.payload.get("include_replies"),
+            max_batches=ctx.payload.get("max_batches"),
+            with_top_50=ctx.payload.get("with_top_50", False),
+            priority=ctx.payload.get("priority", "backfill"),
+        ):
+            pass
+        return last_event
+    finally:
+        db.close()
+
+
+def _handle_refresh_channel(ctx: JobContext):
+    """Incremental refresh (new uploads, stats, new comments) for a tracked channel; reschedules it."""
+    from backend.services.analytics_service import AnalyticsService
+    from backend.services.refresh_service import record_refresh
+    channel_id = ctx.payload["channel_id"]
+    db = SessionLocal()
+    try:
+        tracked = db.query(TrackedChannel).filter(TrackedChannel.channel_id == channel_id).first()
+        summary = AnalyticsService(db).refresh_channel(
+            channel_id,
+            uploads_playlist_id=tracked.uploads_playlist_id if tracked else None,
+            priority=ctx.payload.get("priority", "refresh"),
+        )
+        record_refresh(db, channel_id, summary)
+        db.commit()
+        return summary
+    finally:
+        db.close()
+
+
+HANDLERS = {
+    "analyze_channel": _handle_analyze_channel,
+    "analyze_video": _handle_analyze_video,
+    "refresh_channel": _handle_refresh_channel,
+}
+
+
+def _mark_videos_failed(ctx: JobContext):
+    """After the final attempt, don't leave the job's videos in 'processing'."""
+    if ctx.job.kind == "refresh_channel":
+        return # Refreshes never mark videos 'processing'; an analysis running alongside owns them
+    db = SessionLocal()
+    try:
+        query = db.query(Video).filter(Video.analysis_status == "processing")
+        if ctx.job.kind == "analyze_channel":
+            query = query.filter(Video.channel_id == ctx.payload["channel_id"])
+        else:
+            query = query.filter(Video.id == ctx.payload["video_id"])
+        video_ids = [video_id for (video_id,) in query.with_entities(Video.id)]
+        query.update({"analysis_status": "error"}, synchronize_session=False)
+        bump_versions(db, video_ids=video_ids) # Bulk updates skip the flush hook
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_job(queue: JobQueue, job: Job, owner: str, stop_event=None):
+    """Runs one leased job, keeping its lease alive with a heartbeat thread."""
+    ctx = JobContext(queue, job, owner, stop_event)
+    finished = threading.Event()
+
+    def heartbeat():
+        while not finished.wait(LEASE_SECONDS / 3):
+            if not queue.heartbeat(job.id, owner):
+                ctx.lease_lost = True
+                return
+
+    threading.Thread(target=heartbeat, daemon=True, name=f"heartbeat-{job.id}").start()
+    print(f"WORKER {owner}: running job {job.id} ({job.kind}, attempt {job.attempts})")
+    try:
+        handler = HANDLERS.get(job.kind)
+        if not handler:
+            raise ValueError(f"No handler for job kind '{job.kind}'")
+        capture = claim_job_capture(job.id, job.kind) # Armed via /api/admin/profile/job
+        with tracing.span(
+            f"job.{job.kind}", job_id=job.id, attempt=job.attempts,
+            channel_id=ctx.payload.get("channel_id"), video_id=ctx.payload.get("video_id"),
+        ):
+            if capture:
+                print(f"WORKER {owner}: profiling job {job.id} ({capture.mode}, capture {capture.id})")
+                with profiled(capture):
+                    result = handler(ctx)
+            else:
+                result = handler(ctx)
+
+        if ctx.lease_lost:
+            print(f"WORKER {owner}: lost lease on job {job.id} (expired or cancelled); stopped working on it.")
+        elif ctx.should_stop():
+            queue.release(job.id, owner)
+        else:
+            queue.complete(job.id, owner, result)
+    except Exception as e:
+        traceback.print_exc()
+        # Out of quota isn't a failure: wait for the reset (or the pacing delay) instead
+        retry_after = (e.retry_after or 60) if isinstance(e, QuotaExceeded) else None
+        if not queue.fail(job.id, owner, str(e), retry_after=retry_after):
+            _mark_videos_failed(ctx)
+    finally:
+        finished.set()
+
+
+def _split_budget(processes: int):
+    """
+    GEMINI_WORKERS and YOUTUBE_MAX_CONCURRENCY budget one process. Each of a pool's
+    `processes` takes an equal share, so adding processes doesn't multiply the calls
+    in flight against the upstream rate limits.
+    """
+    if processes <= 1:
+        return
+    from backend.services import youtube_service
+    batch_scheduler.resize(max(1, GEMINI_WORKERS // processes))
+    youtube_service.set_concurrency(max(1, youtube_service.YOUTUBE_MAX_CONCURRENCY // processes))
+
+
+def worker_loop(name: str, stop_event=None, kinds: list = None, cpu: int = None, jobs: int = WORKER_JOBS, processes: int = 1):
+    """
+    Lease and run jobs (optionally only `kinds`) until `stop_event` is set.
+
+    Up to `jobs` leased jobs run at once, each on its own thread, and their LLM batches
+    meet in this process's BatchScheduler. One more lane takes only interactive jobs, so
+    an interactive analysis never queues behind running channel/backfill/refresh jobs:
+    it starts at once and its batches wait for at most one in-flight batch.
+    """
+    if multiprocessing.parent_process() is not None:
+        # Ctrl-C reaches the whole process group; the parent decides when workers stop
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+    _split_budget(processes)
+    Base.metadata.create_all(bind=engine)
+    queue = JobQueue()
+    owner = worker_identity(name)
+    stop_event = stop_event or threading.Event()
+    start_snapshot_writer(stop_event) # Lets the API's /metrics include this process
+    print(f"WORKER {owner}: started with {jobs} job slot(s){f' on CPU {cpu}' if cpu is not None else ''}.")
+
+    lanes = {} # Running job thread -> "shared" or "interactive"
+    freed = threading.Event()
+
+    def run(job):
+        try:
+            run_job(queue, job, owner, stop_event)
+        finally:
+            freed.set()
+
+    while not stop_event.is_set():
+        for thread in [t for t in lanes if not t.is_alive()]:
+            del lanes[thread]
+        if sum(lane == "shared" for lane in lanes.values()) < jobs:
+            lane, min_priority = "shared", None
+        elif "interactive" not in lanes.values():
+            lane, min_priority = "interactive", JOB_PRIORITY["interactive"]
+        else:
+            lane = None
+
+        job = None
+        if lane:
+            try:
+                job = queue.lease(owner, kinds, min_priority=min_priority)
+            except Exception as e:
+                print(f"WORKER {owner}: lease failed: {e}")
+        if not job:
+            freed.wait(POLL_INTERVAL)
+            freed.clear()
+            continue
+        thread = threading.Thread(target=run, args=(job,), daemon=True, name=f"job-{job.id}")
+        lanes[thread] = lane
+        thread.start()
+
+    # Running jobs see the stop event, hand their job back after the current batch and return
+    for thread in list(lanes):
+        thread.join()
+    print(f"WORKER {owner}: stopped.")
+
+
+def recover_stuck_videos():
+    """
+    Videos left in 'processing' with no queued/running job behind them (their work was
+    in-process and died with it) are marked 'error' so they can be re-analyzed.
+    """
+    db = SessionLocal()
+    try:
+        active_keys = {
+            key for (key,) in db.query(Job.dedup_key).filter(Job.status.in_(ACTIVE_STATUSES)).all()
+        }
+        stuck = db.query(Video).filter(Video.analysis_status == "processing").all()
+        recovered = 0
+        for video in stuck:
+            if f"video:{video.id}" in active_keys or f"channel:{video.channel_id}" in active_keys:
+                continue
+            video.analysis_status = "error"
+            recovered += 1
+        db.commit()
+        if recovered:
+            print(f"WORKER: marked {recovered} orphaned 'processing' video(s) as 'error'.")
+    finally:
+        db.close()
+
+
+def start_worker_pool(count: int, kinds: list = None, pin_cpus: bool = False, jobs: int = WORKER_JOBS):
+    """
+    Spawns `count` worker processes running `jobs` jobs each, which split the Gemini and
+    YouTube concurrency budgets between them. Returns (stop_event, processes) for
+    stop_worker_pool. With `pin_cpus`, worker i is pinned to the i-th CPU this process may run on.
+    """
+    mp = multiprocessing.get_context("spawn") # Don't fork a process that already runs threads
+    stop_event = mp.Event()
+    cpus = sorted(os.sched_getaffinity(0)) if pin_cpus and hasattr(os, "sched_getaffinity") else None
+    processes = []
+    for i in range(count):
+        cpu = cpus[i % len(cpus)] if cpus else None
+        process = mp.Process(
+            target=worker_loop, args=(f"w{i}", stop_event, kinds, cpu, jobs, count), name=f"pulsegrow-worker-{i}", daemon=True
+        )
+        process.start()
+        processes.append(process)
+    return stop_event, processes
+
+
+def stop_worker_pool(stop_event, processes, timeout: float = 30.0):
+    """Workers finish their current batch, hand the job back and exit."""
+    stop_event.set()
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+
+
+def main(argv=None):
+    """`pulsegrow-worker` / `python -m backend.worker`: run analysis workers apart from the API."""
+    parser = argparse.ArgumentParser(
+        prog="pulsegrow-worker", description="Run PulseGrow analysis and ingestion workers against the shared database."
+    )
+    parser.add_argument("-n", "--processes", type=int, default=1, help="Worker processes to run (default 1)")
+    parser.add_argument("-j", "--jobs", type=int, default=WORKER_JOBS,
+                        help="Jobs each process runs at once, plus one lane kept for interactive jobs (default %(default)s)")
+    parser.add_argument("--kinds", help="Comma-separated job kinds to take (default: all of %s)" % ", ".join(HANDLERS))
+    parser.add_argument("--pin-cpus", action="store_true", help="Pin each worker process to its own CPU")
+    parser.add_argument("--no-refresh", action="store_true", help="Don't run the tracked-channel refresh daemon here")
+    args = parser.parse_args(argv)
+
+    kinds = [k.strip() for k in args.kinds.split(",")] if args.kinds else None
+    for kind in kinds or []:
+        if kind not in HANDLERS:
+            parser.error(f"unknown job kind '{kind}'")
+
+    Base.metadata.create_all(bind=engine)
+    stop_event, processes = start_worker_pool(args.processes, kinds, args.pin_cpus, args.jobs)
+    if not args.no_refresh:
+        # One daemon per pulsegrow-worker, not per process; claims are atomic if several run
+        from backend.services.refresh_service import start_refresh_daemon
+        start_refresh_daemon(stop_event)
+
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+    while not stopping.is_set() and any(p.is_alive() for p in processes):
+        stopping.wait(1.0)
+
+    print("WORKER: shutting down; running jobs are handed back after their current batch.")
+    stop_worker_pool(stop_event, processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Light-endpoint latency while heavy analyses are in flight.
+#
+# Runs the API in-process (httpx ASGITransport, demo channel, throwaway DB) and
+# measures p50/p99 of cheap reads twice: idle, then with N concurrent clients
+# hammering the Gemini-backed routes. Gemini latency is simulated with a sleep so
+# the run needs no API keys. With the async routes the loaded p99 should stay
+# close to idle; with sync routes it climbs once N exceeds the threadpool size.
+#
+#   python benchmarks/api_latency.py
+#   python benchmarks/api_latency.py --heavy 64 --llm-latency 2.0 --requests 300
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIGHT_PATHS = ["/health", "/api/channel/demo", "/api/channels", "/api/jobs/1"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+        "mean_ms": statistics.mean(samples) * 1000,
+    }
+
+
+async def measure_light(client, total, concurrency):
+    samples = []
+    counter = iter(range(total))
+
+    async def runner():
+        for i in counter:
+            path = LIGHT_PATHS[i % len(LIGHT_PATHS)]
+            start = time.perf_counter()
+            response = await client.get(path)
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+
+    await asyncio.gather(*(runner() for _ in range(concurrency)))
+    return samples
+
+
+async def heavy_load(client, video_id, stop):
+    completed = 0
+    paths = [f"/api/video/{video_id}", "/api/channel/demo/videos"]
+    while not stop.is_set():
+        await client.get(paths[completed % len(paths)])
+        completed += 1
+    return completed
+
+
+def analyze_in_process(video_id):
+    # The SSE route hands analysis to a worker process; run it here instead
+    from backend.api import endpoints
+    from backend.database import SessionLocal
+    from backend.services.analytics_service import AnalyticsService
+    db = SessionLocal()
+    try:
+        for _ in AnalyticsService(db).run_video_analysis(
+            video_id, youtube=endpoints.get_youtube_service(), sentiment_service=endpoints.get_sentiment_service()
+        ):
+            pass
+    finally:
+        db.close()
+
+
+async def run(args):
+    import httpx
+    from backend.main import app
+    from backend.api import endpoints
+
+    # Simulated Gemini latency; blocking, like the real client
+    sentiment_service = endpoints.get_sentiment_service()
+    generate_top_50 = sentiment_service.generate_top_50_insights
+
+    def slow_top_50(comments_list):
+        time.sleep(args.llm_latency)
+        return generate_top_50(comments_list)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Seed: demo channel, one fully analyzed video and a job row
+        response = await client.post("/api/channel/demo/analyze")
+        response.raise_for_status()
+        video_id = (await client.get("/api/channel/demo/videos")).json()[0]["id"]
+        await asyncio.to_thread(analyze_in_process, video_id)
+
+        sentiment_service.generate_top_50_insights = slow_top_50
+
+        idle = await measure_light(client, args.requests, args.concurrency)
+
+        stop = asyncio.Event()
+        heavy = [asyncio.create_task(heavy_load(client, video_id, stop)) for _ in range(args.heavy)]
+        await asyncio.sleep(args.llm_latency) # Let the heavy requests pile up first
+        loaded = await measure_light(client, args.requests, args.concurrency)
+        stop.set()
+        heavy_done = sum(await asyncio.gather(*heavy))
+
+    idle_stats, loaded_stats = summarize(idle), summarize(loaded)
+    print(f"heavy clients={args.heavy} llm_latency={args.llm_latency}s heavy requests completed={heavy_done}")
+    print(f"{'phase':<8} {'count':>6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in (("idle", idle_stats), ("loaded", loaded_stats)):
+        print(f"{name:<8} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    ratio = loaded_stats["p99_ms"] / max(idle_stats["p99_ms"], 0.001)
+    print(f"loaded/idle p99 ratio: {ratio:.1f}x")
+    return {"idle": idle_stats, "loaded": loaded_stats, "p99_ratio": ratio}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Light endpoint p99 under heavy analysis load.")
+    parser.add_argument("--heavy", type=int, default=48, help="Concurrent clients on Gemini-backed routes")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Simulated Gemini call latency (s)")
+    parser.add_argument("--requests", type=int, default=200, help="Light requests per phase")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent light clients")
+    args = parser.parse_args()
+
+    # Throwaway DB: the database URL is relative to the working directory
+    sys.path.insert(0, ROOT)
+    os.chdir(tempfile.mkdtemp(prefix="pulsegrow-bench-"))
+    os.environ.setdefault("COMMENT_SPOOL_DIR", "")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
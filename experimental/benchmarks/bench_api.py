@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+from benchmarks.fakes import FakeGeminiClient
+from benchmarks.harness import benchmark
+
+REQUESTS_PER_ROUTE = 100
+
+_client = None
+
+
+def seed_demo(client, loop):
+    """Demo channel plus one fully analyzed video; analysis runs in-process against the fake LLM."""
+    from backend.api import endpoints
+    from backend.database import SessionLocal
+    from backend.services.analytics_service import AnalyticsService
+
+    endpoints.get_sentiment_service().gemini_client = FakeGeminiClient()
+    loop.run_until_complete(client.post("/api/channel/demo/analyze")).raise_for_status()
+    video_id = loop.run_until_complete(client.get("/api/channel/demo/videos")).json()[0]["id"]
+
+    db = SessionLocal()
+    try:
+        for _ in AnalyticsService(db).run_video_analysis(
+            video_id, youtube=endpoints.get_youtube_service(), sentiment_service=endpoints.get_sentiment_service()
+        ):
+            pass
+    finally:
+        db.close()
+    return video_id
+
+
+def _get_client():
+    """One in-process ASGI client (and event loop) shared by every route benchmark."""
+    global _client
+    if _client is None:
+        import httpx
+        from backend.main import app
+
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+        _client = (loop, client, seed_demo(client, loop))
+    return _client
+
+
+def _route(name: str, path: str):
+    def setup():
+        loop, client, video_id = _get_client()
+        url = path.format(video_id=video_id)
+
+        async def measure():
+            samples = []
+            for _ in range(REQUESTS_PER_ROUTE):
+                start = time.perf_counter()
+                response = await client.get(url)
+                samples.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+            return samples
+
+        loop.run_until_complete(client.get(url)) # Warm caches and lazy imports
+        return lambda: loop.run_until_complete(measure())
+
+    benchmark(f"api.{name}", kind="latency")(setup)
+
+
+_route("health", "/health")
+_route("channel", "/api/channel/demo")
+_route("channel_videos", "/api/channel/demo/videos")
+_route("video_details", "/api/video/{video_id}")
+_route("admin_stats", "/api/admin/stats")
@@ -0,0 +1,175 @@
+import datetime
+import itertools
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.fakes import fixture_comments, fixture_labels
+from benchmarks.harness import benchmark
+
+AGGREGATION_SIZES = [(1_000, False), (100_000, False), (1_000_000, True)] # (comments, --full only)
+VIDEOS_PER_DATASET = 10
+UPSERT_BATCH = 500
+INSERT_CHUNK = 50_000
+
+_datasets = {}
+
+
+def _session_for(path: str):
+    from backend.database import Base
+    import backend.models.models # Register models with Base
+    engine = create_engine(f"sqlite:///./{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+def _processed_comments(count: int, prefix: str):
+    """run_video_analysis-shaped comment dicts built from the fixtures, with synthetic IDs."""
+    labels = fixture_labels()
+    source = itertools.cycle(fixture_comments())
+    rows = []
+    for i in range(count):
+        c = next(source)
+        label, score = labels.get(c["comment_id"], ("neutral", 0.0))
+        rows.append({
+            "id": f"{prefix}{i}",
+            "parent_id": None,
+            "text": c["text"],
+            "author": c["author"],
+            "likeCount": i % 7,
+            "publishedAt": c["published_at"],
+            "sentiment": label,
+            "vader_sentiment": label,
+            "vader_score": score,
+            "emoji_detected": 0,
+            "topics": "[]",
+        })
+    return rows
+
+
+# --- Upserts ---
+
+def _upsert_setup():
+    from backend.models.models import Channel, Video
+    db = _session_for("bench-upsert.db")
+    if not db.get(Video, "upsert_video"):
+        db.add(Channel(id="upsert_channel", title="Bench"))
+        db.add(Video(id="upsert_video", channel_id="upsert_channel", title="Bench"))
+        db.commit()
+    return db
+
+
+@benchmark("db.comment_upsert_insert", unit="comments/s")
+def upsert_insert():
+    """The query-then-add upsert used by the analysis tasks, on new comment IDs."""
+    from backend.services.analytics_service import AnalyticsService
+    db = _upsert_setup()
+    analytics = AnalyticsService(db)
+    rounds = itertools.count()
+
+    def run():
+        rows = _processed_comments(2000, f"ins{next(rounds)}_")
+        for i in range(0, len(rows), UPSERT_BATCH):
+            analytics._store_analyzed_comments(db, "upsert_video", rows[i:i + UPSERT_BATCH])
+        return len(rows)
+    return run
+
+
+@benchmark("db.comment_upsert_update", unit="comments/s")
+def upsert_update():
+    """The same upsert when every comment already exists (re-analysis)."""
+    from backend.services.analytics_service import AnalyticsService
+    db = _upsert_setup()
+    analytics = AnalyticsService(db)
+    rows = _processed_comments(2000, "upd_")
+    analytics._store_analyzed_comments(db, "upsert_video", rows)
+
+    def run():
+        for i in range(0, len(rows), UPSERT_BATCH):
+            analytics._store_analyzed_comments(db, "upsert_video", rows[i:i + UPSERT_BATCH])
+        return len(rows)
+    return run
+
+
+# --- Aggregations ---
+
+def _dataset(size: int):
+    """A channel with `size` comments over VIDEOS_PER_DATASET completed videos (built once per size)."""
+    if size in _datasets:
+        return _datasets[size]
+
+    from backend.models.models import Channel, Comment, SentimentType, Video
+    db = _session_for(f"bench-agg-{size}.db")
+    channel_id = f"agg_{size}"
+    videos = [f"{channel_id}_v{i}" for i in range(VIDEOS_PER_DATASET)]
+    db.add(Channel(id=channel_id, title="Bench"))
+    db.add_all(Video(id=v, channel_id=channel_id, title=v, analysis_status="completed") for v in videos)
+    db.commit()
+
+    topics = [json.dumps(t) for t in (["design", "price"], ["battery"], ["camera", "design", "screen"], [])]
+    rows = []
+    for i, c in enumerate(_processed_comments(size, "c")):
+        rows.append({
+            "id": c["id"],
+            "video_id": videos[i % len(videos)],
+            "text": c["text"],
+            "author": c["author"],
+            "like_count": c["likeCount"],
+            "published_at": datetime.datetime.fromisoformat(c["publishedAt"].replace("Z", "+00:00")),
+            "sentiment": SentimentType(c["sentiment"]),
+            "vader_sentiment": c["vader_sentiment"],
+            "vader_score": c["vader_score"],
+            "emoji_detected": 1 if i % 4 == 0 else 0,
+            "topics": topics[i % len(topics)],
+        })
+        if len(rows) >= INSERT_CHUNK:
+            db.execute(Comment.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.execute(Comment.__table__.insert(), rows)
+    db.commit()
+
+    _datasets[size] = (db, channel_id, videos[0])
+    return _datasets[size]
+
+
+def _register_aggregations(size: int, full_only: bool):
+    per_video = size // VIDEOS_PER_DATASET
+    label = f"{size // 1000}k" if size < 1_000_000 else f"{size // 1_000_000}m"
+    repeat = 1 if full_only else 10 if size <= 1_000 else 3 # Small runs are noisy; 1M runs are slow
+
+    def channel_call(method):
+        def setup():
+            from backend.services.analytics_service import AnalyticsService
+            db, channel_id, _ = _dataset(size)
+            analytics = AnalyticsService(db)
+
+            def run():
+                getattr(analytics, method)(channel_id)
+                db.expunge_all() # Don't let the identity map turn the next repeat into a cache hit
+                return size
+            return run
+        return setup
+
+    def video_call(method):
+        def setup():
+            from backend.services.analytics_service import AnalyticsService
+            db, _, video_id = _dataset(size)
+            analytics = AnalyticsService(db)
+
+            def run():
+                getattr(analytics, method)(video_id)
+                db.expunge_all()
+                return per_video
+            return run
+        return setup
+
+    for method in ("calculate_health_score", "generate_detailed_channel_insights"):
+        benchmark(f"analytics.{method}.{label}", unit="comments/s", repeat=repeat, full_only=full_only)(channel_call(method))
+    for method in ("calculate_video_sentiment_distribution", "generate_video_insights"):
+        benchmark(f"analytics.{method}.{label}", unit="comments/s", repeat=repeat, full_only=full_only)(video_call(method))
+
+
+for _size, _full_only in AGGREGATION_SIZES:
+    _register_aggregations(_size, _full_only)
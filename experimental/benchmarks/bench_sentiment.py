@@ -0,0 +1,39 @@
+from benchmarks.fakes import FakeGeminiClient, fixture_comments
+from benchmarks.harness import benchmark
+
+BATCH_SIZE = 30 # Matches COMMENTS_PER_BATCH in run_video_analysis
+
+
+def _texts(limit=None):
+    comments = fixture_comments()
+    return [c["text"] for c in comments[:limit]]
+
+
+@benchmark("sentiment.vader_analyze_comment", unit="comments/s")
+def vader_throughput():
+    from backend.services.sentiment_service import LocalSentimentService
+    service = LocalSentimentService()
+    service.gemini_client = None
+    texts = _texts(2000)
+
+    def run():
+        for text in texts:
+            service.analyze_comment(text)
+        return len(texts)
+    return run
+
+
+@benchmark("sentiment.analyze_comment_batch_fake_llm", unit="comments/s")
+def batch_throughput():
+    """Prompt building, response parsing and ID reconciliation around a zero-latency fake Gemini."""
+    from backend.services.sentiment_service import LocalSentimentService
+    service = LocalSentimentService()
+    service.gemini_client = FakeGeminiClient()
+    comments = [{"id": c["comment_id"], "text": c["text"]} for c in fixture_comments()[:3000]]
+    batches = [comments[i:i + BATCH_SIZE] for i in range(0, len(comments), BATCH_SIZE)]
+
+    def run():
+        for i, batch in enumerate(batches):
+            service.analyze_comment_batch(batch, "bench", f"bench_batch_{i}")
+        return len(comments)
+    return run
@@ -0,0 +1,75 @@
+import datetime
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.fakes import fixture_comments, fixture_labels
+from benchmarks.harness import benchmark
+
+# Response serialization for 10k-row payloads, old path vs new:
+#   jsonable_encoder  ORM rows walked by jsonable_encoder, then json.dumps (FastAPI without a response model)
+#   response_model    validated into the route's response model and dumped to bytes by pydantic-core
+
+ROWS = 10_000
+
+
+def _channels():
+    from backend.models.models import Channel
+    now = datetime.datetime(2025, 12, 24, 18, 0)
+    return [
+        Channel(
+            id=f"UC{i:022d}", title=f"Channel {i}", thumbnail_url=f"https://yt3.ggpht.com/{i}.jpg",
+            health_score=(i % 200) / 100.0 - 1.0, last_updated=now,
+        )
+        for i in range(ROWS)
+    ]
+
+
+def _comments():
+    from backend.models.models import Comment, SentimentType
+    labels = fixture_labels()
+    source = fixture_comments()
+    rows = []
+    for i in range(ROWS):
+        c = source[i % len(source)]
+        label, score = labels.get(c["comment_id"], ("neutral", 0.0))
+        rows.append(Comment(
+            id=f"{c['comment_id']}.{i}", video_id=c["video_id"], parent_id=None, text=c["text"], author=c["author"],
+            like_count=i % 500, published_at=datetime.datetime.fromisoformat(c["published_at"].replace("Z", "+00:00")),
+            sentiment=SentimentType(label), confidence_score=0.9, vader_sentiment=label, vader_score=score,
+            gemini_sentiment=label, gemini_score=score, emoji_detected=0, topics="[]",
+        ))
+    return rows
+
+
+def _dumps(content) -> bytes:
+    # JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _register(name: str, make_rows, schema: str):
+    @benchmark(f"serialize.{name}_10k.jsonable_encoder", unit="rows/s")
+    def before():
+        rows = make_rows()
+
+        def run():
+            _dumps(jsonable_encoder(rows))
+            return len(rows)
+        return run
+
+    @benchmark(f"serialize.{name}_10k.response_model", unit="rows/s")
+    def after():
+        from typing import List
+        from backend.api import schemas
+        from backend.services.response_cache import render
+        model = List[getattr(schemas, schema)]
+        rows = make_rows()
+
+        def run():
+            render(model, rows)
+            return len(rows)
+        return run
+
+
+_register("channels", _channels, "ChannelOut")
+_register("comments", _comments, "CommentOut")
@@ -0,0 +1,226 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+# Deterministic stand-ins for upstream APIs so benchmarks measure our code, not
+# the network. Labels come from the bundled mkbhd_batch_results.json fixture.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUT_FIXTURE = os.path.join(ROOT, "mkbhd_analysis_input.json")
+RESULTS_FIXTURE = os.path.join(ROOT, "mkbhd_batch_results.json")
+
+_labels = None
+
+
+def fixture_labels():
+    """comment_id -> (sentiment_label, sentiment_score) from the batch results fixture."""
+    global _labels
+    if _labels is None:
+        with open(RESULTS_FIXTURE, "r") as f:
+            _labels = {
+                r["comment_id"]: (r["sentiment_label"], r["sentiment_score"])
+                for batch in json.load(f)
+                for r in batch["results"]
+            }
+    return _labels
+
+
+def fixture_videos():
+    """[{video_id, video_title, comments}] from the input fixture."""
+    with open(INPUT_FIXTURE, "r") as f:
+        return json.load(f)
+
+
+def fixture_comments():
+    """Flat list of {comment_id, text, author, published_at, video_id} from the input fixture."""
+    with open(INPUT_FIXTURE, "r") as f:
+        return [
+            dict(c, video_id=video["video_id"])
+            for video in json.load(f)
+            for c in video["comments"]
+        ]
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeModels:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, model: str, contents: str):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        # Batch prompt: the comment payload is the JSON array at the end of the prompt
+        match = re.search(r"(\[\{.*\}\])\s*$", contents, re.DOTALL)
+        if match and "batch_id" in contents:
+            labels = fixture_labels()
+            results = []
+            for c in json.loads(match.group(1)):
+                if "id" not in c:
+                    break
+                label, score = labels.get(c["id"], ("neutral", 0.0))
+                results.append({"comment_id": c["id"], "sentiment": label, "score": score, "emoji": False})
+            else:
+                return _FakeResponse(json.dumps({"video_id": "", "batch_id": "", "results": results}))
+
+        # Anything else (top-50 insights): a fixed, well-formed report
+        return _FakeResponse(json.dumps({
+            "sentiment_summary": "Mostly positive.",
+            "sentiment_breakdown": {"positive": 60, "neutral": 30, "negative": 10},
+            "key_themes": ["design", "price", "battery"],
+            "praise_summary": "Build quality.",
+            "criticism_summary": "Price.",
+            "ai_insights": ["Pin a price FAQ.", "Show battery tests.", "Compare with rivals."],
+            "notable_quotes": [],
+        }))
+
+
+class FakeGeminiClient:
+    """Mimics `genai.Client` for the calls LocalSentimentService makes."""
+
+    def __init__(self, latency: float = 0.0):
+        self.models = _FakeModels(latency)
+
+
+# --- YouTube ---
+
+FIXTURE_CHANNEL_ID = "UCBJycsmduvYEL83R_U4JriQ" # MKBHD; other channel IDs get prefixed copies of its videos
+
+
+class _FakeRequest:
+    def __init__(self, method_id: str, fn, latency: float):
+        self.methodId = method_id
+        self._fn = fn
+        self._latency = latency
+
+    def execute(self):
+        if self._latency:
+            time.sleep(self._latency)
+        return self._fn()
+
+
+class _FakeResource:
+    def __init__(self, youtube, name: str, handler):
+        self._youtube = youtube
+        self._name = name
+        self._handler = handler
+
+    def list(self, **params):
+        return _FakeRequest(f"youtube.{self._name}.list", lambda: self._handler(**params), self._youtube.latency)
+
+
+def _likes(comment_id: str) -> int:
+    # Deterministic, skewed like counts (fixtures don't carry them)
+    return (zlib.crc32(comment_id.encode("utf-8")) % 1000) ** 2 // 10000
+
+
+class FakeYouTube:
+    """
+    Mimics the googleapiclient YouTube v3 resource for the calls YouTubeService
+    makes, serving the MKBHD fixture videos and comments. Every channel ID resolves;
+    channels other than FIXTURE_CHANNEL_ID get copies of the fixture videos under
+    channel-prefixed video and comment IDs so they don't collide in the database.
+    """
+
+    def __init__(self, latency: float = 0.0, page_size: int = 100):
+        self.latency = latency
+        self.page_size = page_size
+        self._fixture = fixture_videos()
+        self._videos = {} # video ID -> (prefix, fixture video)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _channel_videos(self, channel_id: str):
+        prefix = "" if channel_id == FIXTURE_CHANNEL_ID else f"{channel_id}-"
+        ids = []
+        with self._lock:
+            for video in self._fixture:
+                video_id = prefix + video["video_id"]
+                self._videos[video_id] = (prefix, video)
+                ids.append(video_id)
+        return ids
+
+    def channels(self):
+        def handler(id=None, forHandle=None, **_):
+            self.calls += 1
+            channel_ids = id.split(",") if id else [forHandle.lstrip("@")]
+            return {"items": [{
+                "id": channel_id,
+                "snippet": {
+                    "title": "Marques Brownlee" if channel_id == FIXTURE_CHANNEL_ID else f"Load test {channel_id}",
+                    "thumbnails": {"default": {"url": "https://yt3.ggpht.com/fake-channel.jpg"}},
+                },
+                "statistics": {"subscriberCount": "20000000", "videoCount": str(len(self._fixture))},
+                "contentDetails": {"relatedPlaylists": {"uploads": f"uploads:{channel_id}"}},
+            } for channel_id in channel_ids]}
+        return _FakeResource(self, "channels", handler)
+
+    def playlistItems(self):
+        def handler(playlistId, maxResults=5, **_):
+            self.calls += 1
+            ids = self._channel_videos(playlistId.split(":", 1)[1])[:maxResults]
+            return {"items": [{"contentDetails": {"videoId": video_id}} for video_id in ids]}
+        return _FakeResource(self, "playlistItems", handler)
+
+    def videos(self):
+        def handler(id, **_):
+            self.calls += 1
+            items = []
+            for i, video_id in enumerate(id.split(",")):
+                _, video = self._videos[video_id]
+                items.append({
+                    "id": video_id,
+                    "snippet": {
+                        "title": video["video_title"],
+                        "publishedAt": f"2025-12-{24 - i:02d}T18:00:00Z",
+                        "thumbnails": {
+                            "medium": {"url": f"https://i.ytimg.com/vi/{video['video_id']}/mqdefault.jpg"},
+                            "default": {"url": f"https://i.ytimg.com/vi/{video['video_id']}/default.jpg"},
+                        },
+                    },
+                    "statistics": {"viewCount": "1000000", "likeCount": "50000", "commentCount": str(len(video["comments"]))},
+                })
+            return {"items": items}
+        return _FakeResource(self, "videos", handler)
+
+    def commentThreads(self):
+        def handler(videoId, maxResults=100, pageToken=None, **_):
+            self.calls += 1
+            prefix, video = self._videos.get(videoId, ("", {"comments": []}))
+            start = int(pageToken or 0)
+            end = start + min(maxResults, self.page_size)
+            items = []
+            for c in video["comments"][start:end]:
+                comment_id = prefix + c["comment_id"]
+                items.append({
+                    "id": comment_id,
+                    "snippet": {
+                        "totalReplyCount": 0,
+                        "topLevelComment": {"snippet": {
+                            "textDisplay": c["text"],
+                            "authorDisplayName": c["author"],
+                            "likeCount": _likes(comment_id),
+                            "publishedAt": c["published_at"],
+                        }},
+                    },
+                })
+            response = {"items": items}
+            if end < len(video["comments"]):
+                response["nextPageToken"] = str(end)
+            return response
+        return _FakeResource(self, "commentThreads", handler)
+
+    def comments(self):
+        def handler(**_):
+            self.calls += 1
+            return {"items": []}
+        return _FakeResource(self, "comments", handler)
@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import time
+
+# Minimal benchmark harness: modules register benchmarks with @benchmark, the
+# runner times them and compares the results against committed baselines.
+#
+# A benchmark function does its setup and returns a zero-argument `run` callable
+# (timed, repeated). For "throughput" benchmarks `run` returns the number of
+# operations it performed; for "latency" benchmarks it returns a list of
+# per-operation durations in seconds.
+
+BENCHMARKS = []
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.25")) # Allowed slowdown vs baseline
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+class Benchmark:
+    def __init__(self, name: str, fn, kind: str, unit: str, repeat: int, full_only: bool):
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.unit = unit
+        self.repeat = repeat
+        self.full_only = full_only
+
+
+def benchmark(name: str, kind: str = "throughput", unit: str = "ops/s", repeat: int = 3, full_only: bool = False):
+    """Registers a benchmark. `full_only` ones (e.g. 1M-row datasets) run with --full."""
+    def decorator(fn):
+        BENCHMARKS.append(Benchmark(name, fn, kind, unit, repeat, full_only))
+        return fn
+    return decorator
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_benchmark(bench: Benchmark):
+    """Returns {metric name: {"value", "unit", "higher_is_better"}}."""
+    run = bench.fn()
+    if bench.kind == "throughput":
+        best = 0.0
+        for _ in range(bench.repeat):
+            start = time.perf_counter()
+            ops = run()
+            elapsed = time.perf_counter() - start
+            best = max(best, ops / elapsed if elapsed > 0 else float("inf"))
+        return {bench.name: {"value": best, "unit": bench.unit, "higher_is_better": True}}
+
+    # Latency: keep the repeat with the lowest median, report its p50/p99
+    runs = [run() for _ in range(bench.repeat)]
+    samples = min(runs, key=statistics.median)
+    return {
+        f"{bench.name}.p50": {"value": percentile(samples, 50) * 1000, "unit": "ms", "higher_is_better": False},
+        f"{bench.name}.p99": {"value": percentile(samples, 99) * 1000, "unit": "ms", "higher_is_better": False},
+    }
+
+
+def load_baselines(path: str = BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("metrics", {})
+
+
+def save_baselines(metrics: dict, path: str = BASELINES_PATH, merge: bool = True):
+    existing = load_baselines(path) if merge else {}
+    existing.update(metrics)
+    with open(path, "w") as f:
+        json.dump({"metrics": dict(sorted(existing.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def compare(metric: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD):
+    """Returns (change as a fraction, regressed). Positive change is always an improvement."""
+    if not baseline or not baseline.get("value"):
+        return None, False
+    ratio = metric["value"] / baseline["value"]
+    change = ratio - 1.0 if metric["higher_is_better"] else 1.0 - ratio
+    return change, change < -threshold
@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Synthetic load test: virtual users drive the API with a realistic mix of
+#
+#   analyze_channel  POST /api/channel/{id}/analyze
+#   analyze_video    POST /api/video/{id}/analyze   (SSE, read until the final event)
+#   channel_videos   GET  /api/channel/{id}/videos
+#   video_details    GET  /api/video/{id}
+#
+# and reports throughput, p50/p95/p99 latency and error rate per route. For the
+# SSE route, latency is the whole stream; time to first event is reported apart
+# (only meaningful with --url: ASGITransport hands over the body once it ends).
+#
+# By default everything runs in this process against a throwaway database: the
+# API through httpx's ASGITransport, worker_loop threads for the jobs, and YouTube
+# and Gemini replaced by benchmarks.fakes (seeded from the MKBHD fixtures, with
+# --youtube-latency / --llm-latency per call), so no API keys or quota are used.
+#
+#   python benchmarks/loadtest.py                                # read-heavy mix, 20 users, 30s
+#   python benchmarks/loadtest.py --mix analyze-heavy --users 50 --llm-latency 1.0
+#   python benchmarks/loadtest.py --weights channel_videos=3,analyze_video=1 --json out.json
+#   python benchmarks/loadtest.py --url http://localhost:8000    # an already running server
+#
+# `serve` starts the same faked API with workers under uvicorn, so a separate
+# load generator (or --url from another machine) can drive a real HTTP server:
+#
+#   python benchmarks/loadtest.py serve --port 8000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = ("analyze_channel", "analyze_video", "channel_videos", "video_details")
+MIXES = {
+    "read-heavy": {"channel_videos": 45, "video_details": 45, "analyze_video": 8, "analyze_channel": 2},
+    "balanced": {"channel_videos": 35, "video_details": 35, "analyze_video": 20, "analyze_channel": 10},
+    "analyze-heavy": {"channel_videos": 20, "video_details": 20, "analyze_video": 45, "analyze_channel": 15},
+}
+TERMINAL_STATUSES = ("completed", "error", "cancelled")
+
+
+def parse_weights(mix: str, overrides: str):
+    weights = dict(MIXES[mix])
+    for item in filter(None, (overrides or "").split(",")):
+        name, _, value = item.partition("=")
+        if name.strip() not in ROUTES:
+            raise ValueError(f"Unknown route '{name}' (expected one of {', '.join(ROUTES)})")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+# --- In-process target ---
+
+def start_in_process(args):
+    """
+    Fake upstreams, throwaway database and `args.workers` worker threads. Returns the
+    ASGI app and a stop event for the workers. Must run before any backend import.
+    """
+    os.chdir(tempfile.mkdtemp(prefix="pulsegrow-load-")) # Database URLs are relative
+    sys.path.insert(0, ROOT)
+    os.environ.update({
+        "YOUTUBE_API_KEY": "fake",
+        "GEMINI_API_KEY": "fake",
+        "YOUTUBE_DAILY_QUOTA": "1000000000",
+        "JOB_POLL_INTERVAL": "0.1",
+    })
+    os.environ.setdefault("COMMENT_SPOOL_DIR", "")
+    os.environ.setdefault("ADMISSION_CLIENT_RATE", "0") # Every virtual user shares one client address
+
+    import types
+    from benchmarks.fakes import FakeGeminiClient, FakeYouTube
+    from backend.services import sentiment_service, youtube_service
+
+    youtube = FakeYouTube(latency=args.youtube_latency)
+    youtube_service.YOUTUBE_API_KEY = "fake"
+    youtube_service.build = lambda *_, **__: youtube
+    sentiment_service.genai = types.SimpleNamespace(Client=lambda **_: FakeGeminiClient(latency=args.llm_latency))
+
+    from backend.main import app
+    from backend.worker import worker_loop
+
+    stop_event = threading.Event()
+    for i in range(args.workers):
+        threading.Thread(target=worker_loop, args=(f"load{i}", stop_event), daemon=True, name=f"load-worker-{i}").start()
+    return app, stop_event
+
+
+def make_client(args, app=None):
+    import httpx
+    limits = httpx.Limits(max_connections=args.users + 8)
+    if app is not None:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=args.timeout)
+    return httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+
+
+# --- Recording ---
+
+class Recorder:
+    def __init__(self):
+        self.samples = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.first_event = []
+        self.error_examples = {}
+
+    def record(self, route: str, seconds: float, error: str = None):
+        self.samples[route].append(seconds)
+        if error:
+            self.errors[route] += 1
+            self.error_examples.setdefault(route, error)
+
+    def report(self, elapsed: float):
+        from benchmarks.harness import percentile
+        rows = {}
+        for route in ROUTES:
+            samples = self.samples[route]
+            if not samples:
+                continue
+            rows[route] = {
+                "requests": len(samples),
+                "rps": len(samples) / elapsed,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "error_rate": self.errors[route] / len(samples),
+            }
+        if self.first_event:
+            rows["analyze_video"]["first_event_p50_ms"] = percentile(self.first_event, 50) * 1000
+            rows["analyze_video"]["first_event_p99_ms"] = percentile(self.first_event, 99) * 1000
+        total = sum(len(s) for s in self.samples.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "requests": total,
+            "rps": total / elapsed,
+            "error_rate": sum(self.errors.values()) / total if total else 0.0,
+            "routes": rows,
+            "error_examples": self.error_examples,
+        }
+
+
+# --- Virtual users ---
+
+async def seed(client, channels: int, timeout: float):
+    """Analyzes `channels` synthetic channels and waits for their jobs; returns {channel_id: [video IDs]}."""
+    jobs = {}
+    for i in range(channels):
+        channel_id = f"loadtest-{i}"
+        response = await client.post(f"/api/channel/{channel_id}/analyze")
+        response.raise_for_status()
+        jobs[channel_id] = response.json()["job_id"]
+
+    deadline = time.monotonic() + timeout
+    pending = dict(jobs)
+    while pending and time.monotonic() < deadline:
+        for channel_id, job_id in list(pending.items()):
+            job = (await client.get(f"/api/jobs/{job_id}")).json()
+            if job["status"] not in ("queued", "running"):
+                pending.pop(channel_id)
+        await asyncio.sleep(0.5)
+    if pending:
+        print(f"Seeding: {len(pending)} channel job(s) still running after {timeout:.0f}s; continuing.")
+
+    catalog = {}
+    for channel_id in jobs:
+        videos = (await client.get(f"/api/channel/{channel_id}/videos")).json()
+        catalog[channel_id] = [v["id"] for v in videos]
+    return catalog
+
+
+async def analyze_video_stream(client, video_id: str, recorder: Recorder):
+    start = time.perf_counter()
+    error = None
+    final = None
+    async with client.stream("POST", f"/api/video/{video_id}/analyze") as response:
+        if response.status_code >= 400:
+            await response.aread()
+            error = f"HTTP {response.status_code}"
+        else:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                if final is None:
+                    recorder.first_event.append(time.perf_counter() - start)
+                event = json.loads(line[len("data: "):])
+                final = event
+                if event.get("status") in TERMINAL_STATUSES:
+                    break
+            if final is None or final.get("status") not in TERMINAL_STATUSES:
+                error = "stream ended without a final event"
+            elif final["status"] != "completed":
+                error = f"{final['status']}: {final.get('message', '')}"
+    return time.perf_counter() - start, error
+
+
+async def user(client, catalog: dict, weights: dict, recorder: Recorder, deadline: float, think: float, rng: random.Random):
+    routes, route_weights = zip(*weights.items())
+    channel_ids = list(catalog)
+    while time.monotonic() < deadline:
+        route = rng.choices(routes, route_weights)[0]
+        channel_id = rng.choice(channel_ids)
+        video_id = rng.choice(catalog[channel_id]) if catalog[channel_id] else None
+        start = time.perf_counter()
+        try:
+            if route == "analyze_video" and video_id:
+                elapsed, error = await analyze_video_stream(client, video_id, recorder)
+                recorder.record(route, elapsed, error)
+            else:
+                if route == "analyze_channel":
+                    response = await client.post(f"/api/channel/{channel_id}/analyze")
+                elif route == "video_details" and video_id:
+                    response = await client.get(f"/api/video/{video_id}")
+                else:
+                    route = "channel_videos"
+                    response = await client.get(f"/api/channel/{channel_id}/videos")
+                error = f"HTTP {response.status_code}" if response.status_code >= 400 else None
+                recorder.record(route, time.perf_counter() - start, error)
+        except Exception as e:
+            recorder.record(route, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+        if think:
+            await asyncio.sleep(rng.expovariate(1.0 / think))
+
+
+async def run_load(args, app=None):
+    weights = parse_weights(args.mix, args.weights)
+    recorder = Recorder()
+    async with make_client(args, app) as client:
+        print(f"Seeding {args.channels} channel(s)...", flush=True)
+        catalog = await seed(client, args.channels, args.seed_timeout)
+        print(f"Running {args.users} users for {args.duration:.0f}s: {weights}", flush=True)
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            user(client, catalog, weights, recorder, deadline, args.think, random.Random(args.seed + i))
+            for i in range(args.users)
+        ))
+        elapsed = time.monotonic() - started
+    return recorder.report(elapsed)
+
+
+def print_report(report: dict):
+    print(f"\n{'route':<16} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for route, row in report["routes"].items():
+        print(
+            f"{route:<16} {row['requests']:>9} {row['rps']:>8.1f} {row['p50_ms']:>9.1f} "
+            f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['error_rate']:>7.1%}"
+        )
+    sse = report["routes"].get("analyze_video", {})
+    if "first_event_p50_ms" in sse:
+        print(f"analyze_video time to first event: p50 {sse['first_event_p50_ms']:.1f} ms, p99 {sse['first_event_p99_ms']:.1f} ms")
+    print(f"total: {report['requests']} requests, {report['rps']:.1f} req/s, {report['error_rate']:.1%} errors")
+    for route, example in report["error_examples"].items():
+        print(f"  first {route} error: {example}")
+
+
+def serve(args):
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("serve needs uvicorn: pip install uvicorn")
+    app, stop_event = start_in_process(args)
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic load test for the PulseGrow API with fake YouTube/Gemini.")
+    parser.add_argument("command", nargs="?", choices=("run", "serve"), default="run")
+    parser.add_argument("--url", help="Target a running server instead of the in-process API")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users (default 20)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after seeding (default 30)")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="read-heavy", help="Route mix preset")
+    parser.add_argument("--weights", help="Override mix weights, e.g. analyze_video=10,channel_videos=40")
+    parser.add_argument("--think", type=float, default=0.1, help="Mean think time between a user's requests, seconds")
+    parser.add_argument("--channels", type=int, default=3, help="Synthetic channels to seed (10 videos each)")
+    parser.add_argument("--workers", type=int, default=2, help="In-process worker threads (in-process and serve)")
+    parser.add_argument("--youtube-latency", type=float, default=0.05, help="Fake YouTube latency per call, seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake Gemini latency per call, seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout, seconds")
+    parser.add_argument("--seed-timeout", type=float, default=300.0, help="How long to wait for seed analyses")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the users' choices")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    parser.add_argument("--host", default="127.0.0.1", help="serve: bind address")
+    parser.add_argument("--port", type=int, default=8000, help="serve: port")
+    args = parser.parse_args(argv)
+    if args.json_path:
+        args.json_path = os.path.abspath(args.json_path) # The in-process target changes directory
+
+    if args.command == "serve":
+        serve(args)
+        return 0
+
+    app = stop_event = None
+    if not args.url:
+        app, stop_event = start_in_process(args)
+    try:
+        report = asyncio.run(run_load(args, app))
+    finally:
+        if stop_event:
+            stop_event.set()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["error_rate"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
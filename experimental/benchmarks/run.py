@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import tempfile
+
+# Benchmark suite with stored baselines; run it before deploys.
+#
+# Fixtures are the bundled mkbhd_analysis_input.json / mkbhd_batch_results.json;
+# Gemini is replaced by benchmarks.fakes.FakeGeminiClient and every database is
+# a throwaway file in a temp directory. Exits 1 if any metric is more than
+# --threshold worse than benchmarks/baselines.json.
+#
+#   python benchmarks/run.py                      # compare against baselines
+#   python benchmarks/run.py -k analytics --full  # include the 1M-comment datasets
+#   python benchmarks/run.py --save-baseline      # record this machine's numbers
+#
+# Baselines are machine-specific: re-record them on the machine that runs the check.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["benchmarks.bench_sentiment", "benchmarks.bench_db", "benchmarks.bench_api", "benchmarks.bench_serialization"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PulseGrow benchmark suite.")
+    parser.add_argument("-k", dest="pattern", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--full", action="store_true", help="Include the slow 1M-comment benchmarks")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Allowed regression as a fraction (default BENCH_THRESHOLD or 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to baselines.json instead of checking")
+    args = parser.parse_args(argv)
+
+    # Throwaway DBs: database URLs are relative to the working directory
+    sys.path.insert(0, ROOT)
+    os.chdir(tempfile.mkdtemp(prefix="pulsegrow-bench-"))
+    os.environ.setdefault("COMMENT_SPOOL_DIR", "")
+
+    import importlib
+    from benchmarks import harness
+    for module in MODULES:
+        importlib.import_module(module)
+
+    threshold = harness.DEFAULT_THRESHOLD if args.threshold is None else args.threshold
+    baselines = harness.load_baselines()
+    selected = [b for b in harness.BENCHMARKS if args.pattern in b.name and (args.full or not b.full_only)]
+
+    results, regressions = {}, []
+    print(f"{'benchmark':<58} {'value':>12} {'unit':<11} {'baseline':>12} {'change':>8}")
+    for bench in selected:
+        for name, metric in harness.run_benchmark(bench).items():
+            results[name] = metric
+            baseline = baselines.get(name)
+            change, regressed = harness.compare(metric, baseline, threshold)
+            base_text = f"{baseline['value']:>12.2f}" if baseline else f"{'-':>12}"
+            change_text = f"{change * 100:>+7.1f}%" if change is not None else f"{'new':>8}"
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<58} {metric['value']:>12.2f} {metric['unit']:<11} {base_text} {change_text}{flag}", flush=True)
+            if regressed:
+                regressions.append(name)
+
+    if args.save_baseline:
+        harness.save_baselines(results)
+        print(f"Saved {len(results)} metrics to {harness.BASELINES_PATH}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"No regressions beyond {threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
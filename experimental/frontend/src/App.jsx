@@ -36,8 +36,8 @@ function App() {
       const data = await res.json();
       setActiveChannel(data);
 
-      // Fetch videos
-      const vidRes = await fetch(`http://localhost:8000/api/channel/${query}/videos`);
+      // Fetch videos (Gemini top-50 insights load per card, when expanded)
+      const vidRes = await fetch(`http://localhost:8000/api/channel/${query}/videos?include=distribution`);
       if (vidRes.ok) {
         const vData = await vidRes.json();
         // Sort by Date Descending
@@ -68,7 +68,7 @@ function App() {
 
       if (hasProcessing && channelId) {
         // Silent refresh
-        fetch(`http://localhost:8000/api/channel/${channelId}/videos`)
+        fetch(`http://localhost:8000/api/channel/${channelId}/videos?include=distribution`)
           .then(res => {
             if (res.ok) return res.json();
             throw new Error('Failed to poll');
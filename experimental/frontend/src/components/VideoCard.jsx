@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { GeminiInsights } from './GeminiInsights';
 import './VideoCard.css';
 
@@ -6,6 +6,45 @@ export function VideoCard({ video, onAnalyze }) {
     const isAnalyzed = video.analysis_status === 'completed';
     const isProcessing = video.analysis_status === 'processing';
 
+    // Gemini top-50 insights cost an LLM call, so they load when the card is expanded
+    const [expanded, setExpanded] = useState(false);
+    const [top50, setTop50] = useState(null);
+    const [top50Loading, setTop50Loading] = useState(false);
+
+    useEffect(() => {
+        // A fresh analysis (SSE) already carries them
+        if (video.top_50_analysis) {
+            setTop50(video.top_50_analysis);
+            setExpanded(true);
+        }
+    }, [video.top_50_analysis]);
+
+    useEffect(() => {
+        // Re-analysis makes loaded insights stale
+        if (!isAnalyzed) setTop50(null);
+    }, [isAnalyzed]);
+
+    const toggleInsights = async (e) => {
+        e.stopPropagation();
+        if (expanded) {
+            setExpanded(false);
+            return;
+        }
+        setExpanded(true);
+        if (top50) return;
+        setTop50Loading(true);
+        try {
+            const res = await fetch(`http://localhost:8000/api/video/${video.id}?include=top_50`);
+            if (!res.ok) throw new Error('Failed to load insights');
+            const data = await res.json();
+            setTop50(data.top_50_analysis || { error: 'No insights available for this video yet.' });
+        } catch (err) {
+            setTop50({ error: err.message });
+        } finally {
+            setTop50Loading(false);
+        }
+    };
+
     return (
         <div className={`video-card horizontal ${isAnalyzed ? 'analyzed' : ''}`}>
             <div className="card-media-small">
@@ -41,8 +80,11 @@ export function VideoCard({ video, onAnalyze }) {
 
                     ) : (
                         <div className="analysis-simple-container">
-                            {video.top_50_analysis && (
-                                <GeminiInsights data={video.top_50_analysis} />
+                            <button className="insights-toggle-btn" onClick={toggleInsights} disabled={top50Loading}>
+                                {top50Loading ? 'Loading insights...' : expanded ? 'Hide AI insights' : '✨ Show AI insights'}
+                            </button>
+                            {expanded && top50 && (
+                                <GeminiInsights data={top50} />
                             )}
 
                             <button
@@ -0,0 +1,358 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import re
+import zlib
+
+from backend.services.aggregates import ChannelAggregate, DEFAULT_TOPK_CAPACITY
+
+# Streaming, sharded, resumable batch pipeline (replaces batch_analysis.py + aggregate_results.py).
+#
+# Input is read incrementally (a top-level JSON array, or JSONL with one video per
+# line), and every analyzed batch is appended to a JSONL results file as soon as it
+# finishes, so memory stays at about one video and an interrupted run resumes from
+# the last completed batch.
+#
+#   python pipeline.py analyze mkbhd_analysis_input.json -o mkbhd_batch_results -p 4
+#   python pipeline.py aggregate mkbhd_batch_results -o mkbhd_aggregation_results.json
+#   python pipeline.py aggregate mkbhd_batch_results.json -o mkbhd_aggregation_results.json  (legacy array output)
+#   python pipeline.py run mkbhd_analysis_input.json -o mkbhd_batch_results --summary mkbhd_aggregation_results.json
+
+BATCH_SIZE = 200
+READ_CHUNK = 1 << 20 # Bytes per read when streaming a JSON array
+AGGREGATE_STATE = "aggregate-state.json" # Per-file partial aggregates and read offsets
+STOP_WORDS = ['this', 'that', 'with', 'from', 'have', 'your', 'about', 'really']
+EMOJI_PATTERN = re.compile(r'[\U00010000-\U0010ffff]', flags=re.UNICODE)
+
+
+# --- Input ---
+
+def iter_json_array(path: str):
+    """Yields the elements of a top-level JSON array one at a time without loading the file."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace and separators up to the next element
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                chunk = f.read(READ_CHUNK)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+
+            if pos >= len(buffer):
+                return
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Element spans the buffer boundary: read more and retry
+                chunk = f.read(READ_CHUNK)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield item
+            pos = end
+
+
+def iter_videos(path: str):
+    if path.endswith(".jsonl"):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from iter_json_array(path)
+
+
+def iter_batches(path: str, batch_size: int = BATCH_SIZE):
+    """Yields (video_index, video, batch_id, comments) in input order."""
+    for video_index, video in enumerate(iter_videos(path)):
+        comments = video['comments']
+        for i in range(0, len(comments), batch_size):
+            yield video_index, video, f"{video['video_id']}_batch_{i // batch_size}", comments[i:i + batch_size]
+
+
+def shard_of(batch_id: str, shards: int) -> int:
+    # Stable across processes and runs (unlike hash())
+    return zlib.crc32(batch_id.encode('utf-8')) % shards
+
+
+# --- Analysis ---
+
+def analyze_batch(sentiment_service, video_index, video_id, video_title, batch_id, comments):
+    """VADER sentiment, emoji flag and 1-3 topics per comment (the simulated Gemini batch)."""
+    results = []
+    for c in comments:
+        text = c.get('text', '')
+        analysis = sentiment_service.analyze_comment(text)
+        vader = analysis.get('vader', {})
+
+        words = re.findall(r'\b\w{4,}\b', text.lower())
+        topics = list(set([w for w in words if w not in STOP_WORDS]))[:3]
+
+        results.append({
+            "comment_id": c.get('comment_id', ''),
+            "sentiment_label": vader.get('sentiment', 'neutral'),
+            "sentiment_score": vader.get('score', 0.0),
+            "topics": topics,
+            "emoji_detected": bool(EMOJI_PATTERN.search(text))
+        })
+
+    return {
+        "video_id": video_id,
+        "video_title": video_title,
+        "video_index": video_index,
+        "batch_id": batch_id,
+        "results": results
+    }
+
+
+# --- Results ---
+
+def shard_path(out_dir: str, shard: int) -> str:
+    return os.path.join(out_dir, f"results-{shard:03d}.jsonl")
+
+
+def iter_result_files(out_dir: str):
+    return sorted(glob.glob(os.path.join(out_dir, "results-*.jsonl")))
+
+
+def iter_results(path: str):
+    """Yields batch records, skipping a torn last line left by an interrupted write."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def repair_tail(path: str):
+    """Truncates an incomplete last record so appends start on a clean line."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        good = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            good += len(line)
+        f.truncate(good)
+
+
+def completed_batches(out_dir: str) -> set:
+    done = set()
+    for path in iter_result_files(out_dir):
+        for record in iter_results(path):
+            done.add(record['batch_id'])
+    return done
+
+
+def run_shard(input_path: str, out_dir: str, shard: int = 0, shards: int = 1, batch_size: int = BATCH_SIZE):
+    """Analyzes this shard's batches, appending each to its own results file as it completes."""
+    from backend.services.sentiment_service import LocalSentimentService
+
+    path = shard_path(out_dir, shard)
+    repair_tail(path)
+    done = completed_batches(out_dir) # Every shard's output counts, so the shard count may change between runs
+    sentiment_service = LocalSentimentService()
+
+    processed = skipped = 0
+    with open(path, 'a', encoding='utf-8') as out:
+        for video_index, video, batch_id, comments in iter_batches(input_path, batch_size):
+            if shard_of(batch_id, shards) != shard:
+                continue
+            if batch_id in done:
+                skipped += 1
+                continue
+            print(f"[shard {shard}/{shards}] Processing batch {batch_id} for {video['video_title']}...")
+            record = analyze_batch(
+                sentiment_service, video_index, video['video_id'], video['video_title'], batch_id, comments
+            )
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            processed += 1
+
+    print(f"[shard {shard}/{shards}] Done: {processed} batches processed, {skipped} already completed.")
+    return processed
+
+
+def analyze(input_path: str, out_dir: str, processes: int = 1, batch_size: int = BATCH_SIZE):
+    os.makedirs(out_dir, exist_ok=True)
+    if processes <= 1:
+        return run_shard(input_path, out_dir, 0, 1, batch_size)
+
+    mp = multiprocessing.get_context("spawn")
+    with mp.Pool(processes) as pool:
+        counts = pool.starmap(
+            run_shard, [(input_path, out_dir, shard, processes, batch_size) for shard in range(processes)]
+        )
+    print(f"Analysis complete. Processed {sum(counts)} batches across {processes} shards.")
+    return sum(counts)
+
+
+# --- Aggregation ---
+
+def aggregate_file(path: str, offset: int = 0, partial: dict = None, topk_capacity: int = DEFAULT_TOPK_CAPACITY):
+    """
+    Map step: folds the records after byte `offset` of one results file into its
+    partial aggregate. Returns (path, new_offset, partial dict); a torn last line is
+    left for the next run.
+    """
+    agg = ChannelAggregate.from_dict(partial) if partial else ChannelAggregate(topk_capacity)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            try:
+                agg.add_batch(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return path, offset, agg.to_dict()
+
+
+def _aggregate_file_task(args):
+    return aggregate_file(*args)
+
+
+def aggregate_array(path: str, topk_capacity: int = DEFAULT_TOPK_CAPACITY) -> ChannelAggregate:
+    """
+    Folds a legacy results file (one JSON array of batch records, as batch_analysis.py
+    wrote before the pipeline) streamed like the input. Its records carry no
+    video_index, so videos keep the order they first appear in.
+    """
+    agg = ChannelAggregate(topk_capacity)
+    order = {}
+    for record in iter_json_array(path):
+        record.setdefault('video_index', order.setdefault(record['video_id'], len(order)))
+        agg.add_batch(record)
+    return agg
+
+
+def aggregate_dir(out_dir: str, processes: int = 1, topk_capacity: int = DEFAULT_TOPK_CAPACITY,
+                  incremental: bool = True) -> ChannelAggregate:
+    """
+    Map-reduce over the results files: each file is folded into a mergeable partial
+    (in parallel with `processes`), then partials are merged.
+    With `incremental`, partials and offsets are kept in AGGREGATE_STATE so a re-run
+    only reads batches appended since the last aggregation.
+    """
+    state_path = os.path.join(out_dir, AGGREGATE_STATE)
+    state = {}
+    if incremental and os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+        if state.get("topk_capacity") != topk_capacity:
+            state = {}
+
+    tasks = []
+    for path in iter_result_files(out_dir):
+        entry = state.get("files", {}).get(os.path.basename(path))
+        if entry and entry["offset"] <= os.path.getsize(path):
+            tasks.append((path, entry["offset"], entry["partial"], topk_capacity))
+        else:
+            tasks.append((path, 0, None, topk_capacity)) # New file, or rewritten since the last run
+
+    if processes > 1 and len(tasks) > 1:
+        mp = multiprocessing.get_context("spawn")
+        with mp.Pool(min(processes, len(tasks))) as pool:
+            partials = pool.map(_aggregate_file_task, tasks)
+    else:
+        partials = [aggregate_file(*task) for task in tasks]
+
+    if incremental:
+        state = {
+            "topk_capacity": topk_capacity,
+            "files": {
+                os.path.basename(path): {"offset": offset, "partial": partial}
+                for path, offset, partial in partials
+            },
+        }
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    total = ChannelAggregate(topk_capacity)
+    for _, _, partial in partials:
+        total.merge(ChannelAggregate.from_dict(partial))
+    return total
+
+
+def aggregate(results: str, summary_path: str = None, processes: int = 1,
+              topk_capacity: int = DEFAULT_TOPK_CAPACITY, incremental: bool = True):
+    """
+    Summarizes a results directory (results-*.jsonl, see aggregate_dir) or a legacy
+    .json array file (see aggregate_array; `processes` and `incremental` don't apply).
+    """
+    if results.endswith(".json"):
+        total = aggregate_array(results, topk_capacity)
+    else:
+        total = aggregate_dir(results, processes, topk_capacity, incremental)
+    output = total.summary()
+
+    if summary_path:
+        with open(summary_path, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"Aggregation complete: {len(output['videos'])} videos -> {summary_path}")
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming, sharded, resumable comment analysis pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_analyze = sub.add_parser("analyze", help="Analyze comments into JSONL batch results")
+    p_analyze.add_argument("input", help="Input .json array or .jsonl of {video_id, video_title, comments}")
+    p_analyze.add_argument("-o", "--out-dir", required=True, help="Directory for results-*.jsonl")
+    p_analyze.add_argument("-p", "--processes", type=int, default=1, help="Shards processed in parallel")
+    p_analyze.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    p_aggregate = sub.add_parser("aggregate", help="Summarize JSONL batch results")
+    p_aggregate.add_argument("results", help="Directory with results-*.jsonl, or a legacy .json array of batch results")
+    p_aggregate.add_argument("-o", "--output", required=True, help="Summary JSON file")
+    p_aggregate.add_argument("-p", "--processes", type=int, default=1, help="Results files folded in parallel")
+    p_aggregate.add_argument("--topk-capacity", type=int, default=DEFAULT_TOPK_CAPACITY,
+                             help="Topic counters kept per video (bounds memory)")
+    p_aggregate.add_argument("--full", action="store_true", help="Ignore saved partials and re-read everything")
+
+    p_run = sub.add_parser("run", help="analyze, then aggregate")
+    p_run.add_argument("input")
+    p_run.add_argument("-o", "--out-dir", required=True)
+    p_run.add_argument("-p", "--processes", type=int, default=1)
+    p_run.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p_run.add_argument("--summary", required=True, help="Summary JSON file")
+    p_run.add_argument("--topk-capacity", type=int, default=DEFAULT_TOPK_CAPACITY)
+
+    args = parser.parse_args(argv)
+    if args.command in ("analyze", "run"):
+        analyze(args.input, args.out_dir, args.processes, args.batch_size)
+    if args.command == "aggregate":
+        aggregate(args.results, args.output, args.processes, args.topk_capacity, incremental=not args.full)
+    elif args.command == "run":
+        aggregate(args.out_dir, args.summary, args.processes, args.topk_capacity)
+
+
+if __name__ == "__main__":
+    main()
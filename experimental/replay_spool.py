@@ -0,0 +1,38 @@
+import sys
+from backend.database import SessionLocal, engine, Base
+import backend.models.models  # Register models with Base
+from backend.models.models import Channel
+from backend.services.analytics_service import AnalyticsService
+from backend.services.spool_service import CommentSpool, SpoolReplaySource
+
+# Offline re-analysis: feeds the analysis pipeline from the raw page spool instead of the
+# YouTube API. Use after changing the lexicon, prompts or scoring. Costs zero quota.
+# Replays the channel analysis fetch (each video's top threads in relevance order);
+# videos whose spool doesn't cover that fetch are marked 'error' (SpoolMiss).
+#
+#   python replay_spool.py                 # every channel in the DB
+#   python replay_spool.py UCBJycsmduvYEL83R_U4JriQ [...]
+
+def replay(channel_ids=None):
+    Base.metadata.create_all(bind=engine)
+    spool = CommentSpool.from_env()
+    if not spool:
+        print("COMMENT_SPOOL_DIR is disabled; nothing to replay.")
+        return
+
+    db = SessionLocal()
+    try:
+        if not channel_ids:
+            channel_ids = [c.id for c in db.query(Channel).all()]
+
+        source = SpoolReplaySource(spool)
+        for channel_id in channel_ids:
+            print(f"Replaying spooled comments for channel {channel_id}...")
+            AnalyticsService(db).run_background_analysis(channel_id, comment_source=source)
+    finally:
+        db.close()
+
+    print(f"Replay complete for {len(channel_ids)} channel(s).")
+
+if __name__ == "__main__":
+    replay(sys.argv[1:])
@@ -1,2 +1,11 @@
 #!/bin/bash
+# API plus one analysis worker. The API only queues analyses; the worker runs them.
+# WORKERS=4 ./run_backend.sh for more worker processes, WORKERS=0 if you run
+# ./pulsegrow-worker yourself (or set WORKER_PROCESSES to embed workers in the API).
+cd "$(dirname "$0")"
+if [ "${WORKERS:-1}" -gt 0 ]; then
+    ./pulsegrow-worker -n "${WORKERS:-1}" &
+    WORKER_PID=$!
+    trap 'kill $WORKER_PID 2>/dev/null; wait $WORKER_PID' EXIT
+fi
 KMP_DUPLICATE_LIB_OK=TRUE .venv/bin/python -m uvicorn backend.main:app --reload --port 8000
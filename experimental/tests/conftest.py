@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRATCH = tempfile.mkdtemp(prefix="pulsegrow-tests-")
+os.environ.setdefault("COMMENT_SPOOL_DIR", "")
+for name in ("METRICS_DIR", "PROFILE_DIR", "TRACE_DIR"):
+    os.environ.setdefault(name, os.path.join(SCRATCH, name.lower()))
+
+# backend.database opens ./pulsegrow.db, resolved against the working directory when
+# the engines are created: create them in a scratch directory so the suite never
+# touches a real database
+_cwd = os.getcwd()
+os.chdir(SCRATCH)
+try:
+    from backend.database import Base, SessionLocal, engine
+    import backend.models.models # Register models with Base
+    from backend.services import response_cache, timeseries, topic_sketches # Register the flush hooks
+finally:
+    os.chdir(_cwd)
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    response_cache.response_cache.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def app():
+    """The API routes mounted at /api, as in backend.main."""
+    from fastapi import FastAPI
+    from backend.api import endpoints
+
+    app = FastAPI()
+    app.include_router(endpoints.router, prefix="/api")
+    return app
+
+
+@pytest.fixture
+def api(app):
+    """Sends a request through the API routes in-process: api("GET", "/api/...", **httpx_kwargs)."""
+    def request(method: str, url: str, client=("127.0.0.1", 50000), **kwargs) -> httpx.Response:
+        async def send():
+            transport = httpx.ASGITransport(app=app, client=client)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.request(method, url, **kwargs)
+        return asyncio.run(send())
+    return request
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from backend.api import endpoints
+from backend.services import admission as admission_module
+from backend.services.admission import AdmissionController, Overloaded
+from backend.services.quota_service import QuotaExceeded
+
+
+class _FakeQueue:
+    def __init__(self, queued=0, finished=0):
+        self.queued = queued
+        self.finished = finished
+
+    def backlog(self, window_seconds):
+        return {("analyze_video", "queued"): self.queued}, self.finished
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(admission_module, "MAX_QUEUED_JOBS", 100)
+    monkeypatch.setattr(admission_module, "BACKGROUND_SHARE", 0.5)
+    monkeypatch.setattr(admission_module, "CLIENT_RATE", 0)
+
+
+def admit(controller, priority, client="c", **jobs):
+    asyncio.run(controller.admit(client, priority, jobs))
+
+
+def test_background_requests_are_shed_before_interactive_ones():
+    controller = AdmissionController(_FakeQueue(queued=60, finished=30))
+    admit(controller, "interactive", analyze_video=10)
+    with pytest.raises(Overloaded) as shed:
+        admit(controller, "backfill", analyze_video=1)
+    assert shed.value.resource == "jobs"
+    # 21 jobs over the background limit at 30 finished per 300s
+    assert shed.value.retry_after == pytest.approx(210)
+
+
+def test_admitted_jobs_count_until_the_next_sample():
+    controller = AdmissionController(_FakeQueue(queued=90))
+    admit(controller, "channel", analyze_video=10)
+    with pytest.raises(Overloaded) as full:
+        admit(controller, "channel", analyze_video=1)
+    assert full.value.retry_after == admission_module.FALLBACK_RETRY_AFTER # Nothing drained to project from
+
+
+def test_projected_quota_use_rejects_until_the_daily_reset():
+    controller = AdmissionController(_FakeQueue(queued=1))
+    controller._refresh()
+    controller._load["quota_headroom"] = {"interactive": 15, "background": 0}
+    admit(controller, "interactive", analyze_video=0)
+    with pytest.raises(QuotaExceeded) as exhausted:
+        admit(controller, "refresh", refresh_channel=1)
+    assert exhausted.value.retry_after == controller._load["quota_resets_in"]
+
+
+def test_client_bucket_admits_a_burst_then_rejects(monkeypatch):
+    monkeypatch.setattr(admission_module, "CLIENT_RATE", 0.5)
+    monkeypatch.setattr(admission_module, "CLIENT_BURST", 3)
+    controller = AdmissionController(_FakeQueue())
+    admit(controller, "channel", client="a", analyze_channel=5) # Any positive balance admits, then runs into debt
+    with pytest.raises(Overloaded) as limited:
+        admit(controller, "channel", client="a", analyze_channel=1)
+    assert limited.value.resource == "client"
+    assert limited.value.retry_after == pytest.approx(6, abs=0.1)
+    admit(controller, "channel", client="b", analyze_channel=1)
+
+
+def test_rejected_analyze_requests_get_429_with_retry_after(api, monkeypatch):
+    monkeypatch.setattr(endpoints, "admission", AdmissionController(_FakeQueue(queued=100)))
+    response = api("POST", "/api/channel/ch1/analyze")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(int(admission_module.FALLBACK_RETRY_AFTER))
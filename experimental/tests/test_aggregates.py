@@ -0,0 +1,68 @@
+import pytest
+
+from backend.services.aggregates import ChannelAggregate, merge_ranges
+
+
+def _batch(video, number, labels=("positive",), index=0):
+    return {
+        "video_id": video,
+        "video_title": video.upper(),
+        "video_index": index,
+        "batch_id": f"{video}_batch_{number}",
+        "results": [
+            {"sentiment_label": label, "sentiment_score": 0.5, "topics": ["audio"], "emoji_detected": False}
+            for label in labels
+        ],
+    }
+
+
+def _partial(*batches):
+    agg = ChannelAggregate()
+    for batch in batches:
+        agg.add_batch(batch)
+    return agg
+
+
+def test_merge_ranges_joins_neighbours_and_detects_overlap():
+    assert merge_ranges([[0, 2]], [[3, 3]]) == [[0, 3]]
+    assert merge_ranges([[5, 6]], [[0, 1], [3, 3]]) == [[0, 1], [3, 3], [5, 6]]
+    assert merge_ranges([[0, 2]], [[2, 4]]) is None
+
+
+def test_partials_merge_in_any_order():
+    batches = [_batch("a", n, index=0) for n in range(4)] + [_batch("b", n, ("negative",), index=1) for n in range(3)]
+    whole = _partial(*batches).summary()
+    left, middle, right = _partial(*batches[:2]), _partial(*batches[2:5]), _partial(*batches[5:])
+    assert ChannelAggregate().merge(right).merge(left).merge(middle).summary() == whole
+
+    roundtrip = ChannelAggregate.from_dict(_partial(*batches).to_dict())
+    assert roundtrip.summary() == whole
+    assert roundtrip.videos["a"].batches == [[0, 3]]
+
+
+def test_duplicates_are_skipped_and_overlapping_partials_rejected():
+    agg = _partial(_batch("a", 0), _batch("a", 1))
+    assert agg.add_batch(_batch("a", 1)) is False
+    assert agg.videos["a"].total_comments == 2
+
+    before = agg.summary()
+    with pytest.raises(ValueError):
+        agg.merge(_partial(_batch("b", 0), _batch("a", 1)))
+    assert agg.summary() == before # A rejected merge changes nothing
+
+
+def test_state_stays_bounded_for_batches_read_in_order():
+    agg = _partial(*(_batch("a", n) for n in range(1000)))
+    assert agg.videos["a"].batches == [[0, 999]]
+    assert "batch_ids" not in agg.to_dict()
+
+
+def test_partials_saved_with_batch_ids_still_load():
+    saved = _partial(_batch("a", 0), _batch("a", 2)).to_dict()
+    for video in saved["videos"]:
+        del video["batches"]
+    saved["batch_ids"] = ["a_batch_0", "a_batch_2"]
+    agg = ChannelAggregate.from_dict(saved)
+    assert agg.videos["a"].batches == [[0, 0], [2, 2]]
+    assert agg.add_batch(_batch("a", 2)) is False
+    assert agg.add_batch(_batch("a", 1)) is True
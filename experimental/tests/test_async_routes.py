@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from backend.models.models import Channel
+from backend.services import scheduler
+from backend.services.metrics import EXECUTOR_BUSY
+
+
+def _busy():
+    return EXECUTOR_BUSY.samples().get(("api_blocking",), 0)
+
+
+def test_run_blocking_counts_busy_workers_and_raises_errors():
+    gate, started = threading.Event(), threading.Event()
+
+    def wait():
+        started.set()
+        gate.wait(5)
+        return threading.current_thread().name
+
+    async def run():
+        task = asyncio.ensure_future(scheduler.run_blocking(wait))
+        await asyncio.to_thread(started.wait, 5)
+        busy = _busy()
+        gate.set()
+        return busy, await task
+
+    busy, thread_name = asyncio.run(run())
+    assert busy == 1
+    assert thread_name.startswith("api-blocking")
+    assert _busy() == 0
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(scheduler.run_blocking(lambda: 1 / 0))
+
+
+def test_light_routes_answer_while_every_blocking_worker_is_held(app, db):
+    db.add(Channel(id="ch1", title="One"))
+    db.commit()
+    gate = threading.Event()
+
+    async def run():
+        held = [asyncio.ensure_future(scheduler.run_blocking(gate.wait, 5)) for _ in range(scheduler.BLOCKING_WORKERS + 2)]
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                response = await asyncio.wait_for(http.get("/api/channels"), 2)
+        finally:
+            gate.set()
+            await asyncio.gather(*held)
+        return response
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == ["ch1"]
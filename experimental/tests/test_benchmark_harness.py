@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from benchmarks import harness
+
+
+def test_compare_flags_regressions_in_either_direction():
+    faster = {"value": 130.0, "higher_is_better": True}
+    slower = {"value": 70.0, "higher_is_better": True}
+    assert harness.compare(faster, {"value": 100.0}, 0.25) == (pytest.approx(0.3), False)
+    assert harness.compare(slower, {"value": 100.0}, 0.25) == (pytest.approx(-0.3), True)
+
+    latency = {"value": 12.0, "higher_is_better": False} # ms
+    assert harness.compare(latency, {"value": 10.0}, 0.25) == (pytest.approx(-0.2), False)
+    assert harness.compare(latency, {"value": 9.0}, 0.25)[1] is True
+    assert harness.compare(latency, None) == (None, False) # New metric
+
+
+def test_run_benchmark_reports_best_throughput_and_latency_percentiles():
+    throughput = harness.Benchmark("ops", lambda: lambda: 1000, "throughput", "ops/s", repeat=2, full_only=False)
+    assert harness.run_benchmark(throughput)["ops"]["higher_is_better"] is True
+
+    samples = [0.001 * n for n in range(1, 101)]
+    latency = harness.Benchmark("route", lambda: lambda: samples, "latency", "ms", repeat=2, full_only=False)
+    metrics = harness.run_benchmark(latency)
+    assert metrics["route.p50"]["value"] == pytest.approx(50)
+    assert metrics["route.p99"]["value"] == pytest.approx(99)
+
+
+def test_saved_baselines_merge_with_existing_ones(tmp_path):
+    path = str(tmp_path / "baselines.json")
+    harness.save_baselines({"a": {"value": 1.0}}, path)
+    harness.save_baselines({"b": {"value": 2.0}}, path)
+    assert set(harness.load_baselines(path)) == {"a", "b"}
+    harness.save_baselines({"c": {"value": 3.0}}, path, merge=False)
+    with open(path) as f:
+        assert json.load(f) == {"metrics": {"c": {"value": 3.0}}}
+    assert harness.load_baselines(str(tmp_path / "missing.json")) == {}
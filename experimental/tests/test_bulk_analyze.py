@@ -0,0 +1,90 @@
+import datetime
+
+import pytest
+
+from backend.api import endpoints
+from backend.models.models import Channel, Job, TrackedChannel, Video
+from backend.services import admission
+from backend.services.youtube_service import YouTubeService
+
+
+class _Request:
+    methodId = "youtube.channels.list"
+
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class _FakeChannels:
+    """channels().list over a fixed set of channels; @mkbhd is the handle of UCmkbhd."""
+
+    def __init__(self, known):
+        self.known = set(known)
+        self.calls = []
+
+    def channels(self):
+        return self
+
+    def list(self, part, id=None, forHandle=None, maxResults=None):
+        self.calls.append(id or forHandle)
+        ids = ["UCmkbhd"] if forHandle == "@mkbhd" else (id or "").split(",")
+        items = [
+            {"id": c, "snippet": {"title": f"Title {c}", "thumbnails": {"default": {"url": f"https://example.com/{c}.png"}}}}
+            for c in ids if c in self.known
+        ]
+        return _Request({"items": items})
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    fake = _FakeChannels({f"UC{n:03d}" for n in range(120)} | {"UCmkbhd"})
+    service = YouTubeService(spool=None, priority="interactive")
+    service.youtube = fake
+    monkeypatch.setattr(endpoints, "get_youtube_service", lambda: service)
+    monkeypatch.setattr(admission, "CLIENT_RATE", 0)
+    return fake
+
+
+def test_ids_are_looked_up_fifty_per_call(youtube):
+    service = endpoints.get_youtube_service()
+    inputs = [f"UC{n:03d}" for n in range(120)] + ["@mkbhd", "https://www.youtube.com/channel/UC007"]
+    details = service.get_channels_details(inputs)
+    assert [len(call.split(",")) for call in youtube.calls[:3]] == [50, 50, 20]
+    assert youtube.calls[3:] == ["@mkbhd"]
+    assert details["@mkbhd"]["id"] == "UCmkbhd"
+    assert details["https://www.youtube.com/channel/UC007"]["id"] == "UC007"
+
+
+def test_bulk_analyze_queues_new_channels_and_reports_the_rest(db, api, youtube):
+    recent = datetime.datetime.utcnow()
+    db.add(Channel(id="UC001", title="Fresh", last_updated=recent))
+    db.add(Video(id="v1", channel_id="UC001", title="Done", analysis_status="completed"))
+    db.commit()
+
+    body = {"channels": ["UCmkbhd", "@mkbhd", "UC001", "UCgone", "UC002", " UC002 "]}
+    response = api("POST", "/api/channels/analyze", json=body)
+    assert response.status_code == 200
+    result = response.json()
+    statuses = {r["input"]: r["status"] for r in result["results"]}
+    assert statuses == {"UCmkbhd": "queued", "@mkbhd": "duplicate", "UC001": "fresh", "UCgone": "not_found", "UC002": "queued"}
+    assert result["queued"] == 2
+    by_input = {r["input"]: r for r in result["results"]}
+    assert by_input["@mkbhd"]["job_id"] == by_input["UCmkbhd"]["job_id"]
+
+    db.expire_all()
+    assert {job.dedup_key for job in db.query(Job)} == {"channel:UCmkbhd", "channel:UC002"}
+    assert {t.channel_id for t in db.query(TrackedChannel)} == {"UCmkbhd", "UC002"}
+
+    forced = api("POST", "/api/channels/analyze", json={"channels": ["UC001", "UCmkbhd"], "force": True}).json()
+    assert [r["status"] for r in forced["results"]] == ["queued", "queued"]
+    assert forced["results"][1]["job_id"] == by_input["UCmkbhd"]["job_id"] # The active job is reused
+
+
+def test_bulk_analyze_rejects_empty_and_oversized_requests(api, youtube, monkeypatch):
+    monkeypatch.setattr(endpoints, "BULK_ANALYZE_MAX", 2)
+    assert api("POST", "/api/channels/analyze", json={"channels": [" "]}).status_code == 400
+    assert api("POST", "/api/channels/analyze", json={"channels": ["a", "b", "c"]}).status_code == 400
+    assert youtube.calls == []
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services import event_bus as event_bus_module
+from backend.services.event_bus import EventBus
+
+
+def _producer(events, gate=None, runs=None):
+    def produce(flight):
+        if runs is not None:
+            runs.append(flight.id)
+        for event in events:
+            if gate is not None:
+                gate.wait(5)
+            if flight.cancel_event.is_set():
+                return
+            yield event
+    return produce
+
+
+def _collect(flight, last_event_id=None, limit=None):
+    async def collect():
+        seen = []
+        async for event_id, event in flight.asubscribe(last_event_id):
+            seen.append((event_id, event))
+            if limit and len(seen) >= limit:
+                break
+        return seen
+    return asyncio.run(collect())
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_concurrent_viewers_share_one_run():
+    bus, runs, gate = EventBus(), [], threading.Event()
+    first, started = bus.attach("video:v1", _producer([{"n": 0}, {"n": 1}], gate, runs))
+    second, joined = bus.attach("video:v1", _producer([{"other": True}], runs=runs))
+    assert (started, joined) == (True, False)
+    assert second is first
+
+    results = {}
+    viewers = [threading.Thread(target=lambda i=i: results.__setitem__(i, _collect(first))) for i in range(3)]
+    for viewer in viewers:
+        viewer.start()
+    gate.set()
+    for viewer in viewers:
+        viewer.join(5)
+    assert len(runs) == 1
+    assert results[0] == results[1] == results[2] == [(f"{first.id}:0", {"n": 0}), (f"{first.id}:1", {"n": 1})]
+
+
+def test_last_event_id_resumes_after_the_last_seen_event():
+    bus = EventBus()
+    flight, _ = bus.attach("video:v1", _producer([{"n": n} for n in range(4)]))
+    _wait_until(lambda: flight.done)
+
+    assert [e["n"] for _, e in _collect(flight, f"{flight.id}:1")] == [2, 3]
+    assert [e["n"] for _, e in _collect(flight, "0123456789ab:1")] == [0, 1, 2, 3] # Another run's id starts over
+
+    resumed, started = bus.attach("video:v1", _producer([]), f"{flight.id}:3")
+    assert resumed is flight and not started
+    _, restarted = bus.attach("video:v1", _producer([]))
+    assert restarted # A finished run is only reused to resume it
+
+
+def _until_cancelled(flight):
+    yield {"n": 0}
+    flight.cancel_event.wait(5)
+
+
+def test_run_is_cancelled_after_the_last_viewer_leaves(monkeypatch):
+    monkeypatch.setattr(event_bus_module, "CANCEL_GRACE_SECONDS", 0.05)
+    flight, _ = EventBus().attach("video:v1", _until_cancelled)
+    assert [event for _, event in _collect(flight, limit=1)] == [{"n": 0}] # Then disconnects
+    _wait_until(flight.cancel_event.is_set)
+    _wait_until(lambda: flight.done)
+
+
+def test_reconnects_within_the_grace_period_and_detached_runs_keep_going(monkeypatch):
+    monkeypatch.setattr(event_bus_module, "CANCEL_GRACE_SECONDS", 0.1)
+    bus = EventBus()
+    flight, _ = bus.attach("video:v1", _until_cancelled)
+
+    async def reconnect():
+        first = flight.asubscribe()
+        await first.__anext__()
+        await first.aclose()
+        second = flight.asubscribe(f"{flight.id}:0") # EventSource reconnecting with Last-Event-ID
+        waiting = asyncio.ensure_future(second.__anext__())
+        await asyncio.sleep(0.3)
+        cancelled = flight.cancel_event.is_set()
+        waiting.cancel()
+        return cancelled
+
+    assert asyncio.run(reconnect()) is False
+    _wait_until(flight.cancel_event.is_set) # The reconnected viewer left too
+
+    detached, _ = bus.attach("video:v2", _until_cancelled, detach=True)
+    _collect(detached, limit=1)
+    time.sleep(0.3)
+    assert not detached.cancel_event.is_set()
+    detached.cancel_event.set() # Let the producer thread finish
+
+
+def test_call_shares_the_leaders_result_and_error():
+    bus, gate, calls = EventBus(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        gate.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(bus.call("channel:c1", slow))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: bus.stats()["calls_in_flight"] == 1 and calls)
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+    with pytest.raises(KeyError):
+        bus.call("channel:c1", lambda: {}["missing"])
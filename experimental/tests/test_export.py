@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.models.models import Channel, Comment, SentimentType, Video
+from backend.services import export_service
+
+
+@pytest.fixture
+def seeded(db):
+    db.add(Channel(id="ch1", title="One"))
+    db.add_all([
+        Video(id="v1", channel_id="ch1", title="A", published_at=datetime(2025, 1, 1)),
+        Video(id="v2", channel_id="ch1", title="B", published_at=datetime(2025, 1, 2)),
+        Video(id="v3", channel_id="ch1", title="No comments", published_at=datetime(2025, 1, 3)),
+    ])
+    db.add_all([
+        Comment(id="c1", video_id="v1", text='say "hi", ok', sentiment=SentimentType.POSITIVE, vader_score=0.6,
+                published_at=datetime(2025, 1, 4)),
+        Comment(id="c2", video_id="v1", text="second\nline", parent_id="c1", published_at=datetime(2025, 1, 5)),
+        Comment(id="c3", video_id="v2", text="other video", sentiment=SentimentType.NEGATIVE, published_at=datetime(2025, 1, 6)),
+    ])
+    db.commit()
+    return db
+
+
+def test_video_export_is_gzip_ndjson(seeded, api, monkeypatch):
+    monkeypatch.setattr(export_service, "EXPORT_CHUNK_ROWS", 1) # One gzip chunk per row
+    response = api("GET", "/api/video/v1/comments/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="comments-v1.ndjson.gz"' in response.headers["content-disposition"]
+
+    rows = {row["id"]: row for row in map(json.loads, gzip.decompress(response.content).decode().splitlines())}
+    assert set(rows) == {"c1", "c2"}
+    assert list(rows["c1"]) == export_service.COLUMNS
+    assert (rows["c1"]["sentiment"], rows["c1"]["vader_score"]) == ("positive", 0.6)
+    assert rows["c2"]["parent_id"] == "c1"
+
+
+def test_channel_export_is_gzip_csv(seeded, api):
+    response = api("GET", "/api/channel/ch1/comments/export?format=csv")
+    assert response.status_code == 200
+    reader = csv.DictReader(io.StringIO(gzip.decompress(response.content).decode()))
+    assert reader.fieldnames == export_service.COLUMNS
+    rows = {row["id"]: row for row in reader}
+    assert set(rows) == {"c1", "c2", "c3"}
+    assert rows["c1"]["text"] == 'say "hi", ok'
+    assert rows["c2"]["text"] == "second\nline"
+    assert rows["c3"]["sentiment"] == "negative"
+
+
+def test_csv_without_rows_still_has_its_header(seeded, api):
+    response = api("GET", "/api/video/v3/comments/export?format=csv")
+    assert gzip.decompress(response.content).decode().splitlines() == [",".join(export_service.COLUMNS)]
+    assert gzip.decompress(api("GET", "/api/video/v3/comments/export").content) == b""
+
+
+def test_unknown_format_and_missing_scope(seeded, api):
+    assert api("GET", "/api/video/v1/comments/export?format=xml").status_code == 400
+    assert api("GET", "/api/video/nope/comments/export").status_code == 404
+    assert api("GET", "/api/channel/nope/comments/export").status_code == 404
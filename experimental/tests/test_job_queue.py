@@ -0,0 +1,182 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from backend.database import SessionLocal
+from backend.models.models import Job
+from backend.services.job_queue import JobContext, JobQueue
+
+
+def _set(job_id, **values):
+    db = SessionLocal()
+    try:
+        db.execute(update(Job).where(Job.id == job_id).values(**values))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_enqueue_dedups_active_jobs():
+    queue = JobQueue()
+    first = queue.enqueue("analyze_video", {"video_id": "v1"}, dedup_key="video:v1")
+    assert queue.enqueue("analyze_video", {"video_id": "v1"}, dedup_key="video:v1").id == first.id
+
+    queue.cancel(first.id)
+    assert queue.enqueue("analyze_video", {"video_id": "v1"}, dedup_key="video:v1").id != first.id
+
+
+def test_enqueue_that_loses_the_race_returns_the_winner(monkeypatch):
+    queue = JobQueue()
+    winner = queue.enqueue("analyze_video", {"video_id": "v1"}, dedup_key="video:v1")
+    checks = []
+
+    def stale_check(dedup_key):
+        # The first check ran before the winner committed
+        checks.append(dedup_key)
+        return None if len(checks) == 1 else JobQueue.active_job(queue, dedup_key)
+
+    monkeypatch.setattr(queue, "active_job", stale_check)
+    assert queue.enqueue("analyze_video", {"video_id": "v1"}, dedup_key="video:v1").id == winner.id
+    assert len(checks) == 2
+
+
+def test_concurrent_enqueues_create_one_active_job():
+    queue = JobQueue()
+    barrier = threading.Barrier(8)
+    ids = []
+
+    def enqueue():
+        barrier.wait()
+        ids.append(queue.enqueue("analyze_channel", {"channel_id": "ch1"}, dedup_key="channel:ch1").id)
+
+    threads = [threading.Thread(target=enqueue) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(ids) == 8 and len(set(ids)) == 1
+
+
+def test_database_rejects_a_second_active_job_per_key():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {}, dedup_key="video:v1")
+    db = SessionLocal()
+    try:
+        db.add(Job(kind="analyze_video", dedup_key="video:v1"))
+        with pytest.raises(IntegrityError):
+            db.commit()
+        db.rollback()
+        _set(job.id, status="completed")
+        db.add(Job(kind="analyze_video", dedup_key="video:v1")) # Finished jobs don't count
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_lease_takes_highest_priority_and_only_once():
+    queue = JobQueue()
+    low = queue.enqueue("analyze_video", {}, priority=0)
+    high = queue.enqueue("analyze_video", {}, priority=10)
+
+    job = queue.lease("w1")
+    assert (job.id, job.status, job.attempts, job.lease_owner) == (high.id, "running", 1, "w1")
+    assert queue.lease("w2").id == low.id
+    assert queue.lease("w3") is None
+
+
+def test_lease_filters_kinds_and_respects_run_after():
+    queue = JobQueue()
+    channel = queue.enqueue("analyze_channel", {})
+    video = queue.enqueue("analyze_video", {})
+    _set(video.id, run_after=datetime.utcnow() + timedelta(hours=1))
+
+    assert queue.lease("w1", kinds=["analyze_video"]) is None
+    assert queue.lease("w1").id == channel.id
+
+
+def test_only_the_owner_can_heartbeat_or_complete():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {})
+    queue.lease("w1")
+
+    assert queue.heartbeat(job.id, "w1")
+    assert not queue.heartbeat(job.id, "w2")
+    assert not queue.complete(job.id, "w2")
+    assert queue.complete(job.id, "w1", {"ok": True})
+    assert queue.get(job.id).status == "completed"
+    assert not queue.heartbeat(job.id, "w1")
+
+
+def test_expired_lease_is_reclaimed_and_resumable():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {}, max_attempts=3)
+    queue.lease("w1")
+    JobContext(queue, queue.get(job.id), "w1").mark_done("batch", 0)
+    _set(job.id, lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+
+    again = queue.lease("w2")
+    assert (again.id, again.lease_owner, again.attempts) == (job.id, "w2", 2)
+    assert not queue.heartbeat(job.id, "w1") # The old owner lost it
+    assert JobContext(queue, again, "w2").is_done("batch", 0)
+
+
+def test_expired_lease_on_final_attempt_fails():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {}, max_attempts=1)
+    queue.lease("w1")
+    _set(job.id, lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+
+    assert queue.lease("w2") is None
+    assert queue.get(job.id).status == "failed"
+
+
+def test_fail_backs_off_then_gives_up():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {}, max_attempts=2)
+    queue.lease("w1")
+
+    assert queue.fail(job.id, "w1", "boom")
+    retried = queue.get(job.id)
+    assert (retried.status, retried.last_error) == ("queued", "boom")
+    assert retried.run_after > datetime.utcnow()
+    assert queue.lease("w1") is None # Still backing off
+
+    _set(job.id, run_after=datetime.utcnow())
+    queue.lease("w1")
+    assert not queue.fail(job.id, "w1", "boom again")
+    assert queue.get(job.id).status == "failed"
+
+
+def test_quota_failure_waits_without_spending_an_attempt():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {}, max_attempts=1)
+    queue.lease("w1")
+
+    assert queue.fail(job.id, "w1", "quota exhausted", retry_after=3600)
+    waiting = queue.get(job.id)
+    assert (waiting.status, waiting.attempts) == ("queued", 0)
+    assert waiting.run_after > datetime.utcnow() + timedelta(minutes=59)
+
+
+def test_release_hands_back_the_attempt():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {})
+    queue.lease("w1")
+
+    assert queue.release(job.id, "w1")
+    released = queue.get(job.id)
+    assert (released.status, released.attempts, released.lease_owner) == ("queued", 0, None)
+
+
+def test_cancel_stops_a_running_job():
+    queue = JobQueue()
+    job = queue.enqueue("analyze_video", {})
+    ctx = JobContext(queue, queue.lease("w1"), "w1")
+
+    assert queue.cancel(job.id)
+    ctx.progress(1)
+    assert ctx.should_stop()
+    assert queue.get(job.id).status == "cancelled"
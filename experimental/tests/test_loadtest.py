@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+import pytest
+
+from benchmarks import loadtest
+
+
+def test_weights_start_from_the_mix_and_take_overrides():
+    weights = loadtest.parse_weights("balanced", "analyze_video=0, channel_videos=5")
+    assert weights == dict(loadtest.MIXES["balanced"], analyze_video=0.0, channel_videos=5.0)
+    with pytest.raises(ValueError):
+        loadtest.parse_weights("balanced", "delete_everything=1")
+
+
+def test_report_has_percentiles_and_error_rates_per_route():
+    recorder = loadtest.Recorder()
+    for n in range(1, 101):
+        recorder.record("video_details", n / 1000, "HTTP 500" if n % 10 == 0 else None)
+    recorder.record("analyze_video", 2.0)
+    recorder.first_event.append(0.25)
+
+    report = recorder.report(elapsed=10.0)
+    details = report["routes"]["video_details"]
+    assert (details["requests"], details["p50_ms"], details["p99_ms"]) == (100, 50, 99)
+    assert details["error_rate"] == 0.1
+    assert report["routes"]["analyze_video"]["first_event_p50_ms"] == 250
+    assert "channel_videos" not in report["routes"]
+    assert report["rps"] == pytest.approx(10.1)
+    assert report["error_examples"] == {"video_details": "HTTP 500"}
+
+
+def _sse(*events):
+    return "".join(f"id: f:{n}\ndata: {event}\n\n" for n, event in enumerate(events))
+
+
+@pytest.mark.parametrize("body, error", [
+    (_sse('{"status": "processing"}', '{"status": "completed"}'), None),
+    (_sse('{"status": "processing"}', '{"status": "error", "message": "quota"}'), "error: quota"),
+    (_sse('{"status": "processing"}'), "stream ended without a final event"),
+])
+def test_analyze_stream_is_read_until_the_final_event(body, error):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body, headers={"content-type": "text/event-stream"}))
+    recorder = loadtest.Recorder()
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            return await loadtest.analyze_video_stream(client, "v1", recorder)
+
+    _, got = asyncio.run(run())
+    assert got == error
+    assert len(recorder.first_event) == 1
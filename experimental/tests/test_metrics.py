@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+from backend.services import metrics
+from backend.services.metrics import Registry
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = Registry("test")
+    registry.counter("jobs_total", "Jobs.", ["status"]).inc(2, status='done "ok"')
+    registry.gauge("depth", "Depth.").set(3)
+    stage = registry.histogram("stage_seconds", "Stages.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        stage.observe(value, stage="fetch")
+
+    lines = registry.render(include_workers=False).splitlines()
+    assert "# TYPE test_jobs_total counter" in lines
+    assert 'test_jobs_total{status="done \\"ok\\""} 2' in lines
+    assert "test_depth 3" in lines
+    assert [line for line in lines if line.startswith("test_stage_seconds")] == [
+        'test_stage_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'test_stage_seconds_bucket{stage="fetch",le="1.0"} 2',
+        'test_stage_seconds_bucket{stage="fetch",le="+Inf"} 3',
+        'test_stage_seconds_sum{stage="fetch"} 5.55',
+        'test_stage_seconds_count{stage="fetch"} 3',
+    ]
+
+
+def test_labels_must_match_the_declaration():
+    counter = Registry("test").counter("calls_total", "Calls.", ["route"])
+    with pytest.raises(ValueError):
+        counter.inc(method="GET")
+
+
+def test_live_worker_snapshots_are_merged_and_dead_ones_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    registry = Registry("test")
+    registry.counter("jobs_total", "Jobs.", ["status"]).inc(status="done")
+    registry.histogram("stage_seconds", "Stages.", ["stage"], buckets=(1.0,)).observe(0.5, stage="fetch")
+
+    worker = Registry("test")
+    worker.counter("jobs_total", "Jobs.", ["status"]).inc(4, status="done")
+    worker.histogram("stage_seconds", "Stages.", ["stage"], buckets=(1.0,)).observe(2.0, stage="fetch")
+    for pid in (os.getppid(), 2 ** 22 + 1): # The pytest parent is alive; the other pid is not
+        with open(tmp_path / f"worker-{pid}.json", "w") as f:
+            json.dump(worker.snapshot(), f)
+
+    merged = registry.merged()
+    assert merged["test_jobs_total"]["samples"] == [[["done"], 5]]
+    assert merged["test_stage_seconds"]["samples"] == [[["fetch"], {"counts": [1, 1], "sum": 2.5, "count": 2}]]
+    assert os.listdir(tmp_path) == [f"worker-{os.getppid()}.json"]
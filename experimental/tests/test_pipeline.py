@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import types
+
+import pytest
+
+import pipeline
+
+
+class _FakeSentiment:
+    def analyze_comment(self, text):
+        return {"vader": {"sentiment": "positive" if "good" in text else "neutral", "score": 0.5 if "good" in text else 0.0}}
+
+
+@pytest.fixture(autouse=True)
+def sentiment(monkeypatch):
+    # The real service loads VADER plus a transformers model per process
+    module = types.ModuleType("backend.services.sentiment_service")
+    module.LocalSentimentService = _FakeSentiment
+    monkeypatch.setitem(sys.modules, "backend.services.sentiment_service", module)
+
+
+@pytest.fixture
+def videos(tmp_path):
+    data = [
+        {"video_id": f"v{n}", "video_title": f"Video {n}",
+         "comments": [{"comment_id": f"v{n}c{i}", "text": f"good camera {i}" if i % 2 else "battery life"} for i in range(5)]}
+        for n in range(3)
+    ]
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps(data, indent=1))
+    return str(path)
+
+
+def test_json_array_is_streamed_across_read_chunks(videos, monkeypatch):
+    monkeypatch.setattr(pipeline, "READ_CHUNK", 7)
+    assert [v["video_id"] for v in pipeline.iter_videos(videos)] == ["v0", "v1", "v2"]
+
+
+def test_shards_partition_the_batches_stably(videos):
+    batch_ids = [batch_id for _, _, batch_id, _ in pipeline.iter_batches(videos, batch_size=2)]
+    assert len(batch_ids) == 9
+    shards = [pipeline.shard_of(batch_id, 3) for batch_id in batch_ids]
+    assert set(shards) == {0, 1, 2}
+    assert pipeline.shard_of("v0_batch_0", 3) == 2 # crc32, the same in every process (unlike hash())
+
+
+def test_resume_repairs_a_torn_tail_and_skips_completed_batches(videos, tmp_path):
+    out = str(tmp_path / "results")
+    assert pipeline.analyze(videos, out, batch_size=2) == 9
+
+    path = pipeline.shard_path(out, 0)
+    with open(path, "r") as f:
+        lines = f.readlines()
+    with open(path, "w") as f:
+        f.writelines(lines[:-1])
+        f.write(lines[-1][:20]) # Interrupted mid-write
+    assert len(list(pipeline.iter_results(path))) == 8
+
+    # A different shard count still sees every completed batch
+    assert sum(pipeline.run_shard(videos, out, shard, 2, batch_size=2) for shard in range(2)) == 1
+    records = [r for p in pipeline.iter_result_files(out) for r in pipeline.iter_results(p)]
+    assert sorted(r["batch_id"] for r in records) == sorted(b for _, _, b, _ in pipeline.iter_batches(videos, 2))
+    with open(path, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+
+def test_incremental_aggregate_matches_a_full_run(videos, tmp_path):
+    out = str(tmp_path / "results")
+    os.makedirs(out)
+    pipeline.run_shard(videos, out, 0, 2, batch_size=2)
+    first = pipeline.aggregate(out)
+    pipeline.run_shard(videos, out, 1, 2, batch_size=2)
+    second = pipeline.aggregate(out)
+    assert second != first
+    assert second == pipeline.aggregate(out, incremental=False)
+    assert [v["video_id"] for v in second["videos"]] == ["v0", "v1", "v2"]
+    assert second["videos"][0]["sentiment_distribution"] == {"positive": 2, "neutral": 3, "negative": 0}
+
+
+def test_legacy_json_array_results_aggregate_like_the_jsonl_directory(videos, tmp_path):
+    out = str(tmp_path / "results")
+    pipeline.analyze(videos, out, batch_size=2)
+    records = [r for p in pipeline.iter_result_files(out) for r in pipeline.iter_results(p)]
+    for record in records:
+        del record["video_index"] # batch_analysis.py didn't write it
+    legacy = tmp_path / "batch_results.json"
+    legacy.write_text(json.dumps(records))
+
+    summary = tmp_path / "summary.json"
+    assert pipeline.aggregate(str(legacy), str(summary)) == pipeline.aggregate(out)
+    assert json.loads(summary.read_text())["channel_summary"]["video_count"] == 3
@@ -0,0 +1,79 @@
+import json
+import os
+import pstats
+
+import pytest
+
+from backend.api import endpoints
+from backend.services import profiling
+
+
+@pytest.fixture(autouse=True)
+def no_armed_captures():
+    yield
+    profiling._route_captures.clear()
+    for path in os.listdir(profiling._requests_dir()) if os.path.isdir(profiling._requests_dir()) else []:
+        os.remove(os.path.join(profiling._requests_dir(), path))
+
+
+def test_job_capture_is_claimed_once_by_id_then_by_kind():
+    by_id = profiling.arm_job(job_id=5)
+    by_kind = profiling.arm_job(kind="analyze_video", mode="sampling")
+    armed = {c["id"]: c["status"] for c in profiling.list_captures()}
+    assert armed[by_id["id"]] == armed[by_kind["id"]] == "armed"
+
+    capture = profiling.claim_job_capture(5, "analyze_video")
+    assert (capture.id, capture.mode) == (by_id["id"], "cprofile") # The job id wins over its kind
+    with profiling.profiled(capture):
+        sum(range(1000))
+    assert pstats.Stats(profiling.capture_file(capture.id)).total_calls > 0
+
+    other = profiling.claim_job_capture(6, "analyze_video")
+    assert (other.id, other.mode) == (by_kind["id"], "sampling")
+    assert profiling.claim_job_capture(7, "analyze_video") is None
+
+
+def test_arm_job_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        profiling.arm_job(job_id=1, kind="analyze_video")
+    with pytest.raises(ValueError):
+        profiling.arm_job()
+    with pytest.raises(ValueError):
+        profiling.arm_job(job_id=1, mode="perf")
+
+
+def test_arm_job_kind_cannot_leave_the_requests_directory():
+    for kind in ("../../escaped", "a/b", "Analyze"):
+        with pytest.raises(ValueError):
+            profiling.arm_job(kind=kind)
+    assert not os.path.exists(os.path.join(profiling.PROFILE_DIR, "escaped.json"))
+
+
+def test_route_capture_covers_the_next_matching_requests():
+    capture = profiling.arm_route("/channel/{channel_id}/videos", requests=2, method="get")
+    assert profiling.capture_for_request("POST", "/api/channel/ch1/videos") is None
+    assert profiling.capture_for_request("GET", "/api/video/v1") is None
+
+    for path in ("/api/channel/ch1/videos", "/channel/ch2/videos/"):
+        claimed = profiling.capture_for_request("GET", path)
+        assert claimed is capture
+        with profiling.profiled(claimed):
+            pass
+    assert profiling.capture_for_request("GET", "/api/channel/ch1/videos") is None
+    assert capture.info()["status"] == "finished"
+    with open(os.path.join(profiling.PROFILE_DIR, capture.id + ".meta.json")) as f:
+        assert json.load(f)["completed"] == 2
+
+
+def test_admin_routes_are_local_only_without_a_token(api, monkeypatch):
+    monkeypatch.setattr(endpoints, "ADMIN_TOKEN", None)
+    assert api("GET", "/api/admin/profiles").status_code == 200
+    assert api("GET", "/api/admin/profiles", client=("203.0.113.9", 5000)).status_code == 403
+
+
+def test_admin_token_is_required_when_set(api, monkeypatch):
+    monkeypatch.setattr(endpoints, "ADMIN_TOKEN", "s3cret")
+    assert api("GET", "/api/admin/profiles").status_code == 403
+    assert api("GET", "/api/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    remote = api("GET", "/api/admin/profiles", client=("203.0.113.9", 5000), headers={"X-Admin-Token": "s3cret"})
+    assert remote.status_code == 200
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from backend.services import quota_service as quota_module
+from backend.services.quota_service import PACIFIC, QuotaExceeded, QuotaService
+
+
+class _Clock(datetime):
+    at = datetime(2025, 1, 10, 6, 0, tzinfo=PACIFIC) # A quarter of the way through the quota day
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.at.astimezone(tz) if tz else cls.at.replace(tzinfo=None)
+
+
+@pytest.fixture
+def quota(monkeypatch):
+    monkeypatch.setattr(quota_module, "datetime", _Clock)
+    monkeypatch.setattr(quota_module, "PACING_BURST", 0.05)
+    return QuotaService(daily_limit=100, interactive_reserve=0.2) # Background budget: 80 units
+
+
+def test_background_classes_are_paced_across_the_day(quota):
+    # By 06:00 the background classes may have used 25% of 80 units, plus a 5% burst
+    for _ in range(24):
+        quota.acquire("backfill", wait=False)
+        quota.record("backfill", "videos.list")
+    with pytest.raises(QuotaExceeded) as paced:
+        quota.acquire("refresh", wait=False)
+    assert paced.value.retry_after == pytest.approx(1 / 80 * 86400) # Until the pacing line reaches one more unit
+    quota.acquire("interactive", wait=False)
+
+
+def test_interactive_reserve_outlasts_the_background_budget(quota, monkeypatch):
+    monkeypatch.setattr(_Clock, "at", datetime(2025, 1, 10, 23, 0, tzinfo=PACIFIC))
+    quota.record("backfill", "search.list", units=80)
+    with pytest.raises(QuotaExceeded) as reserved:
+        quota.acquire("channel", wait=False)
+    assert reserved.value.retry_after == pytest.approx(3600) # The midnight Pacific reset
+    assert quota.headroom("backfill") == 0
+    assert quota.headroom("interactive") == 20
+
+    quota.acquire("interactive", units=20, wait=False)
+    quota.record("interactive", "search.list", units=20)
+    with pytest.raises(QuotaExceeded):
+        quota.acquire("interactive", wait=False)
+
+
+def test_usage_is_shared_through_the_ledger(quota):
+    quota.record("channel", "channels.list", units=30)
+    quota.flush()
+    other = QuotaService(daily_limit=100, interactive_reserve=0.2) # Another process
+    assert other.used("channel") == 30
+    assert other.headroom("backfill") == 50
+    assert other.snapshot()["used_by_priority"]["channel"] == 30
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.models import Channel, Job, TrackedChannel
+from backend.services import refresh_service
+from backend.services.job_queue import JobQueue
+from backend.services.refresh_service import RefreshScheduler, next_interval, record_refresh, track_channel
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(refresh_service, "REFRESH_JITTER", 0.0)
+
+
+def test_interval_follows_comment_and_upload_velocity():
+    busy = TrackedChannel(channel_id="a", interval_seconds=21600)
+    # 50 comments in the last hour: EWMA 25/h, so ~100 new comments every 4 hours
+    assert next_interval(busy, 3600, new_comments=50, new_videos=0) == 4 * 3600
+    # An upload a day (EWMA 0.5/day) wants 4 checks between uploads: every 12h
+    uploads = TrackedChannel(channel_id="b", interval_seconds=21600)
+    assert next_interval(uploads, 86400, new_comments=1, new_videos=1) == pytest.approx(12 * 3600)
+
+    quiet = TrackedChannel(channel_id="c", interval_seconds=21600)
+    assert next_interval(quiet, 21600, new_comments=0, new_videos=0) == 21600 * refresh_service.BACKOFF_FACTOR
+    quiet.interval_seconds = refresh_service.REFRESH_MAX_SECONDS
+    assert next_interval(quiet, 86400, 0, 0) == refresh_service.REFRESH_MAX_SECONDS
+    assert next_interval(busy, 60, new_comments=10_000, new_videos=0) == refresh_service.REFRESH_MIN_SECONDS
+
+
+def test_fleet_budget_stretches_every_interval(db, monkeypatch):
+    monkeypatch.setattr(refresh_service, "REFRESH_DAILY_UNITS", 40.0)
+    for n in range(5):
+        db.add(TrackedChannel(channel_id=f"ch{n}", interval_seconds=8640)) # 10 refreshes/day each
+    db.commit()
+    # 50 refreshes/day at 4 units is 200 units against a budget of 40
+    assert refresh_service.budget_scale(db) == pytest.approx(5.0)
+
+    record_refresh(db, "ch0", {"new_comments": 0, "new_videos": 0})
+    tracked = db.get(TrackedChannel, "ch0")
+    scale = refresh_service.budget_scale(db)
+    assert tracked.next_refresh_at - tracked.last_refresh_at == timedelta(seconds=tracked.interval_seconds * scale)
+
+
+def test_tick_claims_due_channels_once_within_the_active_cap(db, monkeypatch):
+    monkeypatch.setattr(refresh_service, "REFRESH_MAX_ACTIVE", 2)
+    past = datetime.utcnow() - timedelta(minutes=5)
+    for n in range(4):
+        db.add(Channel(id=f"ch{n}"))
+        track_channel(db, f"ch{n}")
+    db.commit()
+    db.query(TrackedChannel).filter(TrackedChannel.channel_id != "ch3").update({"next_refresh_at": past})
+    db.commit()
+    JobQueue().enqueue("analyze_channel", {"channel_id": "ch0"}, dedup_key="channel:ch0")
+
+    scheduler = RefreshScheduler()
+    assert scheduler.tick() == 2 # ch0 is being fully analyzed; ch3 isn't due
+    db.expire_all()
+    assert {job.dedup_key for job in db.query(Job).filter(Job.kind == "refresh_channel")} == {"refresh:ch1", "refresh:ch2"}
+    assert all(t.next_refresh_at > datetime.utcnow() for t in db.query(TrackedChannel))
+    assert scheduler.tick() == 0
+    assert scheduler.stats()["due"] == 0
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from backend.models.models import Channel, Comment, DataVersion, Video
+
+
+def _versions(db):
+    db.expire_all()
+    return {row.scope: row.version for row in db.query(DataVersion)}
+
+
+@pytest.fixture
+def seeded(db):
+    db.add_all([Channel(id="ch1", title="One"), Channel(id="ch2", title="Two")])
+    db.add_all([
+        Video(id="v1", channel_id="ch1", title="A", published_at=datetime(2025, 1, 1)),
+        Video(id="v2", channel_id="ch2", title="B", published_at=datetime(2025, 1, 2)),
+    ])
+    db.add(Comment(id="c1", video_id="v1", text="hi", published_at=datetime(2025, 1, 3)))
+    db.commit()
+    return db
+
+
+def test_comment_writes_bump_video_and_channel(seeded):
+    db = seeded
+    before = _versions(db)
+
+    db.query(Comment).filter(Comment.id == "c1").one().text = "edited"
+    db.commit()
+    edited = _versions(db)
+    assert edited["video:v1"] == before["video:v1"] + 1
+    assert edited["channel:ch1"] == before["channel:ch1"] + 1
+    assert edited["video:v2"] == before["video:v2"]
+
+    db.delete(db.query(Comment).filter(Comment.id == "c1").one())
+    db.commit()
+    assert _versions(db)["video:v1"] == edited["video:v1"] + 1
+
+
+def test_comment_moved_between_videos_bumps_both(seeded):
+    db = seeded
+    before = _versions(db)
+
+    db.query(Comment).filter(Comment.id == "c1").one().video_id = "v2"
+    db.commit()
+    after = _versions(db)
+    for scope in ("video:v1", "video:v2", "channel:ch1", "channel:ch2"):
+        assert after[scope] == before[scope] + 1, scope
+
+
+def test_video_moved_between_channels_bumps_both(seeded):
+    db = seeded
+    before = _versions(db)
+
+    db.query(Video).filter(Video.id == "v1").one().channel_id = "ch2"
+    db.commit()
+    after = _versions(db)
+    assert after["channel:ch1"] == before["channel:ch1"] + 1
+    assert after["channel:ch2"] == before["channel:ch2"] + 1
+
+
+def test_etag_revalidation(seeded, api):
+    db = seeded
+    first = api("GET", "/api/channel/ch1/videos")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert [v["id"] for v in first.json()] == ["v1"]
+
+    cached = api("GET", "/api/channel/ch1/videos", headers={"If-None-Match": etag})
+    assert (cached.status_code, cached.content, cached.headers["etag"]) == (304, b"", etag)
+    weak = api("GET", "/api/channel/ch1/videos", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+    db.query(Video).filter(Video.id == "v1").one().title = "Renamed"
+    db.commit()
+    changed = api("GET", "/api/channel/ch1/videos", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["title"] == "Renamed"
+
+    other = api("GET", "/api/channel/ch1/videos?fields=title")
+    assert other.headers["etag"] != changed.headers["etag"] # Query params are part of the key
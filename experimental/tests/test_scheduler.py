@@ -0,0 +1,88 @@
+import threading
+import time
+
+from backend.services.scheduler import BatchScheduler, PrioritySemaphore
+
+
+def _waiter(semaphore, priority, acquired):
+    def run():
+        semaphore.acquire(priority)
+        acquired.append(priority)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_acquire_and_release_count_slots():
+    semaphore = PrioritySemaphore(2)
+    semaphore.acquire("backfill")
+    with semaphore.slot("interactive"):
+        assert semaphore.stats()["available"] == 0
+    assert semaphore.stats()["available"] == 1
+    semaphore.release()
+    assert semaphore.stats()["available"] == 2
+
+
+def test_freed_slot_goes_to_the_most_urgent_waiter():
+    semaphore = PrioritySemaphore(0)
+    acquired = []
+    _waiter(semaphore, "refresh", acquired)
+    _waiter(semaphore, "backfill", acquired)
+    assert _wait_until(lambda: sum(semaphore.stats()["waiting"].values()) == 2)
+    _waiter(semaphore, "interactive", acquired)
+    assert _wait_until(lambda: semaphore.stats()["waiting"]["interactive"] == 1)
+
+    for expected in (["interactive"], ["interactive", "backfill"], ["interactive", "backfill", "refresh"]):
+        semaphore.release()
+        assert _wait_until(lambda: len(acquired) == len(expected))
+        assert acquired == expected
+
+
+def test_waiter_deferring_to_a_more_urgent_one_is_woken_when_slots_remain():
+    # Two slots free up at once: the backfill waiter (woken first) defers to the
+    # interactive one, which must wake it again after taking its slot
+    for _ in range(20):
+        semaphore = PrioritySemaphore(0)
+        acquired = []
+        threads = [_waiter(semaphore, "backfill", acquired)]
+        assert _wait_until(lambda: semaphore.stats()["waiting"]["backfill"] == 1)
+        threads.append(_waiter(semaphore, "interactive", acquired))
+        assert _wait_until(lambda: semaphore.stats()["waiting"]["interactive"] == 1)
+
+        with semaphore._cond:
+            semaphore._value += 2
+            semaphore._cond.notify_all()
+
+        for thread in threads:
+            thread.join(timeout=2.0)
+        assert sorted(acquired) == ["backfill", "interactive"]
+        assert semaphore.stats()["available"] == 0
+
+
+def test_batches_run_by_class_then_in_turns_per_channel():
+    scheduler = BatchScheduler(workers=1)
+    gate, busy = threading.Event(), threading.Event()
+    ran = []
+    scheduler.submit("refresh", "gate", lambda: (busy.set(), gate.wait(2)))
+    assert busy.wait(2) # The only worker is taken; everything below queues
+
+    futures = [scheduler.submit("backfill", "ch1", ran.append, f"ch1-{i}") for i in range(3)]
+    futures.append(scheduler.submit("backfill", "ch2", ran.append, "ch2-0"))
+    futures.append(scheduler.submit("interactive", "ch3", ran.append, "ch3-0"))
+    cancelled = scheduler.submit("backfill", "ch2", ran.append, "ch2-dropped")
+    assert cancelled.cancel()
+    gate.set()
+
+    for future in futures:
+        future.result(timeout=2)
+    assert ran == ["ch3-0", "ch1-0", "ch2-0", "ch1-1", "ch1-2"]
+    assert scheduler.stats()["queued"] == {"interactive": 0, "channel": 0, "backfill": 0, "refresh": 0}
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime
+from typing import List
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+
+from backend.api import endpoints
+from backend.api.schemas import ChannelOut, CommentOut
+from backend.models.models import Channel, Comment, SentimentType
+from backend.services.response_cache import render
+
+
+def test_every_route_declares_how_it_serializes():
+    undeclared = [
+        f"{sorted(route.methods)} {route.path}" for route in endpoints.router.routes
+        if isinstance(route, APIRoute) and route.response_model is None
+        and isinstance(route.response_class, DefaultPlaceholder) # Explicit classes: SSE, files, trace dumps
+    ]
+    assert undeclared == []
+
+
+def test_orm_rows_render_like_the_json_encoder(db):
+    channel = Channel(id="ch1", title="One", health_score=71.5, last_updated=datetime(2025, 1, 2, 3, 4, 5))
+    comment = Comment(id="c1", video_id="v1", text="hi", sentiment=SentimentType.NEUTRAL, like_count=3)
+    db.add_all([channel, comment])
+    db.commit()
+
+    rendered = json.loads(render(List[ChannelOut], [channel]))
+    assert rendered == [{k: v for k, v in jsonable_encoder(channel).items() if k in ChannelOut.model_fields}]
+    comment_row = json.loads(render(CommentOut, comment))
+    assert (comment_row["sentiment"], comment_row["like_count"], comment_row["topics"]) == ("neutral", 3, "[]")
+
+
+def test_routes_return_only_model_fields(db, api):
+    db.add(Channel(id="ch1", title="One", thumbnail_url="https://example.com/t.png"))
+    db.commit()
+    channels = api("GET", "/api/channels").json()
+    assert [set(c) for c in channels] == [set(ChannelOut.model_fields)]
+    assert api("GET", "/api/channel/ch1").json()["title"] == "One"
@@ -0,0 +1,79 @@
+import pytest
+
+from backend.services import spool_service
+from backend.services.spool_service import CommentSpool, SpoolMiss, SpoolReplaySource
+
+
+def _thread(n, replies=()):
+    thread = {"id": f"t{n}", "snippet": {"text": f"comment {n}"}}
+    if replies:
+        thread["replies"] = {"comments": [{"id": r} for r in replies]}
+    return thread
+
+
+def _spool_fetch(spool, pages, order="relevance", video_id="v1", spooled=None):
+    """Spools one fetch: `pages` is a list of thread lists chained by pageToken, of which the first `spooled` are written."""
+    fetch_id = spool.new_fetch_id()
+    for page, threads in enumerate(pages[:spooled]):
+        response = {"items": threads}
+        if page + 1 < len(pages):
+            response["nextPageToken"] = f"p{page + 1}"
+        params = {"order": order, "pageToken": f"p{page}" if page else None}
+        spool.append_page(video_id, fetch_id, page, "commentThreads", params, response)
+    return fetch_id
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return CommentSpool(str(tmp_path / "spool"))
+
+
+def test_replays_the_newest_fetch_that_covers_the_request(spool):
+    _spool_fetch(spool, [[_thread(1), _thread(2)], [_thread(3)]])
+    _spool_fetch(spool, [[_thread(4), _thread(5)]], order="time")
+    _spool_fetch(spool, [[_thread(6), _thread(7)], [_thread(8)]], spooled=1) # Newest, but its second page is missing
+    source = SpoolReplaySource(spool)
+
+    assert [t["id"] for t in source.get_video_comments("v1", max_results=2)] == ["t6", "t7"]
+    assert [t["id"] for t in source.get_video_comments("v1", max_results=3)] == ["t1", "t2", "t3"]
+    assert [t["id"] for t in source.get_video_comments("v1", order="time")] == ["t4", "t5"]
+
+
+def test_requests_no_fetch_answers_raise_spool_miss(spool):
+    _spool_fetch(spool, [[_thread(1)], [_thread(2)]], spooled=1)
+    source = SpoolReplaySource(spool)
+    with pytest.raises(SpoolMiss):
+        source.get_video_comments("v2")
+    with pytest.raises(SpoolMiss):
+        source.get_video_comments("v1", order="time")
+
+    assert [t["id"] for t in source.get_video_comments("v1", max_results=1)] == ["t1"]
+    with pytest.raises(SpoolMiss):
+        source.get_video_comments("v1", max_results=2) # The live fetch would have read the unspooled page
+
+
+def test_reply_pages_are_merged_only_when_requested(spool):
+    fetch_id = _spool_fetch(spool, [[_thread(1, replies=["r1"]), _thread(2)]])
+    spool.append_page("v1", fetch_id, 0, "comments", {"parentId": "t1", "pageToken": None},
+                      {"items": [{"id": "r1"}, {"id": "r2"}]})
+    source = SpoolReplaySource(spool)
+
+    threads = source.get_video_comments("v1", include_replies=True)
+    assert sorted(r["id"] for r in threads[0]["replies"]["comments"]) == ["r1", "r2"]
+    assert "replies" not in threads[1]
+    assert all("replies" not in t for t in source.get_video_comments("v1"))
+
+
+def test_gzip_and_zstd_spools_stay_readable_and_a_torn_frame_loses_one_page(spool, monkeypatch):
+    _spool_fetch(spool, [[_thread(1)]])
+    monkeypatch.setattr(spool_service, "zstandard", None)
+    gzip_spool = CommentSpool(str(spool.root))
+    assert gzip_spool.extension == ".jsonl.gz"
+    _spool_fetch(gzip_spool, [[_thread(2)]])
+    with open(gzip_spool.root / "v1.jsonl.gz", "ab") as f:
+        f.write(gzip_spool._compress(b'{"kind": "commentThreads"')[:-6]) # Crash mid-write
+
+    monkeypatch.undo()
+    records = list(CommentSpool(str(spool.root)).iter_records("v1"))
+    assert [r["response"]["items"][0]["id"] for r in records] == ["t1", "t2"]
+    assert spool.video_ids() == ["v1"]
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+
+from backend.models.models import Channel, Comment, SentimentBucket, SentimentType, Video
+from backend.services import timeseries
+
+
+def _buckets(db, resolution="day"):
+    db.expire_all()
+    rows = db.query(SentimentBucket).filter(SentimentBucket.resolution == resolution)
+    return {
+        (row.scope, row.bucket_start): (row.positive, row.neutral, row.negative, round(row.weighted_sum, 6), row.weight_sum)
+        for row in rows
+        if row.positive + row.neutral + row.negative
+    }
+
+
+def _assert_matches_rebuild(db):
+    maintained = {resolution: _buckets(db, resolution) for resolution in timeseries.RESOLUTIONS}
+    db.query(SentimentBucket).delete()
+    timeseries.rebuild(db)
+    db.commit()
+    assert {resolution: _buckets(db, resolution) for resolution in timeseries.RESOLUTIONS} == maintained
+
+
+@pytest.fixture
+def seeded(db):
+    db.add_all([Channel(id="ch1", title="One"), Channel(id="ch2", title="Two")])
+    db.add_all([
+        Video(id="v1", channel_id="ch1", title="A", published_at=datetime(2025, 1, 1)),
+        Video(id="v2", channel_id="ch2", title="B", published_at=datetime(2025, 1, 1)),
+    ])
+    db.add_all([
+        Comment(id="c1", video_id="v1", text="a", published_at=datetime(2025, 1, 6, 9, 30), like_count=3),
+        Comment(id="c2", video_id="v1", text="b", published_at=datetime(2025, 1, 7, 10, 0),
+                sentiment=SentimentType.NEGATIVE, vader_score=-0.5),
+    ])
+    db.commit()
+    return db
+
+
+def test_insert_buckets_video_and_channel(seeded):
+    db = seeded
+    day = datetime(2025, 1, 6)
+    assert _buckets(db)[("video:v1", day)] == (0, 1, 0, 0.0, 4.0)
+    assert _buckets(db)[("channel:ch1", day)] == (0, 1, 0, 0.0, 4.0)
+    week = _buckets(db, "week")[("video:v1", day)] # Jan 6 2025 is a Monday
+    assert week[:3] == (0, 1, 1)
+    _assert_matches_rebuild(db)
+
+
+def test_rescore_moves_counts_between_labels(seeded):
+    db = seeded
+    comment = db.query(Comment).filter(Comment.id == "c1").one()
+    comment.sentiment = SentimentType.POSITIVE
+    comment.vader_score = 0.8
+    db.commit()
+
+    assert _buckets(db)[("video:v1", datetime(2025, 1, 6))] == (1, 0, 0, 3.2, 4.0)
+    _assert_matches_rebuild(db)
+
+
+def test_delete_removes_the_contribution(seeded):
+    db = seeded
+    db.delete(db.query(Comment).filter(Comment.id == "c2").one())
+    db.commit()
+
+    assert ("video:v1", datetime(2025, 1, 7)) not in _buckets(db)
+    assert ("channel:ch1", datetime(2025, 1, 7)) not in _buckets(db)
+    _assert_matches_rebuild(db)
+
+
+def test_comment_moved_between_videos_and_channels(seeded):
+    db = seeded
+    comment = db.query(Comment).filter(Comment.id == "c2").one()
+    comment.video_id = "v2"
+    comment.published_at = datetime(2025, 1, 8, 12, 0)
+    db.commit()
+
+    buckets = _buckets(db)
+    assert ("video:v1", datetime(2025, 1, 7)) not in buckets
+    assert ("channel:ch1", datetime(2025, 1, 7)) not in buckets
+    assert buckets[("video:v2", datetime(2025, 1, 8))][:3] == (0, 0, 1)
+    assert buckets[("channel:ch2", datetime(2025, 1, 8))][:3] == (0, 0, 1)
+    _assert_matches_rebuild(db)
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import random
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from backend.database import AsyncSessionLocal
+from backend.models.models import Channel, Comment, TopicSketch, Video
+from backend.services import topic_sketches
+from backend.services.aggregates import TopK
+
+
+def _sketch(db, scope, window="all", start=topic_sketches.ALL_TIME):
+    db.expire_all()
+    row = db.query(TopicSketch).filter(
+        TopicSketch.scope == scope, TopicSketch.window == window, TopicSketch.window_start == start
+    ).one_or_none()
+    return TopK.from_dict(json.loads(row.sketch)).counts if row else {}
+
+
+def _all_sketches(db):
+    db.expire_all()
+    return {
+        (row.scope, row.window, row.window_start): {k: v for k, v in json.loads(row.sketch)["counts"].items() if v}
+        for row in db.query(TopicSketch)
+    }
+
+
+@pytest.fixture
+def seeded(db):
+    db.add_all([Channel(id="ch1", title="One"), Channel(id="ch2", title="Two")])
+    db.add_all([
+        Video(id="v1", channel_id="ch1", title="A", published_at=datetime(2025, 1, 1)),
+        Video(id="v2", channel_id="ch2", title="B", published_at=datetime(2025, 1, 1)),
+    ])
+    db.add_all([
+        Comment(id="c1", video_id="v1", text="a", published_at=datetime(2025, 1, 6), topics='["audio", "editing"]'),
+        Comment(id="c2", video_id="v1", text="b", published_at=datetime(2025, 1, 14), topics='["audio"]'),
+    ])
+    db.commit()
+    return db
+
+
+def test_insert_counts_per_scope_and_week(seeded):
+    db = seeded
+    assert _sketch(db, "video:v1") == {"audio": 2, "editing": 1}
+    assert _sketch(db, "channel:ch1") == {"audio": 2, "editing": 1}
+    assert _sketch(db, "video:v1", "week", datetime(2025, 1, 6)) == {"audio": 1, "editing": 1}
+    assert _sketch(db, "video:v1", "week", datetime(2025, 1, 13)) == {"audio": 1}
+
+
+def test_retag_and_delete(seeded):
+    db = seeded
+    db.query(Comment).filter(Comment.id == "c1").one().topics = '["lighting"]'
+    db.commit()
+    assert _sketch(db, "channel:ch1") == {"audio": 1, "lighting": 1}
+
+    db.delete(db.query(Comment).filter(Comment.id == "c2").one())
+    db.commit()
+    assert _sketch(db, "video:v1") == {"lighting": 1}
+    assert _sketch(db, "video:v1", "week", datetime(2025, 1, 13)) == {}
+
+
+def test_comment_moved_between_videos(seeded):
+    db = seeded
+    comment = db.query(Comment).filter(Comment.id == "c1").one()
+    comment.video_id = "v2"
+    db.commit()
+
+    assert _sketch(db, "channel:ch1") == {"audio": 1}
+    assert _sketch(db, "channel:ch2") == {"audio": 1, "editing": 1}
+    assert _sketch(db, "video:v2", "week", datetime(2025, 1, 6)) == {"audio": 1, "editing": 1}
+
+    maintained = _all_sketches(db)
+    topic_sketches.rebuild(db)
+    db.commit()
+    assert _all_sketches(db) == {key: counts for key, counts in maintained.items() if counts}
+
+
+def test_counts_stay_within_the_error_bound(db, monkeypatch):
+    monkeypatch.setattr(topic_sketches, "TOPIC_SKETCH_CAPACITY", 3)
+    db.add(Channel(id="ch1", title="One"))
+    db.add(Video(id="v1", channel_id="ch1", title="A", published_at=datetime(2025, 1, 1)))
+    rng = random.Random(7)
+    exact = Counter()
+    for i in range(120):
+        topics = rng.sample(["audio"] * 6 + ["editing"] * 3 + ["music", "intro", "ads", "pacing"], 2)
+        exact.update(set(topics))
+        db.add(Comment(id=f"c{i}", video_id="v1", text="x", published_at=datetime(2025, 1, 6), topics=json.dumps(sorted(set(topics)))))
+        if i % 10 == 9:
+            db.commit()
+    db.commit()
+
+    async def load():
+        async with AsyncSessionLocal() as session:
+            return await topic_sketches.load_topics(session, "channel:ch1", n=3)
+
+    result = asyncio.run(load())
+    assert result["mentions"] == sum(exact.values())
+    assert result["topics"][0]["topic"] == "audio"
+    for entry in result["topics"]:
+        assert exact[entry["topic"]] - result["max_error"] <= entry["count"] <= exact[entry["topic"]]
+
+
+def test_topk_merge_remove_and_legacy_dicts():
+    left, right = TopK(2), TopK(2)
+    left.update(["a", "a", "b"])
+    right.update(["a", "c", "c"])
+    merged = TopK(2).merge(left).merge(right)
+    assert merged.total == 6
+    assert merged.most_common(2) == [("a", 2), ("c", 1)] # Trimmed by the third-largest count
+    assert merged.error_bound() == 1
+
+    merged.remove(["a", "zzz"]) # Uncounted items leave the total alone
+    assert (merged.counts["a"], merged.total) == (1, 5)
+
+    legacy = TopK.from_dict({"capacity": 2, "counts": {"a": 2, "b": 1}})
+    assert (legacy.total, legacy.error_bound()) == (3, 0)
@@ -0,0 +1,62 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from backend.services import tracing
+from backend.services.scheduler import run_blocking
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = tracing.InMemoryExporter()
+    monkeypatch.setattr(tracing, "_exporters", [exporter])
+    return exporter
+
+
+def test_spans_follow_work_onto_other_threads(exporter):
+    def persist():
+        with tracing.span("persist_batch", batch=3):
+            return threading.current_thread().name
+
+    async def request():
+        with tracing.span("analyze_video", video_id="v1"):
+            return await run_blocking(persist)
+
+    assert asyncio.run(request()).startswith("api-blocking")
+    child, root = exporter.spans
+    assert (root.name, child.name) == ("analyze_video", "persist_batch")
+    assert child.parent_id == root.span_id and child.trace_id == root.trace_id
+    assert child.thread_id != root.thread_id
+    assert exporter.traces() == [{
+        "trace_id": root.trace_id, "name": "analyze_video", "start": root.start,
+        "duration_ms": (root.end_time - root.start) * 1000, "attributes": {"video_id": "v1"},
+    }]
+
+
+def test_failed_spans_record_the_error_and_disabled_tracing_is_a_no_op(exporter, monkeypatch):
+    with pytest.raises(RuntimeError):
+        with tracing.span("gemini_call"):
+            raise RuntimeError("quota")
+    assert exporter.spans[0].attributes["error"] == "RuntimeError('quota')"
+
+    monkeypatch.setattr(tracing, "_exporters", [])
+    with tracing.span("ignored") as span:
+        assert span is None
+    assert tracing.start_span("ignored") is None
+
+
+def test_chrome_trace_export_from_memory_and_file(exporter, tmp_path):
+    file_exporter = tracing.add_exporter(tracing.FileExporter(str(tmp_path)))
+    with tracing.span("fetch_comments", pages=2):
+        with tracing.span("youtube.commentThreads.list"):
+            pass
+
+    events = exporter.chrome_trace()["traceEvents"]
+    assert [e["ph"] for e in events] == ["M", "X", "X"]
+    assert events[2]["args"]["pages"] == 2 # Spans are exported as they end, children first
+
+    with open(file_exporter.path) as f:
+        written = json.loads(f.read().rstrip().rstrip(",") + "]") # The closing bracket is optional for Chrome
+    assert [e["name"] for e in written] == ["thread_name", "youtube.commentThreads.list", "fetch_comments"]
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from backend.api import endpoints
+from backend.models.models import Channel, Comment, SentimentType, Video
+
+
+class _FakeGemini:
+    def __init__(self):
+        self.calls = []
+
+    def generate_top_50_insights(self, comments):
+        self.calls.append([c["id"] for c in comments])
+        return {"sentiment_summary": f"{len(comments)} comments"}
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    fake = _FakeGemini()
+    monkeypatch.setattr(endpoints, "get_sentiment_service", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def seeded(db):
+    db.add(Channel(id="ch1", title="One"))
+    db.add_all([
+        Video(id="v1", channel_id="ch1", title="Done", published_at=datetime(2025, 1, 1), analysis_status="completed", view_count=10),
+        Video(id="v2", channel_id="ch1", title="New", published_at=datetime(2025, 1, 2), analysis_status="pending"),
+    ])
+    db.add_all([
+        Comment(id="c1", video_id="v1", text="great", sentiment=SentimentType.POSITIVE, published_at=datetime(2025, 1, 3)),
+        Comment(id="c2", video_id="v1", text="meh", sentiment=SentimentType.NEUTRAL, published_at=datetime(2025, 1, 3)),
+    ])
+    db.commit()
+    return db
+
+
+def test_listing_is_sparse_by_default(seeded, api, gemini):
+    videos = {v["id"]: v for v in api("GET", "/api/channel/ch1/videos").json()}
+    assert set(videos["v1"]) == set(endpoints.VIDEO_LIST_FIELDS)
+    assert videos["v1"]["view_count"] == 10
+
+    picked = api("GET", "/api/channel/ch1/videos?fields=title").json()
+    assert sorted(picked, key=lambda v: v["id"]) == [{"id": "v1", "title": "Done"}, {"id": "v2", "title": "New"}]
+    assert gemini.calls == []
+
+
+def test_expansions_only_for_completed_videos(seeded, api, gemini):
+    response = api("GET", "/api/channel/ch1/videos?fields=title&include=distribution,top_50")
+    videos = {v["id"]: v for v in response.json()}
+    assert videos["v1"]["distribution"] == {"positive": 0.5, "neutral": 0.5, "negative": 0.0}
+    assert videos["v1"]["top_50_analysis"] == {"sentiment_summary": "2 comments"}
+    assert set(videos["v2"]) == {"id", "title"}
+    assert len(gemini.calls) == 1
+
+
+def test_unknown_fields_and_expansions_are_rejected(seeded, api):
+    assert api("GET", "/api/channel/ch1/videos?fields=secret").status_code == 400
+    assert api("GET", "/api/channel/ch1/videos?include=everything").status_code == 400
+
+
+def test_video_details_generate_top_50_only_when_included(seeded, api, gemini):
+    details = api("GET", "/api/video/v1").json()
+    assert details["top_50_analysis"] is None
+    assert details["sentiment_distribution"]["positive"] == 0.5
+    assert gemini.calls == []
+
+    expanded = api("GET", "/api/video/v1?include=top_50").json()
+    assert expanded["top_50_analysis"] == {"sentiment_summary": "2 comments"}
+    assert api("GET", "/api/video/v2?include=top_50").json()["top_50_analysis"] is None # Not analyzed yet
+    assert len(gemini.calls) == 1
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from backend import worker
+from backend.services.job_queue import JobQueue
+from backend.services.scheduler import JOB_PRIORITY
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_interactive_lane_runs_while_background_jobs_fill_every_slot(monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def slow(ctx):
+        started.append(ctx.job_id)
+        release.wait(5)
+
+    monkeypatch.setitem(worker.HANDLERS, "refresh_channel", slow)
+    monkeypatch.setitem(worker.HANDLERS, "analyze_video", lambda ctx: {"status": "completed"})
+    monkeypatch.setattr(worker, "POLL_INTERVAL", 0.02)
+    queue = JobQueue()
+    background = queue.enqueue("refresh_channel", {"channel_id": "ch1"}, priority=JOB_PRIORITY["refresh"])
+
+    stop = threading.Event()
+    loop = threading.Thread(target=worker.worker_loop, args=("test", stop), kwargs={"jobs": 1}, daemon=True)
+    loop.start()
+    try:
+        assert _wait_until(lambda: started == [background.id])
+        waiting = queue.enqueue("refresh_channel", {"channel_id": "ch2"}, priority=JOB_PRIORITY["refresh"])
+        interactive = queue.enqueue("analyze_video", {"video_id": "v1"}, priority=JOB_PRIORITY["interactive"])
+
+        assert _wait_until(lambda: queue.get(interactive.id).status == "completed")
+        assert queue.get(background.id).status == "running"
+        assert queue.get(waiting.id).status == "queued" # The interactive lane takes nothing else
+    finally:
+        release.set()
+        stop.set()
+        loop.join(5)
+    assert not loop.is_alive()
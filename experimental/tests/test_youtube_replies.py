@@ -0,0 +1,97 @@
+import pytest
+
+from backend.services.spool_service import CommentSpool, SpoolReplaySource
+from backend.services.youtube_service import YouTubeService, flatten_comment_threads
+
+
+def _comment(comment_id, text, parent_id=None):
+    snippet = {"textDisplay": text, "authorDisplayName": "a", "likeCount": 0, "publishedAt": "2025-01-01T00:00:00Z"}
+    if parent_id:
+        snippet["parentId"] = parent_id
+    return {"id": comment_id, "snippet": snippet}
+
+
+def _thread(thread_id, total_replies=0, inlined=0):
+    thread = {"id": thread_id, "snippet": {"totalReplyCount": total_replies, "topLevelComment": _comment(thread_id, thread_id)}}
+    if inlined:
+        thread["replies"] = {"comments": [_comment(f"{thread_id}.r{n}", "reply", thread_id) for n in range(inlined)]}
+    return thread
+
+
+class _Request:
+    def __init__(self, method, response):
+        self.methodId = f"youtube.{method}"
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class _FakeYouTube:
+    """commentThreads pages of two threads each, and reply pages of two replies each."""
+
+    def __init__(self, threads):
+        self.threads = threads
+        self.calls = []
+
+    def commentThreads(self):
+        return self
+
+    def comments(self):
+        return self
+
+    def list(self, **params):
+        self.calls.append(params)
+        start = int(params.get("pageToken") or 0)
+        if "parentId" in params:
+            total = next(t for t in self.threads if t["id"] == params["parentId"])["snippet"]["totalReplyCount"]
+            items = [_comment(f"{params['parentId']}.r{n}", "reply", params["parentId"]) for n in range(start, min(start + 2, total))]
+            more = start + 2 < total
+            method = "comments.list"
+        else:
+            items = [dict(t) for t in self.threads[start:start + 2]]
+            if params["part"] == "snippet":
+                for item in items:
+                    item.pop("replies", None)
+            more = start + 2 < len(self.threads)
+            method = "commentThreads.list"
+        response = {"items": items}
+        if more:
+            response["nextPageToken"] = str(start + 2)
+        return _Request(method, response)
+
+
+@pytest.fixture
+def youtube(tmp_path):
+    fake = _FakeYouTube([_thread("t1", total_replies=5, inlined=1), _thread("t2", total_replies=1, inlined=1), _thread("t3")])
+    service = YouTubeService(spool=CommentSpool(str(tmp_path / "spool")), priority="interactive")
+    service.youtube = fake
+    service._thread_client = lambda: fake
+    return service, fake
+
+
+def test_replies_are_paged_only_for_threads_with_more_than_inlined(youtube):
+    service, fake = youtube
+    threads = service.get_video_comments("v1", max_results=None, include_replies=True)
+    assert [len(t.get("replies", {}).get("comments", [])) for t in threads] == [5, 1, 0]
+    assert [c["parentId"] for c in fake.calls if "parentId" in c] == ["t1"] * 3
+
+    rows = flatten_comment_threads(threads)
+    assert len(rows) == 9
+    assert {r["parent_id"] for r in rows if r["id"].startswith("t1.")} == {"t1"}
+    assert [r["id"] for r in rows if r["parent_id"] is None] == ["t1", "t2", "t3"]
+
+
+def test_without_replies_only_top_level_threads_are_fetched(youtube):
+    service, fake = youtube
+    threads = service.get_video_comments("v1", max_results=None, include_replies=False)
+    assert [t["id"] for t in threads] == ["t1", "t2", "t3"]
+    assert all(c["part"] == "snippet" for c in fake.calls)
+    assert all("replies" not in t for t in threads)
+
+
+def test_reply_pages_are_spooled_and_replayable(youtube):
+    service, _ = youtube
+    live = service.get_video_comments("v1", max_results=None, include_replies=True)
+    replayed = SpoolReplaySource(service.spool).get_video_comments("v1", include_replies=True)
+    assert flatten_comment_threads(replayed) == flatten_comment_threads(live)